@@ -0,0 +1,183 @@
+# almacen_movimientos.py
+# -----------------------------------------
+# Almacén columnar de movimientos - BioSalud Natural SpA
+# Reemplaza la matriz "lista de listas" [fecha, id_producto, entrada, salida]
+# por 4 columnas contiguas (módulo array):
+#   fecha      -> ordinal del día (int32)
+#   id_producto-> int32
+#   entrada    -> centésimas de unidad (int64, punto fijo)
+#   salida     -> centésimas de unidad (int64, punto fijo, ver cantidades.py)
+# Cada fila ocupa 24 bytes en lugar de ~150+ de una lista con str y floats.
+# -----------------------------------------
+
+from array import array
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from cantidades import ESCALA, a_centesimas
+
+
+@lru_cache(maxsize=4096)
+def fecha_a_ordinal(fecha: str) -> int:
+    """Convierte 'YYYY-MM-DD' en el ordinal del día (date.toordinal)."""
+    return date(int(fecha[0:4]), int(fecha[5:7]), int(fecha[8:10])).toordinal()
+
+
+@lru_cache(maxsize=4096)
+def ordinal_a_fecha(ordinal: int) -> str:
+    """Convierte un ordinal de día en 'YYYY-MM-DD'."""
+    return date.fromordinal(ordinal).isoformat()
+
+
+class AlmacenMovimientos:
+    """
+    Matriz de movimientos con almacenamiento columnar.
+    Mantiene la API de lista usada por el resto del sistema: append, extend,
+    len, iteración (filas [fecha, id, entrada, salida]), índices y reversed.
+    """
+
+    def __init__(self, filas: Iterable = ()):
+        self._fechas = array('i')
+        self._ids = array('i')
+        self._entradas = array('q')
+        self._salidas = array('q')
+        self.extend(filas)
+
+    # ---------- escritura ----------
+
+    def agregar(self, fecha: str, id_producto: int, entrada: float, salida: float) -> None:
+        """
+        Agrega un movimiento al final de las columnas. Los cuatro valores se
+        convierten antes de tocar ninguna columna: si alguno no es válido se
+        lanza ValueError y el almacén queda como estaba.
+        """
+        self.agregar_enteros(fecha_a_ordinal(fecha), int(id_producto),
+                             a_centesimas(entrada), a_centesimas(salida))
+
+    def agregar_enteros(self, ordinal: int, id_producto: int, entrada: int, salida: int) -> None:
+        """
+        Agrega un movimiento ya codificado (ordinal de la fecha, cantidades en centésimas).
+        ValueError si algún valor no cabe en su columna (no se agrega nada).
+        """
+        n = len(self._ids)
+        try:
+            self._fechas.append(ordinal)
+            self._ids.append(id_producto)
+            self._entradas.append(entrada)
+            self._salidas.append(salida)
+        except (OverflowError, TypeError) as e:
+            # Deshacer lo agregado para que las columnas sigan alineadas
+            for columna in self.columnas():
+                del columna[n:]
+            raise ValueError(f"Movimiento fuera de rango: {e}") from e
+
+    def append(self, fila) -> None:
+        """Agrega una fila [fecha, id_producto, entrada, salida] (compatible con list)."""
+        fecha, pid, ent, sal = fila
+        self.agregar(fecha, pid, ent, sal)
+
+    def extend(self, filas: Iterable) -> None:
+        """Agrega varias filas."""
+        for fila in filas:
+            self.append(fila)
+
+    def clear(self) -> None:
+        """Elimina todos los movimientos."""
+        for columna in (self._fechas, self._ids, self._entradas, self._salidas):
+            del columna[:]
+
+    def reemplazar(self, otro: "AlmacenMovimientos") -> None:
+        """Toma las columnas de otro almacén (sin copiar filas); el otro no debe seguir usándose."""
+        self._fechas, self._ids = otro._fechas, otro._ids
+        self._entradas, self._salidas = otro._entradas, otro._salidas
+
+    def eliminar_producto(self, id_producto: int) -> int:
+        """Elimina los movimientos de un producto. Devuelve cuántas filas se quitaron."""
+        if id_producto not in self._ids:
+            return 0
+        conservar = [i for i, pid in enumerate(self._ids) if pid != id_producto]
+        quitadas = len(self._ids) - len(conservar)
+        self._fechas = array('i', [self._fechas[i] for i in conservar])
+        self._ids = array('i', [self._ids[i] for i in conservar])
+        self._entradas = array('q', [self._entradas[i] for i in conservar])
+        self._salidas = array('q', [self._salidas[i] for i in conservar])
+        return quitadas
+
+    # ---------- lectura ----------
+
+    def _fila(self, i: int) -> List:
+        return [
+            ordinal_a_fecha(self._fechas[i]),
+            self._ids[i],
+            self._entradas[i] / ESCALA,
+            self._salidas[i] / ESCALA,
+        ]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[List]:
+        for i in range(len(self._ids)):
+            yield self._fila(i)
+
+    def __reversed__(self) -> Iterator[List]:
+        for i in range(len(self._ids) - 1, -1, -1):
+            yield self._fila(i)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self._fila(i) for i in range(*indice.indices(len(self._ids)))]
+        if indice < 0:
+            indice += len(self._ids)
+        if not 0 <= indice < len(self._ids):
+            raise IndexError("índice de movimiento fuera de rango")
+        return self._fila(indice)
+
+    def columnas(self) -> Tuple[array, array, array, array]:
+        """Columnas (fechas, ids, entradas, salidas) sin copiar; solo para lectura."""
+        return self._fechas, self._ids, self._entradas, self._salidas
+
+    @classmethod
+    def desde_columnas(cls, fechas, ids, entradas, salidas) -> "AlmacenMovimientos":
+        """
+        Almacén armado copiando buffers ya codificados (int32 / int64 en centésimas),
+        p. ej. memoryviews de una instantánea binaria. No recorre las filas.
+        """
+        nuevo = cls()
+        for columna, origen in zip(nuevo.columnas(), (fechas, ids, entradas, salidas)):
+            columna.frombytes(memoryview(origen).cast('B'))
+        return nuevo
+
+    def filas_enteras(self, desde: int = 0) -> Iterator[Tuple[int, int, int, int]]:
+        """Recorre las filas sin convertir: (ordinal_fecha, id, entrada, salida) en centésimas (desde la fila `desde`)."""
+        columnas = self.columnas()
+        if desde:
+            columnas = tuple(c[desde:] for c in columnas)
+        return zip(*columnas)
+
+    def contiene_producto(self, id_producto: int) -> bool:
+        """Indica si el producto tiene movimientos registrados."""
+        return id_producto in self._ids
+
+    def copia(self) -> "AlmacenMovimientos":
+        """Copia independiente (copia directa de los buffers)."""
+        nuevo = AlmacenMovimientos()
+        nuevo._fechas = array('i', self._fechas)
+        nuevo._ids = array('i', self._ids)
+        nuevo._entradas = array('q', self._entradas)
+        nuevo._salidas = array('q', self._salidas)
+        return nuevo
+
+    # ---------- sumatorias sobre las columnas ----------
+
+    def netos_por_producto(self, desde: int = 0) -> Dict[int, int]:
+        """Σ(entradas_i) - Σ(salidas_i) por producto, en centésimas (desde la fila `desde`)."""
+        netos: Dict[int, int] = {}
+        columnas = (self._ids, self._entradas, self._salidas)
+        if desde:
+            columnas = tuple(c[desde:] for c in columnas)
+        for pid, ent, sal in zip(*columnas):
+            netos[pid] = netos.get(pid, 0) + ent - sal
+        return netos
+
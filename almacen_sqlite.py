@@ -0,0 +1,254 @@
+# almacen_sqlite.py
+# -----------------------------------------
+# Almacenamiento SQLite (opcional) - BioSalud Natural SpA
+# Guarda catálogo y movimientos en una base sqlite3 (modo WAL) con índice
+# (id_producto, fecha), de modo que un inventario grande se abre sin cargar
+# toda la historia y las consultas por producto usan el índice.
+# Cantidades, costos y precios se guardan en centésimas (enteros), igual que en el motor.
+# -----------------------------------------
+
+import sqlite3
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cantidades import ESCALA, a_centesimas
+from resumen_periodos import DIA, Acumulado
+from reporte_csv import CATALOGO, MOVIMIENTOS, leer_reporte
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS productos (
+    id            INTEGER PRIMARY KEY,
+    nombre        TEXT    NOT NULL,
+    costo         INTEGER NOT NULL,
+    precio        INTEGER NOT NULL,
+    stock_inicial INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS movimientos (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha       TEXT    NOT NULL,
+    id_producto INTEGER NOT NULL,
+    entrada     INTEGER NOT NULL DEFAULT 0,
+    salida      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_movimientos_producto_fecha
+    ON movimientos (id_producto, fecha);
+"""
+
+
+class AlmacenSQLite:
+    """Catálogo y movimientos persistidos en SQLite."""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript(_ESQUEMA)
+
+    def cerrar(self) -> None:
+        self.conexion.close()
+
+    def __enter__(self) -> "AlmacenSQLite":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    # ---------- catálogo ----------
+
+    def productos(self) -> List[Dict]:
+        """Catálogo completo ordenado por id."""
+        filas = self.conexion.execute("SELECT id, nombre, costo, precio FROM productos ORDER BY id")
+        return [{"id": pid, "nombre": nombre, "costo": costo, "precio": precio}
+                for pid, nombre, costo, precio in filas]
+
+    def stock_inicial(self) -> Dict[int, int]:
+        """Stock inicial por producto, en centésimas."""
+        return dict(self.conexion.execute("SELECT id, stock_inicial FROM productos"))
+
+    def agregar_producto(self, producto: Dict, stock_inicial: int = 0) -> None:
+        """Inserta un producto; stock_inicial en centésimas."""
+        with self.conexion:
+            self.conexion.execute(
+                "INSERT INTO productos (id, nombre, costo, precio, stock_inicial) VALUES (?, ?, ?, ?, ?)",
+                (producto["id"], producto["nombre"], producto["costo"], producto["precio"], stock_inicial))
+
+    def actualizar_producto(self, id_producto: int, **campos) -> None:
+        columnas = [c for c in ("nombre", "costo", "precio") if c in campos]
+        if not columnas:
+            return
+        asignaciones = ", ".join(f"{c} = ?" for c in columnas)
+        with self.conexion:
+            self.conexion.execute(f"UPDATE productos SET {asignaciones} WHERE id = ?",
+                                  [campos[c] for c in columnas] + [id_producto])
+
+    def eliminar_producto(self, id_producto: int) -> None:
+        """Elimina el producto y sus movimientos."""
+        with self.conexion:
+            self.conexion.execute("DELETE FROM movimientos WHERE id_producto = ?", (id_producto,))
+            self.conexion.execute("DELETE FROM productos WHERE id = ?", (id_producto,))
+
+    # ---------- movimientos ----------
+
+    def agregar_movimiento(self, fecha: str, id_producto: int, entrada: int, salida: int) -> None:
+        """Inserta un movimiento con cantidades ya en centésimas."""
+        with self.conexion:
+            self.conexion.execute(
+                "INSERT INTO movimientos (fecha, id_producto, entrada, salida) VALUES (?, ?, ?, ?)",
+                (fecha, id_producto, entrada, salida))
+
+    def agregar_movimientos(self, filas: Iterable[List]) -> None:
+        """Inserta muchas filas [fecha, id, entrada, salida] en una sola transacción."""
+        with self.conexion:
+            self.conexion.executemany(
+                "INSERT INTO movimientos (fecha, id_producto, entrada, salida) VALUES (?, ?, ?, ?)",
+                ((f, pid, a_centesimas(e), a_centesimas(s)) for f, pid, e, s in filas))
+
+    def contiene_producto(self, id_producto: int) -> bool:
+        """Indica si el producto tiene movimientos (usa el índice)."""
+        return self.conexion.execute(
+            "SELECT EXISTS (SELECT 1 FROM movimientos WHERE id_producto = ?)", (id_producto,)).fetchone()[0] == 1
+
+    def cantidad_movimientos(self) -> int:
+        return self.conexion.execute("SELECT COUNT(*) FROM movimientos").fetchone()[0]
+
+    def iterar_movimientos(self) -> Iterator[List]:
+        """Recorre los movimientos en orden de registro sin cargarlos todos en memoria."""
+        cursor = self.conexion.execute(
+            "SELECT fecha, id_producto, entrada, salida FROM movimientos ORDER BY id")
+        for fecha, pid, ent, sal in cursor:
+            yield [fecha, pid, ent / ESCALA, sal / ESCALA]
+
+    # ---------- consultas agregadas ----------
+
+    def vector_stock_actual(self) -> Dict[int, int]:
+        """stock_i = stock_inicial_i + Σ(entradas_i) - Σ(salidas_i), en centésimas, con GROUP BY en la base."""
+        stock = self.stock_inicial()
+        filas = self.conexion.execute(
+            "SELECT id_producto, SUM(entrada) - SUM(salida) FROM movimientos GROUP BY id_producto")
+        for pid, neto in filas:
+            stock[pid] = stock.get(pid, 0) + neto
+        return stock
+
+    def stock_de_producto(self, id_producto: int) -> float:
+        """Stock de un producto usando el índice (id_producto, fecha)."""
+        inicial = self.conexion.execute(
+            "SELECT stock_inicial FROM productos WHERE id = ?", (id_producto,)).fetchone()
+        neto = self.conexion.execute(
+            "SELECT COALESCE(SUM(entrada) - SUM(salida), 0) FROM movimientos WHERE id_producto = ?",
+            (id_producto,)).fetchone()[0]
+        return ((inicial[0] if inicial else 0) + neto) / ESCALA
+
+    def stock_en_fecha(self, id_producto: int, fecha: str) -> float:
+        """Stock del producto al cierre de la fecha ISO, usando el índice (id_producto, fecha)."""
+        inicial = self.conexion.execute(
+            "SELECT stock_inicial FROM productos WHERE id = ?", (id_producto,)).fetchone()
+        neto = self.conexion.execute(
+            "SELECT COALESCE(SUM(entrada) - SUM(salida), 0) FROM movimientos "
+            "WHERE id_producto = ? AND fecha <= ?", (id_producto, fecha)).fetchone()[0]
+        return ((inicial[0] if inicial else 0) + neto) / ESCALA
+
+    def funcion_stock_t(self, id_producto: int, desde: Optional[str] = None,
+                        hasta: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Serie (fecha, stock al cierre del día) del producto, un punto por día con
+        movimientos suyos (igual que IndiceSerieStock.serie), opcionalmente
+        limitada al rango [desde, hasta] (fechas ISO).
+        """
+        inicial = self.conexion.execute(
+            "SELECT stock_inicial FROM productos WHERE id = ?", (id_producto,)).fetchone()
+        base = inicial[0] if inicial else 0
+        if desde is not None:
+            base += self.conexion.execute(
+                "SELECT COALESCE(SUM(entrada) - SUM(salida), 0) FROM movimientos "
+                "WHERE id_producto = ? AND fecha < ?", (id_producto, desde)).fetchone()[0]
+        condiciones, parametros = ["id_producto = ?"], [id_producto]
+        if desde is not None:
+            condiciones.append("fecha >= ?")
+            parametros.append(desde)
+        if hasta is not None:
+            condiciones.append("fecha <= ?")
+            parametros.append(hasta)
+        cursor = self.conexion.execute(
+            "SELECT fecha, SUM(entrada) - SUM(salida) FROM movimientos WHERE "
+            + " AND ".join(condiciones) + " GROUP BY fecha ORDER BY fecha", parametros)
+        serie, s = [], base
+        for fecha, neto in cursor:
+            s += neto
+            serie.append((fecha, s / ESCALA))
+        return serie
+
+    def acumulados(self, nivel: str = DIA, desde: Optional[str] = None, hasta: Optional[str] = None,
+                   id_producto: Optional[int] = None) -> List[Acumulado]:
+        """Σ entradas / Σ salidas por producto y día (nivel DIA) o mes (MES), con GROUP BY."""
+        largo = 10 if nivel == DIA else 7
+        periodo = f"substr(fecha, 1, {largo})"
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append(f"{periodo} >= ?")
+            parametros.append(desde[:largo])
+        if hasta is not None:
+            condiciones.append(f"{periodo} <= ?")
+            parametros.append(hasta[:largo])
+        if id_producto is not None:
+            condiciones.append("id_producto = ?")
+            parametros.append(id_producto)
+        donde = " WHERE " + " AND ".join(condiciones) if condiciones else ""
+        cursor = self.conexion.execute(
+            f"SELECT {periodo} AS periodo, id_producto, SUM(entrada), SUM(salida) FROM movimientos"
+            f"{donde} GROUP BY periodo, id_producto ORDER BY periodo, id_producto", parametros)
+        return [Acumulado(p, pid, ent / ESCALA, sal / ESCALA) for p, pid, ent, sal in cursor]
+
+    # ---------- importación ----------
+
+    def importar_reporte(self, ruta: str) -> int:
+        """
+        Reemplaza el contenido con un reporte CSV (en streaming), en una sola
+        transacción. Como en MotorInventario.aplicar_carga, una sección vacía del
+        reporte no reemplaza nada. Devuelve los movimientos cargados.
+        """
+        n = 0
+        hay_productos = False
+        with self.conexion:
+            for seccion, registro in leer_reporte(ruta):
+                if seccion == MOVIMIENTOS:
+                    if n == 0:
+                        self.conexion.execute("DELETE FROM movimientos")
+                    fecha, pid, ent, sal = registro
+                    self.conexion.execute(
+                        "INSERT INTO movimientos (fecha, id_producto, entrada, salida) VALUES (?, ?, ?, ?)",
+                        (fecha, pid, a_centesimas(ent), a_centesimas(sal)))
+                    n += 1
+                elif seccion == CATALOGO:
+                    if not hay_productos:
+                        self.conexion.execute("DELETE FROM productos")
+                        hay_productos = True
+                    self.conexion.execute(
+                        "INSERT OR REPLACE INTO productos (id, nombre, costo, precio) VALUES (?, ?, ?, ?)",
+                        (registro["id"], registro["nombre"], registro["costo"], registro["precio"]))
+        return n
+
+    def importar_filas(self, productos: Iterable[Dict], movimientos: Iterable[List]) -> int:
+        """
+        Reemplaza el contenido con un catálogo y filas [fecha, id, entrada, salida]
+        ya leídos, en una sola transacción (si algo falla, la base queda como estaba).
+        Un catálogo o unos movimientos vacíos no reemplazan nada. Devuelve los
+        movimientos cargados.
+        """
+        productos, movimientos = iter(productos), iter(movimientos)
+        primer_producto, primer_movimiento = next(productos, None), next(movimientos, None)
+        n = 0
+        with self.conexion:
+            if primer_producto is not None:
+                self.conexion.execute("DELETE FROM productos")
+                self.conexion.executemany(
+                    "INSERT OR REPLACE INTO productos (id, nombre, costo, precio) VALUES (?, ?, ?, ?)",
+                    ((p["id"], p["nombre"], p["costo"], p["precio"])
+                     for p in chain([primer_producto], productos)))
+            if primer_movimiento is not None:
+                self.conexion.execute("DELETE FROM movimientos")
+                n = self.conexion.executemany(
+                    "INSERT INTO movimientos (fecha, id_producto, entrada, salida) VALUES (?, ?, ?, ?)",
+                    ((f, pid, a_centesimas(e), a_centesimas(s))
+                     for f, pid, e, s in chain([primer_movimiento], movimientos))).rowcount
+        return n
@@ -0,0 +1,319 @@
+# benchmark_inventario.py
+# -----------------------------------------
+# Benchmarks de rutas críticas - BioSalud Natural SpA
+# Genera un inventario sintético (N productos x M movimientos) y mide tiempo
+# y memoria pico (tracemalloc) de:
+#   vector_stock_actual, valor_inventario, funcion_stock_t, exportar_csv,
+#   importación del reporte (lógica de _importar_csv), validación de un lote
+#   de 20 mil ventas, exportación e importación de la instantánea binaria
+#   (.invb), consolidación de 4 sucursales y convertir_excel_a_csv
+# Los resultados se pueden guardar como línea base (JSON) y comparar en la
+# siguiente versión para detectar regresiones.
+#
+# Ejecución:
+#   python benchmark_inventario.py --productos 500 --movimientos 200000
+#   python benchmark_inventario.py --guardar-base base.json
+#   python benchmark_inventario.py --comparar base.json --tolerancia 0.25
+#   python benchmark_inventario.py --verificar Inventario_BioSalud.csv
+# -----------------------------------------
+
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Tuple
+
+import inventario_biosalud as inv
+from almacen_movimientos import AlmacenMovimientos
+from cantidades import a_centesimas
+from carga_movimientos import leer_movimientos_csv
+from motor_inventario import MotorInventario
+from sucursales import consolidar_reportes
+
+
+# -----------------------------
+# DATOS SINTÉTICOS
+# -----------------------------
+
+def generar_datos(productos: int, movimientos: int, semilla: int = 1234,
+                  dias: int = 3 * 365) -> Tuple[List[Dict], AlmacenMovimientos]:
+    """Catálogo de `productos` ítems y `movimientos` filas repartidas en `dias` días."""
+    azar = random.Random(semilla)
+    catalogo = []
+    for pid in range(1, productos + 1):
+        costo = round(azar.uniform(500, 20000), 2)  # pesos con centavos, como en los reportes
+        catalogo.append({"id": pid, "nombre": f"Producto {pid:05d}", "costo": a_centesimas(costo),
+                         "precio": a_centesimas(round(costo * azar.uniform(1.3, 2.5), 2))})
+    inicio = date.today() - timedelta(days=dias)
+    fechas = [(inicio + timedelta(days=d)).isoformat() for d in range(dias)]
+    movs = AlmacenMovimientos()
+    for k in range(movimientos):
+        fecha = fechas[k * dias // max(1, movimientos)]  # orden cronológico, como en uso real
+        pid = azar.randint(1, productos)
+        if azar.random() < 0.4:
+            movs.agregar(fecha, pid, azar.randint(1, 50), 0.0)
+        else:
+            movs.agregar(fecha, pid, 0.0, round(azar.uniform(0.5, 5), 2))
+    return catalogo, movs
+
+
+def cargar_en_motor(catalogo: List[Dict], movimientos: AlmacenMovimientos) -> None:
+    """Deja los datos sintéticos en el estado de inventario_biosalud."""
+    inv.CATALOGO.reemplazar(catalogo)
+    inv.STOCK_INICIAL.clear()
+    inv.STOCK_INICIAL.update({p["id"]: 0 for p in catalogo})
+    inv.MOVIMIENTOS.clear()
+    inv.MOVIMIENTOS.extend(movimientos)
+    inv.reconstruir_stock()
+
+
+def generar_ventas_csv(ruta: str, filas: int, productos: int, semilla: int = 1234) -> None:
+    """CSV de ventas del día (fecha,id_producto,cantidad) como el que exportan las cajas."""
+    azar = random.Random(semilla)
+    hoy = date.today().isoformat()
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        f.write("fecha,id_producto,cantidad\n")
+        for _ in range(filas):
+            f.write(f"{hoy},{azar.randint(1, productos)},{azar.randint(1, 3)}\n")
+
+
+def generar_excel(ruta: str, filas: int, productos: int, semilla: int = 1234) -> bool:
+    """Planilla con el formato de compras (4 filas de encabezado). False si falta openpyxl."""
+    try:
+        import openpyxl
+    except ImportError:
+        return False
+    azar = random.Random(semilla)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("mercaderia")
+    for _ in range(4):
+        ws.append(["ENCABEZADO"])
+    inicio = date.today() - timedelta(days=365)
+    for k in range(filas):
+        pid = azar.randint(1, productos)
+        costo = 1000 + pid
+        fecha = inicio + timedelta(days=k * 365 // max(1, filas))
+        ws.append([None, None, fecha, f"Producto {pid:05d}", azar.randint(1, 20), costo, None,
+                   None, None, None, costo * 2, azar.randint(0, 5)])
+    wb.save(ruta)
+    return True
+
+
+# -----------------------------
+# VERIFICACIÓN
+# -----------------------------
+
+def verificar_ida_y_vuelta(ruta: str) -> List[str]:
+    """
+    Carga el reporte en un motor y lo vuelve a guardar: el resultado debe ser
+    idéntico fila por fila (costos, precios, stock, resumen y movimientos).
+    Devuelve las diferencias encontradas (vacía si el reporte se conserva).
+    """
+    directorio = tempfile.mkdtemp(prefix="ida_y_vuelta_")
+    try:
+        copia = os.path.join(directorio, os.path.basename(ruta))
+        motor = MotorInventario()
+        motor.aplicar_carga(MotorInventario.leer_reporte(ruta))
+        motor.exportar_reporte(copia)
+        with open(ruta, newline="", encoding="utf-8") as f:
+            originales = [fila for fila in csv.reader(f) if fila]
+        with open(copia, newline="", encoding="utf-8") as f:
+            guardadas = [fila for fila in csv.reader(f) if fila]
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    diferencias = [f"fila {i}: {a} -> {b}"
+                   for i, (a, b) in enumerate(zip(originales, guardadas), 1) if a != b]
+    if len(originales) != len(guardadas):
+        diferencias.append(f"filas: {len(originales)} -> {len(guardadas)}")
+    return diferencias
+
+
+# -----------------------------
+# MEDICIÓN
+# -----------------------------
+
+def medir(funcion: Callable[[], object], repeticiones: int) -> Dict[str, float]:
+    """Mejor tiempo de `repeticiones` corridas y memoria pico de una corrida adicional."""
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"segundos": min(tiempos), "pico_mb": pico / (1024 * 1024)}
+
+
+def _importar_como_gui(ruta: str) -> None:
+    # Misma secuencia que InventarioApp._importar_csv: lectura en el hilo de E/S
+    # y aplicación de la carga en el hilo de la ventana (sin tkinter)
+    MotorInventario().aplicar_carga(MotorInventario.leer_reporte(ruta))
+
+
+def ejecutar(productos: int, movimientos: int, repeticiones: int, filas_excel: int,
+             semilla: int) -> Dict[str, Dict[str, float]]:
+    """Corre todos los casos y devuelve {caso: {segundos, pico_mb}}."""
+    catalogo, movs = generar_datos(productos, movimientos, semilla)
+    cargar_en_motor(catalogo, movs)
+    muestra = random.Random(semilla).sample(range(1, productos + 1), min(100, productos))
+
+    directorio = tempfile.mkdtemp(prefix="bench_inventario_")
+    try:
+        reporte = os.path.join(directorio, "reporte.csv")
+        casos = [
+            ("reconstruir_stock", inv.reconstruir_stock),
+            ("vector_stock_actual", inv.vector_stock_actual),
+            ("valor_inventario", inv.valor_inventario),
+            ("funcion_stock_t x%d" % len(muestra), lambda: [inv.funcion_stock_t(pid) for pid in muestra]),
+            ("exportar_csv", lambda: inv.exportar_csv(reporte)),
+            ("importar_csv (consola)", lambda: inv.importar_csv(reporte)),
+        ]
+        resultados = {}
+        for nombre, funcion in casos:
+            resultados[nombre] = medir(funcion, repeticiones)
+            print(f"  {nombre:<28} listo", file=sys.stderr)
+
+        ventas = os.path.join(directorio, "ventas.csv")
+        generar_ventas_csv(ventas, 20000, productos, semilla)
+        resultados["validar ventas 20k (CSV)"] = medir(
+            lambda: inv.MOTOR.validar_movimientos(*leer_movimientos_csv(ventas)[:2]), repeticiones)
+
+        resultados["importar_csv (GUI)"] = medir(lambda: _importar_como_gui(reporte), repeticiones)
+        os.remove(reporte + ".checkpoint")
+        resultados["importar_csv (GUI, sin checkpoint)"] = medir(lambda: _importar_como_gui(reporte), repeticiones)
+
+        binaria = os.path.join(directorio, "reporte.invb")
+        resultados["exportar_binaria"] = medir(lambda: inv.MOTOR.exportar_reporte(binaria), repeticiones)
+        resultados["importar_binaria (GUI)"] = medir(lambda: _importar_como_gui(binaria), repeticiones)
+
+        # 4 sucursales con el mismo reporte, sin punto de control (cada proceso suma su historia)
+        rutas = {}
+        for i in range(4):
+            rutas[f"sucursal{i}"] = os.path.join(directorio, f"sucursal{i}.csv")
+            shutil.copy(reporte, rutas[f"sucursal{i}"])
+        resultados["consolidar 4 sucursales"] = medir(lambda: consolidar_reportes(rutas), repeticiones)
+
+        if filas_excel > 0:
+            libro = os.path.join(directorio, "compras.xlsx")
+            if generar_excel(libro, filas_excel, productos, semilla):
+                from convertir_xlsx_a_csv import convertir_excel_a_csv, convertir_excel_a_csv_streaming
+                destino = os.path.join(directorio, "convertido.csv")
+                # Las funciones del conversor imprimen su avance: se silencia durante la medición
+                with open(os.devnull, "w") as nulo:
+                    salida, sys.stdout = sys.stdout, nulo
+                    try:
+                        resultados["convertir_excel_a_csv"] = medir(
+                            lambda: convertir_excel_a_csv(libro, destino), 1)
+                        resultados["convertir_excel_a_csv_streaming"] = medir(
+                            lambda: convertir_excel_a_csv_streaming(libro, destino), 1)
+                    finally:
+                        sys.stdout = salida
+            else:
+                print("  openpyxl no está instalado: se omite la conversión de Excel", file=sys.stderr)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return resultados
+
+
+# -----------------------------
+# REPORTE Y LÍNEA BASE
+# -----------------------------
+
+def imprimir(resultados: Dict[str, Dict[str, float]], base: Dict[str, Dict[str, float]] = None) -> None:
+    encabezado = f"{'Caso':<36} {'Tiempo (ms)':>12} {'Pico (MB)':>10}"
+    if base:
+        encabezado += f" {'Base (ms)':>10} {'Cambio':>8}"
+    print(encabezado)
+    print("=" * len(encabezado))
+    for nombre, r in resultados.items():
+        linea = f"{nombre:<36} {r['segundos'] * 1000:>12.2f} {r['pico_mb']:>10.2f}"
+        if base and nombre in base:
+            anterior = base[nombre]["segundos"]
+            cambio = (r["segundos"] - anterior) / anterior if anterior else 0.0
+            linea += f" {anterior * 1000:>10.2f} {cambio:>+8.0%}"
+        print(linea)
+
+
+def regresiones(resultados, base, tolerancia: float) -> List[str]:
+    """Casos cuyo tiempo o memoria pico empeoró más que la tolerancia (fracción)."""
+    lentos = []
+    for nombre, r in resultados.items():
+        anterior = base.get(nombre)
+        if anterior is None:
+            continue
+        for clave in ("segundos", "pico_mb"):
+            if anterior[clave] > 0 and r[clave] > anterior[clave] * (1 + tolerancia):
+                lentos.append(f"{nombre} ({clave}: {anterior[clave]:.4f} -> {r[clave]:.4f})")
+    return lentos
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description="Benchmarks del inventario BioSalud")
+    parser.add_argument("--productos", type=int, default=500)
+    parser.add_argument("--movimientos", type=int, default=100000)
+    parser.add_argument("--filas-excel", type=int, default=5000,
+                        help="Filas de la planilla sintética (0 = no medir el conversor)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--guardar-base", metavar="JSON", help="Guardar los resultados como línea base")
+    parser.add_argument("--comparar", metavar="JSON", help="Comparar contra una línea base guardada")
+    parser.add_argument("--tolerancia", type=float, default=0.20,
+                        help="Empeoramiento permitido respecto de la base (0.20 = 20%%)")
+    parser.add_argument("--verificar", metavar="CSV",
+                        help="Solo comprobar que cargar y guardar el reporte lo deja idéntico")
+    return parser.parse_args()
+
+
+def main():
+    args = _argumentos()
+    if args.verificar:
+        diferencias = verificar_ida_y_vuelta(args.verificar)
+        if diferencias:
+            print(f"⚠ {args.verificar} cambia al cargarlo y guardarlo:")
+            for diferencia in diferencias[:20]:
+                print(f"  - {diferencia}")
+            sys.exit(1)
+        print(f"✅ {args.verificar} se conserva al cargarlo y guardarlo")
+        return
+
+    print(f"Generando {args.productos} productos x {args.movimientos} movimientos...", file=sys.stderr)
+    resultados = ejecutar(args.productos, args.movimientos, args.repeticiones,
+                          args.filas_excel, args.semilla)
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)["resultados"]
+    imprimir(resultados, base)
+
+    if args.guardar_base:
+        with open(args.guardar_base, "w", encoding="utf-8") as f:
+            json.dump({"parametros": {"productos": args.productos, "movimientos": args.movimientos,
+                                      "filas_excel": args.filas_excel, "semilla": args.semilla},
+                       "resultados": resultados}, f, indent=2, ensure_ascii=False)
+        print(f"\nLínea base guardada en: {args.guardar_base}")
+
+    if base:
+        lentos = regresiones(resultados, base, args.tolerancia)
+        if lentos:
+            print("\n⚠ Regresiones:")
+            for caso in lentos:
+                print(f"  - {caso}")
+            sys.exit(1)
+        print("\n✅ Sin regresiones respecto de la base")
+
+
+if __name__ == "__main__":
+    main()
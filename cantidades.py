@@ -0,0 +1,73 @@
+# cantidades.py
+# -----------------------------------------
+# Cantidades y montos en punto fijo - BioSalud Natural SpA
+# El motor trabaja solo con enteros, así las sumas son exactas y no hay que
+# redondear en cada paso:
+#   cantidades -> centésimas de unidad (12.5 unidades = 1250)
+#   precios    -> centésimas de peso (25.93 = 2593), tal como vienen en los reportes
+#   valores    -> diezmilésimas de peso (stock en centésimas × precio en centésimas)
+# Los números con decimales (float) y los textos "12.50" / "$1.234" se
+# producen solo en los bordes: al leer lo que escribe el usuario o un
+# archivo, y al mostrar o escribir los resultados.
+# -----------------------------------------
+
+import math
+
+ESCALA = 100  # 2 decimales: cantidades y precios se guardan en centésimas
+ESCALA_VALOR = ESCALA * ESCALA  # valores = centésimas de unidad × centésimas de peso
+
+# Mayor cantidad o precio aceptado, en centésimas: deja margen para sumar
+# muchas filas en columnas int64 (almacén, instantánea, SQLite) sin desbordar
+MAXIMO = 10 ** 15
+
+
+def a_centesimas(valor) -> int:
+    """
+    Convierte una cantidad o un precio (número o texto) a entero en centésimas
+    (redondeo a 2 decimales). ValueError si no es un número finito o si su
+    valor absoluto supera MAXIMO.
+    """
+    if type(valor) is int:
+        centesimas = valor * ESCALA
+    else:
+        numero = float(valor)
+        if not math.isfinite(numero):
+            raise ValueError(f"Cantidad no finita: {valor!r}")
+        centesimas = int(round(numero * ESCALA))
+    if abs(centesimas) > MAXIMO:
+        raise ValueError(f"Cantidad fuera de rango: {valor!r}")
+    return centesimas
+
+
+def a_unidades(centesimas: int) -> float:
+    """Centésimas -> unidades o pesos (para mostrar o para JSON)."""
+    return centesimas / ESCALA
+
+
+def a_pesos(valor: int) -> float:
+    """Valor en diezmilésimas de peso -> pesos (para JSON y las consultas públicas)."""
+    return valor / ESCALA_VALOR
+
+
+def _dividir_redondeando(numero: int, divisor: int) -> int:
+    """numero / divisor redondeando la mitad hacia afuera (como en contabilidad), sin pasar por float."""
+    cociente, resto = divmod(abs(numero), divisor)
+    if 2 * resto >= divisor:
+        cociente += 1
+    return cociente if numero >= 0 else -cociente
+
+
+def formatear_cantidad(centesimas: int) -> str:
+    """Texto con 2 decimales exactos ('12.50', '-0.25'), sin pasar por float."""
+    enteros, resto = divmod(abs(centesimas), ESCALA)
+    return f"{'-' if centesimas < 0 else ''}{enteros}.{resto:02d}"
+
+
+def formatear_valor(valor: int) -> str:
+    """Valor en diezmilésimas de peso como texto con 2 decimales ('478861.20')."""
+    return formatear_cantidad(_dividir_redondeando(valor, ESCALA))
+
+
+def formatear_pesos(monto: int, escala: int = ESCALA_VALOR) -> str:
+    """Monto como '$1,234' (pesos enteros); por defecto un valor, con escala=ESCALA un precio."""
+    return f"${_dividir_redondeando(monto, escala):,}"
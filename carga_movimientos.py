@@ -0,0 +1,142 @@
+# carga_movimientos.py
+# -----------------------------------------
+# Carga masiva de movimientos - BioSalud Natural SpA
+# Valida un lote de movimientos (p. ej. las ventas del día de las cajas) en
+# una sola pasada contra el stock corriente:
+#   - el producto existe en el catálogo
+#   - fecha ISO válida (YYYY-MM-DD) y cantidades finitas, dentro de rango
+#     (ver cantidades.MAXIMO), no negativas y no ambas en 0
+#   - cada salida no supera el stock que queda tras las filas anteriores
+# Las filas inválidas se devuelven como rechazos (línea y motivo); las demás
+# quedan listas para aplicarse juntas (MotorInventario.agregar_movimientos).
+#
+# Formato del CSV de ventas (con encabezado, separador "," o ";"):
+#   fecha,id_producto,cantidad            -> cada fila es una salida (venta)
+#   fecha,id_producto,entrada,salida      -> mismo formato que MOVIMIENTOS
+# La columna fecha es opcional (se usa la fecha de hoy).
+# -----------------------------------------
+
+import csv
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from cantidades import ESCALA, a_centesimas, formatear_cantidad
+
+
+class Rechazo(NamedTuple):
+    """Movimiento no aceptado: línea del archivo (o posición en el lote, desde 1)."""
+    linea: int
+    fila: List
+    motivo: str
+
+
+class ResultadoCarga(NamedTuple):
+    """Filas aceptadas [fecha, id, entrada, salida] (2 decimales) y rechazos."""
+    aceptados: List[List]
+    rechazos: List[Rechazo]
+
+
+def _fecha_iso(texto: str, cache: Dict[str, Optional[str]]) -> Optional[str]:
+    """Fecha normalizada 'YYYY-MM-DD' o None si no es válida (con cache por texto)."""
+    if not isinstance(texto, str):  # p. ej. un número o una lista en el JSON de /movimientos/lote
+        return None
+    if texto in cache:
+        return cache[texto]
+    try:
+        normal = date(int(texto[0:4]), int(texto[5:7]), int(texto[8:10])).isoformat()
+        if len(texto) != 10 or texto[4] != "-" or texto[7] != "-":
+            normal = None
+    except (ValueError, TypeError):
+        normal = None
+    cache[texto] = normal
+    return normal
+
+
+def validar_lote(filas: Iterable[List], productos, stock: Dict[int, int],
+                 lineas: Optional[List[int]] = None, hoy: Optional[str] = None) -> ResultadoCarga:
+    """
+    Valida filas [fecha, id_producto, entrada, salida] en orden.
+    `productos` es cualquier contenedor con `in` por id (p. ej. Catalogo) y
+    `stock` el libro de stock actual en centésimas (no se modifica). Una fecha None o vacía
+    se reemplaza por `hoy`. `lineas` da el número de línea de cada fila para
+    los rechazos (por defecto la posición en el lote).
+    """
+    hoy = hoy or date.today().isoformat()
+    corriente: Dict[int, int] = {}  # stock (centésimas) de los productos tocados por el lote
+    fechas: Dict[str, Optional[str]] = {}
+    aceptados: List[List] = []
+    rechazos: List[Rechazo] = []
+
+    for k, fila in enumerate(filas):
+        linea = lineas[k] if lineas is not None else k + 1
+        try:
+            fecha, pid, ent, sal = fila
+            pid = int(pid)
+        except (TypeError, ValueError, OverflowError):
+            rechazos.append(Rechazo(linea, fila, "Fila con valores inválidos"))
+            continue
+        try:
+            ent, sal = a_centesimas(ent), a_centesimas(sal)
+        except (TypeError, ValueError, OverflowError):
+            rechazos.append(Rechazo(linea, list(fila), "Cantidad inválida, no finita o fuera de rango"))
+            continue
+        fecha = _fecha_iso(fecha, fechas) if fecha else hoy
+        if fecha is None:
+            rechazos.append(Rechazo(linea, list(fila), "Fecha inválida (use AAAA-MM-DD)"))
+        elif pid not in productos:
+            rechazos.append(Rechazo(linea, list(fila), f"Producto {pid} no existe"))
+        elif ent < 0 or sal < 0 or (ent == 0 and sal == 0):
+            rechazos.append(Rechazo(linea, list(fila), "La cantidad debe ser mayor a 0"))
+        else:
+            disponible = corriente.get(pid)
+            if disponible is None:
+                disponible = stock.get(pid, 0)
+            nuevo = disponible + ent - sal
+            if sal > 0 and nuevo < 0:
+                rechazos.append(Rechazo(linea, list(fila),
+                                        f"Stock insuficiente. Disponible: {formatear_cantidad(disponible)}"))
+                continue
+            corriente[pid] = nuevo
+            aceptados.append([fecha, pid, ent / ESCALA, sal / ESCALA])
+    return ResultadoCarga(aceptados, rechazos)
+
+
+def leer_movimientos_csv(ruta: str) -> Tuple[List[List], List[int], List[Rechazo]]:
+    """
+    Lee un CSV de ventas o movimientos (ver formato arriba).
+    Devuelve (filas [fecha, id, entrada, salida], número de línea de cada
+    fila, rechazos de las líneas que no se pudieron interpretar).
+    """
+    with open(ruta, "r", newline="", encoding="utf-8-sig") as f:
+        muestra = f.readline()
+        separador = ";" if muestra.count(";") > muestra.count(",") else ","
+        f.seek(0)
+        lector = csv.reader(f, delimiter=separador)
+        encabezado = [c.strip().lower() for c in next(lector, [])]
+        if "id_producto" not in encabezado or not (
+                "cantidad" in encabezado or ("entrada" in encabezado and "salida" in encabezado)):
+            raise ValueError("El CSV debe tener las columnas id_producto y cantidad (o entrada y salida)")
+        i_fecha = encabezado.index("fecha") if "fecha" in encabezado else None
+        i_id = encabezado.index("id_producto")
+        if "cantidad" in encabezado:
+            i_ent, i_sal = None, encabezado.index("cantidad")
+        else:
+            i_ent, i_sal = encabezado.index("entrada"), encabezado.index("salida")
+
+        filas: List[List] = []
+        lineas: List[int] = []
+        rechazos: List[Rechazo] = []
+        for n, registro in enumerate(lector, 2):
+            if not "".join(registro).strip():
+                continue
+            try:
+                fecha = registro[i_fecha].strip() if i_fecha is not None else ""
+                pid = int(registro[i_id])
+                sal = float(registro[i_sal].replace(",", "."))
+                ent = float(registro[i_ent].replace(",", ".")) if i_ent is not None else 0.0
+            except (ValueError, IndexError):
+                rechazos.append(Rechazo(n, registro, "Línea con valores inválidos"))
+                continue
+            filas.append([fecha, pid, ent, sal])
+            lineas.append(n)
+    return filas, lineas, rechazos
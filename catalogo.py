@@ -0,0 +1,114 @@
+# catalogo.py
+# -----------------------------------------
+# Catálogo indexado de productos - BioSalud Natural SpA
+# Vector de productos (dicts con id, nombre, costo, precio) con índice hash
+# id -> producto: las búsquedas por id son O(1) en lugar de recorrer la lista.
+# buscar() resuelve la búsqueda mientras se escribe (nombres por prefijo de
+# palabra, sin tildes, o listas de ids) con indice_busqueda.IndiceBusqueda,
+# que se arma en la primera búsqueda y luego se mantiene con cada cambio.
+# -----------------------------------------
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from indice_busqueda import IndiceBusqueda
+
+
+class Catalogo:
+    """
+    Catálogo de productos que conserva el orden de inserción.
+    Se recorre igual que la lista original (for p in catalogo), pero los cambios
+    deben hacerse con agregar / actualizar / eliminar para mantener los índices.
+    """
+
+    def __init__(self, productos: Iterable[Dict] = ()):
+        self._por_id: Dict[int, Dict] = {}
+        self._busqueda: Optional[IndiceBusqueda] = None  # se arma en la primera búsqueda
+        self.reemplazar(productos)
+
+    # ---------- lectura ----------
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._por_id.values())
+
+    def __len__(self) -> int:
+        return len(self._por_id)
+
+    def __contains__(self, id_producto: int) -> bool:
+        return id_producto in self._por_id
+
+    def obtener(self, id_producto: int, defecto: Optional[Dict] = None) -> Optional[Dict]:
+        """Devuelve el producto con ese id (O(1))."""
+        return self._por_id.get(id_producto, defecto)
+
+    def nombre_de(self, id_producto: int, defecto: str = "") -> str:
+        """Devuelve el nombre del producto o el valor por defecto si no existe."""
+        p = self._por_id.get(id_producto)
+        return p["nombre"] if p is not None else defecto
+
+    def buscar(self, texto: str, limite: Optional[int] = None) -> List[Dict]:
+        """
+        Búsqueda del campo "Buscar" de la GUI:
+          - solo números separados por comas ("1,5,10"): esos ids, en ese orden
+          - texto: productos con una palabra que empieza con cada palabra buscada,
+            sin distinguir tildes ni mayúsculas ("pul iman" -> "PULSERA CON 4 IMANES")
+        """
+        partes = [parte.strip() for parte in texto.split(",")]
+        if any(partes) and all(parte.isdigit() for parte in partes if parte):
+            ids = dict.fromkeys(int(parte) for parte in partes if parte)
+            encontrados = [self._por_id[pid] for pid in ids if pid in self._por_id]
+            return encontrados[:limite] if limite is not None else encontrados
+        if self._busqueda is None:
+            self._busqueda = IndiceBusqueda(self._por_id.values())
+        return [self._por_id[pid] for pid in self._busqueda.buscar(texto, limite)]
+
+    def ids(self) -> List[int]:
+        """Ids del catálogo en orden."""
+        return list(self._por_id)
+
+    def siguiente_id(self) -> int:
+        """Primer id libre empezando desde 1."""
+        nuevo_id = 1
+        while nuevo_id in self._por_id:
+            nuevo_id += 1
+        return nuevo_id
+
+    # ---------- escritura ----------
+
+    def agregar(self, producto: Dict) -> Dict:
+        """Agrega un producto. Lanza ValueError si el id ya existe."""
+        pid = producto["id"]
+        if pid in self._por_id:
+            raise ValueError(f"Ya existe un producto con id {pid}")
+        self._por_id[pid] = producto
+        if self._busqueda is not None:
+            self._busqueda.agregar(pid, producto["nombre"])
+        return producto
+
+    def actualizar(self, id_producto: int, **campos) -> Dict:
+        """Modifica campos de un producto (nombre, costo, precio) y reindexa el nombre."""
+        producto = self._por_id[id_producto]
+        if "nombre" in campos:
+            producto["nombre"] = campos.pop("nombre")
+            if self._busqueda is not None:
+                self._busqueda.agregar(id_producto, producto["nombre"])
+        producto.update(campos)
+        return producto
+
+    def eliminar(self, id_producto: int) -> Optional[Dict]:
+        """Quita un producto. Devuelve el producto eliminado o None si no existía."""
+        producto = self._por_id.pop(id_producto, None)
+        if producto is not None and self._busqueda is not None:
+            self._busqueda.quitar(id_producto)
+        return producto
+
+    def reemplazar(self, productos: Iterable[Dict]) -> None:
+        """
+        Reemplaza todo el contenido (p. ej. al importar un CSV). Si un id se
+        repite queda el último producto con ese id (como INSERT OR REPLACE en
+        almacen_sqlite). El índice nuevo se arma aparte y recién entonces se
+        cambia: si productos falla a mitad, el catálogo queda como estaba.
+        """
+        por_id = {p["id"]: p for p in productos}
+        self._por_id = por_id
+        self._busqueda = None
+
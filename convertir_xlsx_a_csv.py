@@ -2,9 +2,127 @@
 # Convierte el archivo Excel a formato CSV compatible con el inventario
 
 import openpyxl
+import argparse
 import csv
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
 from datetime import datetime
 
+from cantidades import ESCALA
+from reporte_csv import CATALOGO, leer_reporte
+
+FILAS_ENCABEZADO = 4  # Filas de título/encabezado al inicio de la hoja
+
+
+def _leer_fila(fila, fecha_por_defecto):
+    """
+    Extrae los datos de una fila de la planilla de compras/ventas.
+    Devuelve (nombre, fecha, cant_comprada, valor_unitario, precio_venta, cant_vendida)
+    o None si la fila no corresponde a un producto válido.
+    """
+    # Columnas: IMAGEN, FECHA COMPRA, NOMBRE PRODUCTO, CANT COMPRADA, VALOR UNITARIO COMPRA, 
+    # VALOR TOTAL COMPRA, PROVEEDOR, fecha llegada, FECHA VENTA, PRECIO UNITARIO VENTA, 
+    # CANT VENDIDA, VENTA TOTAL, A QUIEN VENDI, SALDO STOCK, STOCK CON VALORES
+    if not any(fila):  # Saltar filas vacías
+        return None
+    
+    try:
+        fecha_compra = fila[2] if fila[2] else None
+        nombre_producto = str(fila[3]).strip() if fila[3] else None
+        cant_comprada = fila[4] if fila[4] else 0
+        valor_unitario = fila[5] if fila[5] else 0
+        precio_venta = fila[10] if len(fila) > 10 and fila[10] else 0
+        cant_vendida = fila[11] if len(fila) > 11 and fila[11] else 0
+        
+        # Validar que sea un producto válido
+        if not nombre_producto or nombre_producto.startswith('='):
+            return None
+            
+        # Convertir valores a números
+        if isinstance(cant_comprada, str) and cant_comprada.startswith('='):
+            return None
+        if isinstance(valor_unitario, str) and valor_unitario.startswith('='):
+            return None
+        if isinstance(precio_venta, str) and precio_venta.startswith('='):
+            precio_venta = 0
+        if isinstance(cant_vendida, str) and cant_vendida.startswith('='):
+            cant_vendida = 0
+            
+        cant_comprada = float(cant_comprada) if cant_comprada else 0
+        valor_unitario = float(valor_unitario) if valor_unitario else 0
+        precio_venta = float(precio_venta) if precio_venta else valor_unitario * 2
+        cant_vendida = float(cant_vendida) if cant_vendida else 0
+        
+        if valor_unitario == 0 or cant_comprada == 0:
+            return None
+    except (ValueError, TypeError, IndexError):
+        return None
+    
+    if isinstance(fecha_compra, datetime):
+        fecha_str = fecha_compra.strftime("%Y-%m-%d")
+    else:
+        fecha_str = fecha_por_defecto
+    
+    return nombre_producto, fecha_str, cant_comprada, valor_unitario, precio_venta, cant_vendida
+
+
+def _agregar_a_catalogo(productos, datos, nuevo_id=None):
+    """
+    Agrupa una fila leída en el catálogo por nombre (ids en orden de aparición,
+    o los que entregue nuevo_id()). Devuelve el producto al que se sumó la fila.
+    """
+    nombre_producto, fecha_str, cant_comprada, valor_unitario, precio_venta, cant_vendida = datos
+    p = productos.get(nombre_producto)
+    if p is None:
+        p = productos[nombre_producto] = {
+            'id': nuevo_id() if nuevo_id is not None else len(productos) + 1,
+            'nombre': nombre_producto,
+            'costo': valor_unitario,
+            'precio': precio_venta if precio_venta > 0 else valor_unitario * 2,
+            'stock_total': 0,
+        }
+    
+    # Actualizar con el último precio si es mayor
+    if precio_venta > p['precio']:
+        p['precio'] = precio_venta
+    
+    # Calcular stock (comprado - vendido)
+    p['stock_total'] += cant_comprada - cant_vendida
+    return p
+
+
+def _escribir_encabezado_y_catalogo(w, catalogo):
+    """Escribe título, CATALOGO y RESUMEN del reporte"""
+    w.writerow(["== REPORTE INVENTARIO BIO SALUD NATURAL SpA =="])
+    w.writerow([])
+    w.writerow(["CATALOGO"])
+    w.writerow(["id", "nombre", "costo", "precio", "stock_actual"])
+    
+    for p in catalogo:
+        w.writerow([
+            p['id'],
+            p['nombre'],
+            f"{p['costo']:.2f}",
+            f"{p['precio']:.2f}",
+            f"{p['stock_total']:.2f}"
+        ])
+    
+    w.writerow([])
+    w.writerow(["RESUMEN"])
+    valor_inv = sum(p['stock_total'] * p['costo'] for p in catalogo)
+    valor_venta = sum(p['stock_total'] * p['precio'] for p in catalogo)
+    w.writerow(["valor_inventario", f"{valor_inv:.2f}"])
+    w.writerow(["valor_venta_potencial", f"{valor_venta:.2f}"])
+    
+    w.writerow([])
+    w.writerow(["MOVIMIENTOS"])
+    w.writerow(["fecha", "id_producto", "entrada", "salida"])
+
 def convertir_excel_a_csv(archivo_excel, archivo_csv):
     """Convierte un archivo Excel a CSV formato inventario"""
     
@@ -14,88 +132,21 @@ def convertir_excel_a_csv(archivo_excel, archivo_csv):
     
     # Preparar datos para el CSV
     productos = {}
-    contador_id = 1
+    compras = {}  # id -> [(fecha, cantidad), ...]
     
     # Leer todas las filas (saltando encabezados)
+    hoy = datetime.now().strftime("%Y-%m-%d")
     for i, fila in enumerate(ws.iter_rows(values_only=True), start=1):
-        if i <= 4:  # Saltar encabezados
+        if i <= FILAS_ENCABEZADO:  # Saltar encabezados
             continue
-            
-        if not any(fila):  # Saltar filas vacías
-            continue
-        
-        # Extraer datos relevantes
-        # Columnas: IMAGEN, FECHA COMPRA, NOMBRE PRODUCTO, CANT COMPRADA, VALOR UNITARIO COMPRA, 
-        # VALOR TOTAL COMPRA, PROVEEDOR, fecha llegada, FECHA VENTA, PRECIO UNITARIO VENTA, 
-        # CANT VENDIDA, VENTA TOTAL, A QUIEN VENDI, SALDO STOCK, STOCK CON VALORES
         
-        try:
-            fecha_compra = fila[2] if fila[2] else None
-            nombre_producto = str(fila[3]).strip() if fila[3] else None
-            cant_comprada = fila[4] if fila[4] else 0
-            valor_unitario = fila[5] if fila[5] else 0
-            precio_venta = fila[10] if len(fila) > 10 and fila[10] else 0
-            cant_vendida = fila[11] if len(fila) > 11 and fila[11] else 0
-            saldo_stock = fila[14] if len(fila) > 14 and fila[14] else 0
-            
-            # Validar que sea un producto válido
-            if not nombre_producto or nombre_producto.startswith('='):
-                continue
-                
-            # Convertir valores a números
-            if isinstance(cant_comprada, str) and cant_comprada.startswith('='):
-                continue
-            if isinstance(valor_unitario, str) and valor_unitario.startswith('='):
-                continue
-            if isinstance(precio_venta, str) and precio_venta.startswith('='):
-                precio_venta = 0
-            if isinstance(cant_vendida, str) and cant_vendida.startswith('='):
-                cant_vendida = 0
-            if isinstance(saldo_stock, str) and saldo_stock.startswith('='):
-                saldo_stock = 0
-                
-            cant_comprada = float(cant_comprada) if cant_comprada else 0
-            valor_unitario = float(valor_unitario) if valor_unitario else 0
-            precio_venta = float(precio_venta) if precio_venta else valor_unitario * 2
-            cant_vendida = float(cant_vendida) if cant_vendida else 0
-            saldo_stock = float(saldo_stock) if saldo_stock else 0
-            
-            if valor_unitario == 0 or cant_comprada == 0:
-                continue
-            
-            # Agrupar productos similares
-            if nombre_producto not in productos:
-                productos[nombre_producto] = {
-                    'id': contador_id,
-                    'nombre': nombre_producto,
-                    'costo': valor_unitario,
-                    'precio': precio_venta if precio_venta > 0 else valor_unitario * 2,
-                    'stock_total': 0,
-                    'compras': []
-                }
-                contador_id += 1
-            
-            # Actualizar con el último precio si es mayor
-            if precio_venta > productos[nombre_producto]['precio']:
-                productos[nombre_producto]['precio'] = precio_venta
-            
-            # Calcular stock (comprado - vendido)
-            stock_linea = cant_comprada - cant_vendida
-            productos[nombre_producto]['stock_total'] += stock_linea
-            
-            # Guardar info de compra
-            if isinstance(fecha_compra, datetime):
-                fecha_str = fecha_compra.strftime("%Y-%m-%d")
-            else:
-                fecha_str = datetime.now().strftime("%Y-%m-%d")
-                
-            productos[nombre_producto]['compras'].append({
-                'fecha': fecha_str,
-                'cantidad': cant_comprada
-            })
-            
-        except (ValueError, TypeError, IndexError) as e:
+        datos = _leer_fila(fila, hoy)
+        if datos is None:
             continue
+        
+        # Agrupar productos similares y guardar info de compra
+        p = _agregar_a_catalogo(productos, datos)
+        compras.setdefault(p['id'], []).append((datos[1], datos[2]))
     
     print(f"\nProductos únicos encontrados: {len(productos)}")
     
@@ -106,48 +157,380 @@ def convertir_excel_a_csv(archivo_excel, archivo_csv):
     with open(archivo_csv, 'w', newline='', encoding='utf-8') as f:
         w = csv.writer(f)
         
-        w.writerow(["== REPORTE INVENTARIO BIO SALUD NATURAL SpA =="])
-        w.writerow([])
-        w.writerow(["CATALOGO"])
-        w.writerow(["id", "nombre", "costo", "precio", "stock_actual"])
+        _escribir_encabezado_y_catalogo(w, catalogo)
         
+        # Crear movimientos de entrada basados en las compras
         for p in catalogo:
-            w.writerow([
-                p['id'],
-                p['nombre'],
-                f"{p['costo']:.2f}",
-                f"{p['precio']:.2f}",
-                f"{p['stock_total']:.2f}"
-            ])
-        
-        w.writerow([])
-        w.writerow(["RESUMEN"])
-        valor_inv = sum(p['stock_total'] * p['costo'] for p in catalogo)
-        valor_venta = sum(p['stock_total'] * p['precio'] for p in catalogo)
-        w.writerow(["valor_inventario", f"{valor_inv:.2f}"])
-        w.writerow(["valor_venta_potencial", f"{valor_venta:.2f}"])
+            for fecha, cantidad in compras[p['id']]:
+                w.writerow([fecha, p['id'], f"{cantidad:.2f}", "0.00"])
+    
+    print(f"\nArchivo CSV creado: {archivo_csv}")
+    return True
+
+
+def convertir_excel_a_csv_streaming(archivo_excel, archivo_csv):
+    """
+    Igual que convertir_excel_a_csv, pero para planillas grandes:
+    abre el libro en modo solo lectura (sin construir el modelo de celdas),
+    recorre las filas como tuplas y escribe cada movimiento apenas se lee.
+    En memoria solo queda el resumen por producto (id, costos, stock).
+    Los movimientos quedan en el orden de la planilla.
+    """
+    wb = openpyxl.load_workbook(archivo_excel, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        productos = {}
+        hoy = datetime.now().strftime("%Y-%m-%d")
         
-        w.writerow([])
-        w.writerow(["MOVIMIENTOS"])
-        w.writerow(["fecha", "id_producto", "entrada", "salida"])
+        # Los movimientos se escriben a un temporal mientras se lee; el catálogo
+        # (que va primero en el reporte) se conoce recién al final
+        with tempfile.TemporaryFile('w+', newline='', encoding='utf-8') as temporal:
+            w_mov = csv.writer(temporal)
+            
+            for fila in ws.iter_rows(min_row=FILAS_ENCABEZADO + 1, values_only=True):
+                datos = _leer_fila(fila, hoy)
+                if datos is None:
+                    continue
+                p = _agregar_a_catalogo(productos, datos)
+                w_mov.writerow([datos[1], p['id'], f"{datos[2]:.2f}", "0.00"])
+            
+            print(f"\nProductos únicos encontrados: {len(productos)}")
+            
+            with open(archivo_csv, 'w', newline='', encoding='utf-8') as f:
+                _escribir_encabezado_y_catalogo(csv.writer(f), list(productos.values()))
+                temporal.seek(0)
+                shutil.copyfileobj(temporal, f)
+    finally:
+        wb.close()
+    
+    print(f"\nArchivo CSV creado: {archivo_csv}")
+    return True
+
+
+# -----------------------------
+# CONVERSIÓN INCREMENTAL (solo filas nuevas o modificadas)
+# -----------------------------
+# El archivo de estado "<csv>.estado.json" guarda el catálogo de la planilla
+# (nombre -> id y totales) y, por cada fila ya convertida, el movimiento que
+# generó. Las filas se identifican por su huella (su contenido), no por su
+# posición: insertar o mover filas en la planilla no afecta a las demás. En
+# la siguiente ejecución las filas con huella conocida se saltan, las nuevas
+# generan su movimiento y las que ya no están (eliminadas o modificadas) una
+# salida que corrige lo registrado antes. Los ids no cambian.
+# El reporte es el mismo archivo que guardan la GUI, la consola y el
+# servidor, por lo que su CATALOGO manda: los productos agregados y los
+# costos/precios editados en la aplicación se conservan, y la planilla solo
+# suma productos nuevos y movimientos.
+
+EXTENSION_ESTADO = ".estado.json"
+VERSION_ESTADO = 2  # 1: filas por número de fila -> [huella, id, fecha, comprada, vendida]
+
+
+def _huella_fila(fila):
+    return hashlib.sha1(repr(fila).encode('utf-8')).hexdigest()
+
+
+def _clave_fila(huella, vistas):
+    """Clave de una fila: su huella, más el número de repetición si hay filas idénticas"""
+    k = vistas.get(huella, 0)
+    vistas[huella] = k + 1
+    return huella if k == 0 else f"{huella}#{k}"
+
+
+def _migrar_filas(filas):
+    """Estado de la versión 1 (claves por número de fila) -> claves por huella"""
+    vistas = {}
+    migradas = {}
+    for valor in filas.values():
+        clave = _clave_fila(valor[0], vistas)
+        if len(valor) > 1:
+            migradas[clave] = valor[1:]
+    return migradas
+
+
+def _leer_estado(archivo_estado):
+    if not os.path.exists(archivo_estado):
+        return {}, {}
+    with open(archivo_estado, 'r', encoding='utf-8') as f:
+        estado = json.load(f)
+    productos = {p['nombre']: p for p in estado.get('productos', [])}
+    filas = estado.get('filas', {})
+    if estado.get('version', 1) < VERSION_ESTADO:
+        filas = _migrar_filas(filas)
+    return productos, filas
+
+
+def _guardar_estado(archivo_estado, productos, filas):
+    temporal = archivo_estado + ".tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({'version': VERSION_ESTADO, 'productos': list(productos.values()), 'filas': filas},
+                  f, ensure_ascii=False)
+    os.replace(temporal, archivo_estado)
+
+
+def _leer_catalogo_reporte(archivo_csv):
+    """Productos de la sección CATALOGO del reporte, tal como los guardó la aplicación (en pesos y unidades)"""
+    productos = []
+    with closing(leer_reporte(archivo_csv)) as registros:
+        for seccion, p in registros:
+            if seccion != CATALOGO:
+                if productos:
+                    break  # el catálogo va primero: no hace falta leer los movimientos
+                continue
+            productos.append({
+                'id': p['id'],
+                'nombre': p['nombre'],
+                'costo': p['costo'] / ESCALA,
+                'precio': p['precio'] / ESCALA,
+                'stock_total': (p['stock_actual'] or 0) / ESCALA,
+            })
+    return productos
+
+
+def _unir_catalogos(catalogo_reporte, productos, precios_previos, netos):
+    """
+    Catálogo a escribir sobre un reporte existente: sus productos con el nombre,
+    costo y precio del reporte y el stock más los movimientos nuevos; después,
+    los productos de la planilla que el reporte no tiene y que reciben
+    movimientos. Un precio que la planilla subió en esta ejecución reemplaza al del reporte.
+    """
+    por_id = {p['id']: p for p in productos.values()}
+    catalogo = []
+    for p in catalogo_reporte:
+        p = dict(p, stock_total=p['stock_total'] + netos.get(p['id'], 0))
+        de_planilla = por_id.get(p['id'])
+        if de_planilla is not None and de_planilla['precio'] != precios_previos.get(p['id'], de_planilla['precio']):
+            p['precio'] = de_planilla['precio']
+        catalogo.append(p)
+    en_reporte = {p['id'] for p in catalogo_reporte}
+    for p in sorted(productos.values(), key=lambda p: p['id']):
+        if p['id'] not in en_reporte and p['id'] in netos:
+            catalogo.append(dict(p, stock_total=netos[p['id']]))
+    return catalogo
+
+
+def _copiar_movimientos(origen, destino):
+    """Copia las filas de la sección MOVIMIENTOS de un reporte existente (sin su encabezado)"""
+    en_movimientos = False
+    for linea in origen:
+        if en_movimientos:
+            if not linea.startswith("fecha,"):
+                destino.write(linea)
+            shutil.copyfileobj(origen, destino)
+            return
+        en_movimientos = linea.strip() == "MOVIMIENTOS"
+
+
+def convertir_incremental(archivo_excel, archivo_csv, archivo_estado=None):
+    """
+    Actualiza archivo_csv procesando solo las filas nuevas o modificadas de la
+    planilla desde la última ejecución (ver archivo de estado). Los movimientos
+    nuevos se agregan a continuación de los existentes y el catálogo del
+    reporte se conserva. Si no hay cambios el reporte no se toca. Devuelve la
+    cantidad de movimientos agregados.
+    """
+    archivo_estado = archivo_estado or archivo_csv + EXTENSION_ESTADO
+    productos, filas_previas = _leer_estado(archivo_estado)
+    existe_reporte = os.path.exists(archivo_csv)
+    catalogo_reporte = _leer_catalogo_reporte(archivo_csv) if existe_reporte else []
+    if not existe_reporte:
+        # Sin reporte se regeneran todos los movimientos, conservando los ids
+        filas_previas = {}
+        for p in productos.values():
+            p['stock_total'] = 0
+    
+    # Productos agregados en la aplicación: la planilla los usa por nombre
+    ids_planilla = {p['id'] for p in productos.values()}
+    for p in catalogo_reporte:
+        if p['id'] not in ids_planilla and p['nombre'] not in productos:
+            productos[p['nombre']] = dict(p, stock_total=0)
+    
+    # Los productos nuevos toman ids después de todos los usados (planilla y reporte)
+    ultimo_id = [max([p['id'] for p in productos.values()] + [p['id'] for p in catalogo_reporte], default=0)]
+    
+    def nuevo_id():
+        ultimo_id[0] += 1
+        return ultimo_id[0]
+    
+    hoy = datetime.now().strftime("%Y-%m-%d")
+    precios_previos = {p['id']: p['precio'] for p in productos.values()}
+    por_id = {p['id']: p for p in productos.values()}
+    filas = {}
+    vistas = {}
+    nuevos = []
+    
+    wb = openpyxl.load_workbook(archivo_excel, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        for fila in ws.iter_rows(min_row=FILAS_ENCABEZADO + 1, values_only=True):
+            clave = _clave_fila(_huella_fila(fila), vistas)
+            anterior = filas_previas.pop(clave, None)
+            if anterior is not None:
+                filas[clave] = anterior
+                continue
+            datos = _leer_fila(fila, hoy)
+            if datos is None:
+                continue
+            p = _agregar_a_catalogo(productos, datos, nuevo_id)
+            por_id[p['id']] = p
+            nuevos.append([datos[1], p['id'], f"{datos[2]:.2f}", "0.00"])
+            filas[clave] = [p['id'], datos[1], datos[2], datos[5]]
+    finally:
+        wb.close()
+    
+    # Filas que ya no están en la planilla (eliminadas o modificadas): salida que corrige
+    correcciones = []
+    for pid, fecha, comprada, vendida in filas_previas.values():
+        if pid in por_id:
+            por_id[pid]['stock_total'] -= comprada - vendida
+        correcciones.append([fecha, pid, "0.00", f"{comprada:.2f}"])
+    movimientos = correcciones + nuevos
+    
+    if movimientos or not existe_reporte:
+        if existe_reporte:
+            netos = {}
+            for _, pid, entrada, salida in movimientos:
+                netos[pid] = netos.get(pid, 0) + float(entrada) - float(salida)
+            catalogo = _unir_catalogos(catalogo_reporte, productos, precios_previos, netos)
+        else:
+            catalogo = sorted(productos.values(), key=lambda p: p['id'])
         
-        # Crear movimientos de entrada basados en las compras
-        for p in catalogo:
-            for compra in p['compras']:
-                w.writerow([compra['fecha'], p['id'], f"{compra['cantidad']:.2f}", "0.00"])
+        # El catálogo va al inicio del reporte: se reescribe y se copian a
+        # continuación los movimientos existentes, sin volver a derivarlos
+        temporal = archivo_csv + ".tmp"
+        with open(temporal, 'w', newline='', encoding='utf-8') as f:
+            w = csv.writer(f)
+            _escribir_encabezado_y_catalogo(w, catalogo)
+            if existe_reporte:
+                with open(archivo_csv, 'r', newline='', encoding='utf-8') as anterior:
+                    _copiar_movimientos(anterior, f)
+            w.writerows(movimientos)
+        os.replace(temporal, archivo_csv)
+    _guardar_estado(archivo_estado, productos, filas)
+    
+    print(f"\nProductos: {len(productos)}  Movimientos nuevos: {len(movimientos)}")
+    return len(movimientos)
+
+
+# -----------------------------
+# CONVERSIÓN POR LOTES (varios libros / hojas en paralelo)
+# -----------------------------
+
+def _hojas_de_libro(archivo_excel):
+    """Nombres de las hojas del libro, en orden"""
+    wb = openpyxl.load_workbook(archivo_excel, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def _extraer_hoja(archivo_excel, nombre_hoja, fecha_por_defecto):
+    """
+    Tarea de un proceso del pool: lee una hoja (None = hoja activa) en modo solo lectura
+    y devuelve las filas válidas ya extraídas con _leer_fila.
+    """
+    wb = openpyxl.load_workbook(archivo_excel, read_only=True, data_only=True)
+    try:
+        ws = wb[nombre_hoja] if nombre_hoja is not None else wb.active
+        filas = []
+        for fila in ws.iter_rows(min_row=FILAS_ENCABEZADO + 1, values_only=True):
+            datos = _leer_fila(fila, fecha_por_defecto)
+            if datos is not None:
+                filas.append(datos)
+        return filas
+    finally:
+        wb.close()
+
+
+def _expandir_entradas(entradas):
+    """Rutas de libros: los directorios se expanden a sus .xlsx (orden alfabético)"""
+    libros = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            for nombre in sorted(os.listdir(entrada)):
+                if nombre.lower().endswith('.xlsx') and not nombre.startswith('~$'):
+                    libros.append(os.path.join(entrada, nombre))
+        else:
+            libros.append(entrada)
+    return libros
+
+
+def convertir_lote(entradas, archivo_csv, todas_las_hojas=True, procesos=None):
+    """
+    Convierte varios libros (archivos o directorios de .xlsx) y, opcionalmente, todas
+    sus hojas, leyendo cada hoja en un proceso distinto. Los productos se unen por
+    nombre en un único catálogo; los ids se asignan en orden de libro, hoja y fila,
+    por lo que son estables para las mismas entradas.
+    """
+    libros = _expandir_entradas(entradas)
+    tareas = []
+    for libro in libros:
+        hojas = _hojas_de_libro(libro) if todas_las_hojas else [None]
+        tareas.extend((libro, hoja) for hoja in hojas)
+    
+    hoy = datetime.now().strftime("%Y-%m-%d")
+    args = ([t[0] for t in tareas], [t[1] for t in tareas], [hoy] * len(tareas))
+    if len(tareas) > 1 and procesos != 1:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(_extraer_hoja, *args))  # map conserva el orden de las tareas
+    else:
+        resultados = list(map(_extraer_hoja, *args))
+    
+    # Unir por nombre en el orden de las tareas
+    productos = {}
+    movimientos = []
+    for filas in resultados:
+        for datos in filas:
+            p = _agregar_a_catalogo(productos, datos)
+            movimientos.append([datos[1], p['id'], f"{datos[2]:.2f}", "0.00"])
+    
+    print(f"\nLibros: {len(libros)}  Hojas: {len(tareas)}  Productos únicos: {len(productos)}")
+    
+    with open(archivo_csv, 'w', newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        _escribir_encabezado_y_catalogo(w, list(productos.values()))
+        w.writerows(movimientos)
     
     print(f"\nArchivo CSV creado: {archivo_csv}")
     return True
 
 
+def _argumentos():
+    parser = argparse.ArgumentParser(description="Convierte planillas Excel al CSV del inventario")
+    parser.add_argument("entradas", nargs="*",
+                        help="Libros .xlsx o directorios (por defecto: Inventario BioSaludNaturalSpA.xlsx)")
+    parser.add_argument("-o", "--salida", default="Inventario_BioSalud.csv", help="CSV de salida")
+    parser.add_argument("--solo-hoja-activa", action="store_true",
+                        help="En modo lote, convertir solo la hoja activa de cada libro")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Procesos en paralelo para el modo lote (por defecto: CPUs)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Procesar solo filas nuevas o modificadas desde la última ejecución")
+    args = parser.parse_args()
+    if args.incremental and len(args.entradas) > 1:
+        parser.error("--incremental admite un solo libro")
+    return args
+
+
 if __name__ == "__main__":
+    args = _argumentos()
     try:
-        convertir_excel_a_csv(
-            "Inventario BioSaludNaturalSpA.xlsx",
-            "Inventario_BioSalud.csv"
-        )
+        if args.incremental:
+            convertir_incremental(
+                args.entradas[0] if args.entradas else "Inventario BioSaludNaturalSpA.xlsx",
+                args.salida
+            )
+        elif args.entradas:
+            convertir_lote(args.entradas, args.salida,
+                           todas_las_hojas=not args.solo_hoja_activa, procesos=args.procesos)
+        else:
+            convertir_excel_a_csv_streaming(
+                "Inventario BioSaludNaturalSpA.xlsx",
+                args.salida
+            )
         print("\n✅ Conversión exitosa!")
-        print("Archivo: Inventario_BioSalud.csv")
+        print(f"Archivo: {args.salida}")
         
     except ImportError:
         print("Error: Se requiere instalar openpyxl")
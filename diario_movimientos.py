@@ -0,0 +1,118 @@
+# diario_movimientos.py
+# -----------------------------------------
+# Diario de movimientos (solo agregar) - BioSalud Natural SpA
+# Cada movimiento nuevo se agrega como una línea al archivo "<reporte>.diario"
+# y se sincroniza a disco (fsync): guardar un movimiento cuesta lo mismo sin
+# importar cuántos haya. Cada cierto número de líneas el diario se compacta
+# reescribiendo el reporte completo y se vacía.
+#
+# La primera línea del diario guarda cuántos movimientos tenía el reporte
+# base ("#base,N"). Si al recuperar el reporte ya no tiene N movimientos, el
+# diario quedó de una compactación anterior y se descarta (no se duplica).
+# -----------------------------------------
+
+import csv
+import os
+from typing import List, Optional
+
+EXTENSION = ".diario"
+LIMITE_COMPACTACION = 500  # líneas del diario antes de reescribir el reporte
+
+
+class DiarioMovimientos:
+    """Diario de movimientos asociado a un archivo de reporte."""
+
+    def __init__(self, ruta_reporte: str, limite_compactacion: int = LIMITE_COMPACTACION):
+        self.ruta = ruta_reporte + EXTENSION
+        self.limite_compactacion = limite_compactacion
+        self.base = 0          # movimientos del reporte cuando se inició el diario
+        self.pendientes = 0    # movimientos en el diario aún no compactados
+        self._archivo = None
+        self._ultimo = None    # (posición, pendientes) antes del último registro
+
+    def recuperar(self, base_reporte: int) -> List[List]:
+        """
+        Lee los movimientos del diario que aún no están en el reporte.
+        base_reporte es la cantidad de movimientos leídos del reporte.
+        Las líneas incompletas (corte durante la escritura) se ignoran.
+        """
+        self.cerrar()
+        self.base = base_reporte
+        self.pendientes = 0
+        if not os.path.exists(self.ruta):
+            return []
+
+        filas: List[List] = []
+        base_diario: Optional[int] = None
+        with open(self.ruta, "r", newline="", encoding="utf-8") as f:
+            lineas = [linea for linea in f if linea.endswith("\n")]
+        for fila in csv.reader(lineas):
+            if not fila:
+                continue
+            if fila[0] == "#base":
+                base_diario = int(fila[1])
+                continue
+            try:
+                filas.append([fila[0], int(fila[1]), float(fila[2]), float(fila[3])])
+            except (ValueError, IndexError):
+                continue
+
+        if base_diario != base_reporte:
+            # El reporte ya incluye estos movimientos (compactación previa)
+            self.reiniciar(base_reporte)
+            return []
+        self.pendientes = len(filas)
+        return filas
+
+    def registrar(self, fecha: str, id_producto: int, entrada: float, salida: float) -> bool:
+        """
+        Agrega un movimiento al diario y lo sincroniza a disco.
+        Devuelve True cuando el diario alcanzó el límite y conviene compactar.
+        """
+        return self.registrar_lote([[fecha, id_producto, entrada, salida]])
+
+    def registrar_lote(self, filas: List[List]) -> bool:
+        """
+        Agrega varios movimientos con una sola sincronización a disco.
+        Devuelve True cuando el diario alcanzó el límite y conviene compactar.
+        """
+        if self._archivo is None:
+            nuevo = not os.path.exists(self.ruta) or os.path.getsize(self.ruta) == 0
+            self._archivo = open(self.ruta, "a", newline="", encoding="utf-8")
+            if nuevo:
+                csv.writer(self._archivo).writerow(["#base", self.base])
+        self._archivo.flush()
+        self._ultimo = (self._archivo.tell(), self.pendientes)
+        csv.writer(self._archivo).writerows(
+            [fecha, pid, f"{ent:.2f}", f"{sal:.2f}"] for fecha, pid, ent, sal in filas)
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+        self.pendientes += len(filas)
+        return self.pendientes >= self.limite_compactacion
+
+    def deshacer_ultimo(self) -> None:
+        """
+        Quita del diario las filas del último registrar/registrar_lote (p. ej.
+        si el motor no pudo aplicarlas), para que no se repitan al recuperar.
+        """
+        if self._archivo is None or self._ultimo is None:
+            return
+        posicion, self.pendientes = self._ultimo
+        self._ultimo = None
+        self._archivo.truncate(posicion)
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+
+    def reiniciar(self, base_reporte: int) -> None:
+        """Vacía el diario tras reescribir el reporte completo (compactación)."""
+        self.cerrar()
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
+        self.base = base_reporte
+        self.pendientes = 0
+
+    def cerrar(self) -> None:
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        self._ultimo = None
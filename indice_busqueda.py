@@ -0,0 +1,112 @@
+# indice_busqueda.py
+# -----------------------------------------
+# Índice de búsqueda de productos - BioSalud Natural SpA
+# Búsqueda por nombre mientras se escribe, sin recorrer todo el catálogo:
+#   - Los nombres se normalizan (sin tildes ni mayúsculas: "Imán" -> "iman")
+#     y se dividen en palabras (tokens).
+#   - token -> ids de productos con esa palabra (diccionario)
+#   - lista ordenada de tokens: los que empiezan con un prefijo forman un
+#     tramo contiguo que se ubica con búsqueda binaria (bisect), O(log V).
+# Una consulta "pul iman" devuelve los productos que tienen una palabra que
+# empieza con "pul" Y otra que empieza con "iman".
+# -----------------------------------------
+
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set
+
+_SEPARADORES = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes ni diacríticos ('PULSERA CON IMÁN' -> 'pulsera con iman')."""
+    if texto.isascii():
+        return texto.lower()
+    # NFKD separa cada letra de su tilde ("á" -> "a" + "´"); al pasar a ASCII se descartan las tildes
+    return unicodedata.normalize("NFKD", texto.casefold()).encode("ascii", "ignore").decode("ascii")
+
+
+def tokens(texto: str) -> List[str]:
+    """Palabras normalizadas del texto, en orden y sin vacías."""
+    return [t for t in _SEPARADORES.split(normalizar(texto)) if t]
+
+
+class IndiceBusqueda:
+    """Índice invertido de palabras de los nombres, con búsqueda por prefijo."""
+
+    def __init__(self, productos: Iterable[Dict] = ()):
+        self._ids_de: Dict[str, Set[int]] = {}   # token -> ids
+        self._ordenados: List[str] = []          # tokens en orden alfabético
+        self._nombre_de: Dict[int, str] = {}     # id -> palabras del nombre separadas por un espacio
+        for p in productos:
+            self.agregar(p["id"], p["nombre"])
+
+    def __len__(self) -> int:
+        return len(self._nombre_de)
+
+    # ---------- mantenimiento ----------
+
+    def agregar(self, id_producto: int, nombre: str) -> None:
+        """Indexa (o reindexa) el nombre de un producto."""
+        if id_producto in self._nombre_de:
+            self.quitar(id_producto)
+        palabras = tokens(nombre)
+        self._nombre_de[id_producto] = " ".join(palabras)
+        for t in set(palabras):
+            ids = self._ids_de.get(t)
+            if ids is None:
+                ids = self._ids_de[t] = set()
+                insort(self._ordenados, t)
+            ids.add(id_producto)
+
+    def quitar(self, id_producto: int) -> None:
+        nombre = self._nombre_de.pop(id_producto, None)
+        if nombre is None:
+            return
+        for t in set(nombre.split()):
+            ids = self._ids_de.get(t)
+            if ids is None:
+                continue
+            ids.discard(id_producto)
+            if not ids:
+                del self._ids_de[t]
+                del self._ordenados[bisect_left(self._ordenados, t)]
+
+    # ---------- consultas ----------
+
+    def _con_prefijo(self, prefijo: str) -> Set[int]:
+        """Ids con alguna palabra que empieza con el prefijo (tramo contiguo de la lista ordenada)."""
+        encontrados: Set[int] = set()
+        i = bisect_left(self._ordenados, prefijo)
+        ordenados = self._ordenados
+        while i < len(ordenados) and ordenados[i].startswith(prefijo):
+            encontrados |= self._ids_de[ordenados[i]]
+            i += 1
+        return encontrados
+
+    def buscar(self, texto: str, limite: Optional[int] = None) -> List[int]:
+        """
+        Ids cuyos nombres contienen, para cada palabra de la consulta, una palabra
+        que empieza con ella. Primero los nombres que empiezan con la consulta
+        completa y luego el resto, cada grupo por id.
+        """
+        palabras = tokens(texto)
+        if not palabras:
+            return []
+        # Empezar por el término más largo (suele ser el más selectivo)
+        consulta = sorted(palabras, key=len, reverse=True)
+        resultado = self._con_prefijo(consulta[0])
+        for termino in consulta[1:]:
+            if not resultado:
+                break
+            resultado &= self._con_prefijo(termino)
+
+        frase = " ".join(palabras)
+        nombres = self._nombre_de
+        por_id = sorted(resultado)
+        primeros = [pid for pid in por_id if nombres[pid].startswith(frase)]
+        if primeros:
+            al_inicio = set(primeros)
+            por_id = primeros + [pid for pid in por_id if pid not in al_inicio]
+        return por_id[:limite] if limite is not None else por_id
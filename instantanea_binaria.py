@@ -0,0 +1,372 @@
+# instantanea_binaria.py
+# -----------------------------------------
+# Instantánea binaria del inventario - BioSalud Natural SpA
+# Alternativa compacta al reporte CSV (extensión .invb) que se abre con mmap:
+# no hay que interpretar texto ni convertir números al cargarla.
+#
+# Formato (little-endian, bloques alineados a 8 bytes):
+#   encabezado (64 bytes): "BSINVB01", versión, cantidades de productos,
+#       movimientos y acumulados diarios, largo de la tabla de nombres y CRC32
+#       de cada bloque y del propio encabezado
+#   productos:  registros fijos de 40 bytes
+#       id (int32), posición y largo del nombre en la tabla de nombres (uint32),
+#       costo, precio y stock (int64, centésimas)
+#   nombres:    tabla de cadenas UTF-8 concatenadas
+#   movimientos: columnas de ancho fijo, como AlmacenMovimientos
+#       fecha (ordinal int32) | id (int32) | entrada | salida (int64, centésimas)
+#   diarios:    una fila por producto y día con movimientos, ordenadas por
+#       (id, fecha): fecha | id | entrada | salida | acumulado (Σ netos hasta ese
+#       día). Es el índice temporal (serie_stock.py) ya armado: el stock de un
+#       producto en una fecha se responde con dos búsquedas binarias sobre el mmap.
+#
+# Conversión desde y hacia el reporte CSV:
+#   python instantanea_binaria.py Inventario_BioSalud.csv Inventario_BioSalud.invb
+#   python instantanea_binaria.py Inventario_BioSalud.invb copia.csv
+# -----------------------------------------
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from almacen_movimientos import AlmacenMovimientos, fecha_a_ordinal, ordinal_a_fecha
+from cantidades import ESCALA
+from resumen_periodos import ResumenPeriodos
+from serie_stock import IndiceSerieStock
+
+EXTENSION = ".invb"
+MAGIA = b"BSINVB01"
+VERSION = 1
+
+# magia, versión, reservado, productos, movimientos, diarios, bytes de nombres,
+# CRC32 de productos, nombres, movimientos y diarios, CRC32 del encabezado
+_ENCABEZADO = struct.Struct("<8sHHIQQIIIIII")
+_TAM_ENCABEZADO = 64
+_PRODUCTO = struct.Struct("<iIIqqq4x")
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+class InstantaneaInvalida(Exception):
+    """El archivo no es una instantánea binaria o está dañado (CRC distinto)."""
+
+
+def _alinear(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _a_bytes(columna: array) -> bytes:
+    if _LITTLE_ENDIAN:
+        return columna.tobytes()
+    copia = array(columna.typecode, columna)
+    copia.byteswap()
+    return copia.tobytes()
+
+
+def es_instantanea_binaria(ruta: str) -> bool:
+    """True si el archivo empieza con la firma de la instantánea binaria."""
+    try:
+        with open(ruta, "rb") as f:
+            return f.read(len(MAGIA)) == MAGIA
+    except OSError:
+        return False
+
+
+# -----------------------------
+# ESCRITURA
+# -----------------------------
+
+def _diarios(movimientos: AlmacenMovimientos) -> Tuple[array, array, array, array, array]:
+    """Columnas de acumulados por (producto, día), ordenadas por id y fecha."""
+    por_dia: Dict[Tuple[int, int], List[int]] = {}
+    for ordinal, pid, ent, sal in movimientos.filas_enteras():
+        totales = por_dia.get((pid, ordinal))
+        if totales is None:
+            por_dia[(pid, ordinal)] = [ent, sal]
+        else:
+            totales[0] += ent
+            totales[1] += sal
+    fechas, ids, entradas, salidas, acumulado = array('i'), array('i'), array('q'), array('q'), array('q')
+    anterior, total = None, 0
+    for (pid, ordinal) in sorted(por_dia):
+        ent, sal = por_dia[(pid, ordinal)]
+        if pid != anterior:
+            anterior, total = pid, 0
+        total += ent - sal
+        fechas.append(ordinal)
+        ids.append(pid)
+        entradas.append(ent)
+        salidas.append(sal)
+        acumulado.append(total)
+    return fechas, ids, entradas, salidas, acumulado
+
+
+def escribir_instantanea_binaria(ruta: str, productos: Iterable[Dict], stock: Dict[int, int],
+                                 movimientos: Iterable[List]) -> str:
+    """
+    Escribe la instantánea (catálogo, stock en centésimas y movimientos) de forma atómica:
+    archivo temporal sincronizado a disco que luego reemplaza al destino.
+    """
+    if not isinstance(movimientos, AlmacenMovimientos):
+        movimientos = AlmacenMovimientos(movimientos)
+
+    nombres = bytearray()
+    registros = bytearray()
+    n_productos = 0
+    for p in productos:
+        nombre = p["nombre"].encode("utf-8")
+        registros += _PRODUCTO.pack(p["id"], len(nombres), len(nombre), p["costo"],
+                                    p["precio"], stock.get(p["id"], 0))
+        nombres += nombre
+        n_productos += 1
+    nombres += b"\0" * (_alinear(len(nombres)) - len(nombres))
+
+    bloque_movimientos = b"".join(_a_bytes(c) for c in movimientos.columnas())
+    columnas_diarias = _diarios(movimientos)
+    bloque_diarios = b"".join(_a_bytes(c) for c in columnas_diarias)
+
+    campos = (MAGIA, VERSION, 0, n_productos, len(movimientos), len(columnas_diarias[0]), len(nombres),
+              zlib.crc32(registros), zlib.crc32(nombres), zlib.crc32(bloque_movimientos),
+              zlib.crc32(bloque_diarios))
+    sin_crc = _ENCABEZADO.pack(*campos, 0)[:-4]
+    encabezado = _ENCABEZADO.pack(*campos, zlib.crc32(sin_crc))
+
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(encabezado.ljust(_TAM_ENCABEZADO, b"\0"))
+        for bloque in (registros, nombres, bloque_movimientos, bloque_diarios):
+            f.write(bloque)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+    return os.path.abspath(ruta)
+
+
+# -----------------------------
+# LECTURA (mmap)
+# -----------------------------
+
+class InstantaneaBinaria:
+    """
+    Instantánea abierta con mmap (solo lectura). Las columnas se exponen como
+    memoryview sobre el archivo: las consultas no crean objetos por fila.
+    Usar con `with` o llamar a cerrar().
+    """
+
+    def __init__(self, ruta: str, verificar: bool = True):
+        self.ruta = ruta
+        self._archivo = open(ruta, "rb")
+        try:
+            self._mapa = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # archivo vacío
+            self._archivo.close()
+            raise InstantaneaInvalida(f"{ruta}: archivo vacío")
+        try:
+            self._abrir(verificar)
+        except Exception:
+            self.cerrar()
+            raise
+
+    def _abrir(self, verificar: bool) -> None:
+        mapa = self._mapa
+        if len(mapa) < _TAM_ENCABEZADO or mapa[:len(MAGIA)] != MAGIA:
+            raise InstantaneaInvalida(f"{self.ruta}: no es una instantánea binaria")
+        (_, version, _, self.n_productos, self.n_movimientos, self.n_diarios, tam_nombres,
+         crc_productos, crc_nombres, crc_movimientos, crc_diarios, crc_encabezado) = \
+            _ENCABEZADO.unpack_from(mapa, 0)
+        if version != VERSION:
+            raise InstantaneaInvalida(f"{self.ruta}: versión {version} no soportada")
+        if zlib.crc32(mapa[:_ENCABEZADO.size - 4]) != crc_encabezado:
+            raise InstantaneaInvalida(f"{self.ruta}: encabezado dañado")
+
+        vista = memoryview(mapa)
+        inicio = _TAM_ENCABEZADO
+        bloques = {}
+        for nombre, largo in (("productos", self.n_productos * _PRODUCTO.size),
+                              ("nombres", tam_nombres),
+                              ("movimientos", self.n_movimientos * 24),
+                              ("diarios", self.n_diarios * 32)):
+            bloques[nombre] = vista[inicio:inicio + largo]
+            inicio += largo
+        if inicio > len(mapa):
+            raise InstantaneaInvalida(f"{self.ruta}: archivo truncado")
+        if verificar:
+            for nombre, crc in (("productos", crc_productos), ("nombres", crc_nombres),
+                                ("movimientos", crc_movimientos), ("diarios", crc_diarios)):
+                if zlib.crc32(bloques[nombre]) != crc:
+                    raise InstantaneaInvalida(f"{self.ruta}: bloque de {nombre} dañado")
+
+        self._productos = bloques["productos"]
+        self._nombres = bloques["nombres"]
+        n, d = self.n_movimientos, self.n_diarios
+        mov, dia = bloques["movimientos"], bloques["diarios"]
+        # Columnas (memoryview tipadas sobre el mmap, sin copiar)
+        self.fechas = self._columna(mov[0:4 * n], 'i')
+        self.ids = self._columna(mov[4 * n:8 * n], 'i')
+        self.entradas = self._columna(mov[8 * n:16 * n], 'q')
+        self.salidas = self._columna(mov[16 * n:24 * n], 'q')
+        self._dia_fechas = self._columna(dia[0:4 * d], 'i')
+        self._dia_ids = self._columna(dia[4 * d:8 * d], 'i')
+        self._dia_entradas = self._columna(dia[8 * d:16 * d], 'q')
+        self._dia_salidas = self._columna(dia[16 * d:24 * d], 'q')
+        self._dia_acumulado = self._columna(dia[24 * d:32 * d], 'q')
+
+    @staticmethod
+    def _columna(bloque: memoryview, tipo: str):
+        if _LITTLE_ENDIAN:
+            return bloque.cast(tipo)
+        columna = array(tipo, bloque.tobytes())
+        columna.byteswap()
+        return columna
+
+    def cerrar(self) -> None:
+        for nombre in ("fechas", "ids", "entradas", "salidas", "_dia_fechas", "_dia_ids",
+                       "_dia_entradas", "_dia_salidas", "_dia_acumulado", "_productos", "_nombres"):
+            vista = self.__dict__.pop(nombre, None)
+            if isinstance(vista, memoryview):
+                vista.release()
+        try:
+            self._mapa.close()
+        except BufferError:  # quedan vistas en uso fuera de la instantánea: se libera al recolectarlas
+            pass
+        self._archivo.close()
+
+    def __enter__(self) -> "InstantaneaBinaria":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    # ---------- catálogo ----------
+
+    def _registro(self, i: int) -> Tuple[int, int, int, int, int, int]:
+        return _PRODUCTO.unpack_from(self._productos, i * _PRODUCTO.size)
+
+    def productos(self) -> List[Dict]:
+        """Catálogo (dicts id, nombre, costo, precio en centésimas) en el orden guardado."""
+        resultado = []
+        for pid, pos, largo, costo, precio, _ in _PRODUCTO.iter_unpack(self._productos):
+            resultado.append({"id": pid, "nombre": bytes(self._nombres[pos:pos + largo]).decode("utf-8"),
+                              "costo": costo, "precio": precio})
+        return resultado
+
+    def stock_actual(self) -> Dict[int, int]:
+        """
+        Stock guardado de cada producto del catálogo (id -> centésimas), más el de los
+        ids que solo aparecen en movimientos (Σ netos, último acumulado diario).
+        """
+        stock = {pid: s for pid, _, _, _, _, s in _PRODUCTO.iter_unpack(self._productos)}
+        i = 0
+        while i < self.n_diarios:
+            pid = self._dia_ids[i]
+            i = bisect_right(self._dia_ids, pid, i)
+            stock.setdefault(pid, self._dia_acumulado[i - 1])
+        return stock
+
+    # ---------- movimientos ----------
+
+    def __len__(self) -> int:
+        return self.n_movimientos
+
+    def movimiento(self, i: int) -> List:
+        """Fila i como [fecha, id, entrada, salida]."""
+        if i < 0:
+            i += self.n_movimientos
+        if not 0 <= i < self.n_movimientos:
+            raise IndexError("índice de movimiento fuera de rango")
+        return [ordinal_a_fecha(self.fechas[i]), self.ids[i],
+                self.entradas[i] / ESCALA, self.salidas[i] / ESCALA]
+
+    def movimientos(self, desde: int = 0, hasta: Optional[int] = None) -> Iterator[List]:
+        """Filas [fecha, id, entrada, salida] entre las posiciones desde y hasta."""
+        for i in range(*slice(desde, hasta).indices(self.n_movimientos)):
+            yield self.movimiento(i)
+
+    def almacen_movimientos(self) -> AlmacenMovimientos:
+        """Copia de los movimientos en un AlmacenMovimientos (copia de buffers, sin filas)."""
+        return AlmacenMovimientos.desde_columnas(self.fechas, self.ids, self.entradas, self.salidas)
+
+    # ---------- acumulados diarios e índice temporal ----------
+
+    def _tramo_producto(self, id_producto: int) -> Tuple[int, int]:
+        """Posiciones [i, j) de las filas diarias del producto (bloque ordenado por id)."""
+        return (bisect_left(self._dia_ids, id_producto), bisect_right(self._dia_ids, id_producto))
+
+    def stock_en_fecha(self, id_producto: int, fecha: str) -> float:
+        """Stock del producto al cierre de la fecha, desde los movimientos guardados (O(log n))."""
+        i, j = self._tramo_producto(id_producto)
+        k = bisect_right(self._dia_fechas, fecha_a_ordinal(fecha), i, j)
+        return self._dia_acumulado[k - 1] / ESCALA if k > i else 0.0
+
+    def serie(self, id_producto: int, desde: Optional[str] = None,
+              hasta: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Pares (fecha, stock al cierre del día) de los días con movimientos del producto."""
+        i, j = self._tramo_producto(id_producto)
+        if desde:
+            i = bisect_left(self._dia_fechas, fecha_a_ordinal(desde), i, j)
+        if hasta:
+            j = bisect_right(self._dia_fechas, fecha_a_ordinal(hasta), i, j)
+        return [(ordinal_a_fecha(self._dia_fechas[k]), self._dia_acumulado[k] / ESCALA) for k in range(i, j)]
+
+    def almacen_diarios(self) -> AlmacenMovimientos:
+        """Acumulados por (producto, día) como filas de un AlmacenMovimientos (ver ResumenPeriodos.construir)."""
+        return AlmacenMovimientos.desde_columnas(self._dia_fechas, self._dia_ids,
+                                                 self._dia_entradas, self._dia_salidas)
+
+    def indice_stock(self) -> IndiceSerieStock:
+        """Índice temporal listo para usar (copia de los tramos de cada producto)."""
+        indice = IndiceSerieStock()
+        i = 0
+        while i < self.n_diarios:
+            pid = self._dia_ids[i]
+            j = bisect_right(self._dia_ids, pid, i)
+            fechas, acumulado = array('i'), array('q')
+            fechas.frombytes(memoryview(self._dia_fechas[i:j]).cast('B'))
+            acumulado.frombytes(memoryview(self._dia_acumulado[i:j]).cast('B'))
+            indice.agregar_serie(pid, fechas, acumulado)
+            i = j
+        return indice
+
+
+# -----------------------------
+# CONVERSIÓN DESDE / HACIA EL REPORTE CSV
+# -----------------------------
+
+def csv_a_binaria(ruta_csv: str, ruta_binaria: str) -> str:
+    """
+    Convierte un reporte CSV en instantánea binaria. El stock es el mismo que
+    obtendría la GUI al importarlo (punto de control o recálculo).
+    """
+    from motor_inventario import MotorInventario  # evita importación circular
+    motor = MotorInventario()
+    motor.importar_reporte(ruta_csv)
+    return escribir_instantanea_binaria(ruta_binaria, motor.catalogo, motor.stock_actual, motor.movimientos)
+
+
+def binaria_a_csv(ruta_binaria: str, ruta_csv: str) -> str:
+    """Convierte una instantánea binaria en el reporte CSV de siempre."""
+    from motor_inventario import MotorInventario
+    with InstantaneaBinaria(ruta_binaria) as inst:
+        resumen = ResumenPeriodos()
+        resumen.construir(inst.almacen_diarios())
+        datos = (inst.productos(), inst.stock_actual(), inst.almacen_movimientos(), resumen, inst.indice_stock())
+    return MotorInventario.escribir_instantanea(ruta_csv, datos)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Uso: python instantanea_binaria.py <origen> <destino>  (.csv <-> .invb)")
+        sys.exit(2)
+    origen, destino = sys.argv[1], sys.argv[2]
+    if es_instantanea_binaria(origen):
+        print(f"Reporte CSV escrito en: {binaria_a_csv(origen, destino)}")
+    else:
+        print(f"Instantánea binaria escrita en: {csv_a_binaria(origen, destino)}")
+
+
+if __name__ == "__main__":
+    main()
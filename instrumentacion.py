@@ -0,0 +1,315 @@
+# instrumentacion.py
+# -----------------------------------------
+# Medición de tiempos (opcional) - BioSalud Natural SpA
+# Registra cuánto tardan las operaciones del motor y los refrescos de la
+# consola y la GUI, para saber con números de los equipos de las cajas qué
+# pantallas conviene optimizar primero.
+#   - @cronometrado("nombre")  decora una función o método
+#   - with tramo("nombre"):    mide un bloque
+# Por cada nombre se lleva la cantidad de llamadas, el total, mínimo, máximo
+# y un histograma por rangos de milisegundos. Opcionalmente se captura un
+# perfil con cProfile del hilo principal.
+# Está apagada por defecto (las operaciones medidas solo revisan un booleano).
+# Se activa con la variable de entorno BIOSALUD_PERFIL, o desde el menú de
+# consola / el botón de la GUI:
+#   BIOSALUD_PERFIL=1          tiempos
+#   BIOSALUD_PERFIL=cprofile   tiempos + perfil de cProfile
+#   BIOSALUD_PERFIL_ARCHIVO    reporte que se escribe al salir
+#                              (por defecto perfil_inventario.txt; .json = datos)
+# -----------------------------------------
+
+import atexit
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import threading
+from datetime import datetime
+from functools import wraps
+from time import perf_counter
+from typing import Dict, List, NamedTuple, Optional
+
+VARIABLE_ENTORNO = "BIOSALUD_PERFIL"
+VARIABLE_ARCHIVO = "BIOSALUD_PERFIL_ARCHIVO"
+ARCHIVO_POR_DEFECTO = "perfil_inventario.txt"
+
+# Límites superiores (ms) de los rangos del histograma; el último rango es "más de 5 s"
+LIMITES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Estadistica(NamedTuple):
+    """Resumen de una operación medida (tiempos en milisegundos)."""
+    nombre: str
+    llamadas: int
+    total_ms: float
+    minimo_ms: float
+    maximo_ms: float
+    histograma: List[int]  # alineado con LIMITES_MS, más un rango final sin límite
+
+    @property
+    def media_ms(self) -> float:
+        return self.total_ms / self.llamadas if self.llamadas else 0.0
+
+    def percentil_ms(self, fraccion: float) -> float:
+        """Cota superior del percentil según el histograma (el máximo si cae en el último rango)."""
+        objetivo = fraccion * self.llamadas
+        acumulado = 0
+        for limite, n in zip(LIMITES_MS, self.histograma):
+            acumulado += n
+            if acumulado >= objetivo:
+                return min(float(limite), self.maximo_ms)
+        return self.maximo_ms
+
+
+class _Registro:
+    """Contadores de una operación; se modifican con el candado del módulo."""
+    __slots__ = ("llamadas", "total", "minimo", "maximo", "histograma")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.total = 0.0
+        self.minimo = float("inf")
+        self.maximo = 0.0
+        self.histograma = [0] * (len(LIMITES_MS) + 1)
+
+
+_activa = False
+_candado = threading.Lock()  # la GUI mide desde el hilo de Tk y desde el hilo de E/S
+_registros: Dict[str, _Registro] = {}
+_perfil: Optional[cProfile.Profile] = None
+_archivo_salida: Optional[str] = None
+_inicio = datetime.now()
+
+
+def activa() -> bool:
+    return _activa
+
+
+def registrar(nombre: str, segundos: float) -> None:
+    """Suma una duración a la operación `nombre` (aunque la medición esté apagada)."""
+    ms = segundos * 1000.0
+    rango = len(LIMITES_MS)
+    for i, limite in enumerate(LIMITES_MS):
+        if ms <= limite:
+            rango = i
+            break
+    with _candado:
+        r = _registros.get(nombre)
+        if r is None:
+            r = _registros[nombre] = _Registro()
+        r.llamadas += 1
+        r.total += ms
+        if ms < r.minimo:
+            r.minimo = ms
+        if ms > r.maximo:
+            r.maximo = ms
+        r.histograma[rango] += 1
+
+
+def cronometrado(nombre: str):
+    """Decorador: mide cada llamada a la función con el nombre dado (solo si la medición está activa)."""
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _activa:
+                return funcion(*args, **kwargs)
+            t0 = perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                registrar(nombre, perf_counter() - t0)
+        return envoltura
+    return decorador
+
+
+class tramo:
+    """Administrador de contexto: `with tramo("gui.importar.lectura"): ...` mide el bloque."""
+    __slots__ = ("nombre", "_t0")
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self._t0 = None
+
+    def __enter__(self):
+        if _activa:
+            self._t0 = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._t0 is not None:
+            registrar(self.nombre, perf_counter() - self._t0)
+            self._t0 = None
+        return False
+
+
+# -----------------------------
+# ENCENDER / APAGAR
+# -----------------------------
+
+def activar(con_cprofile: bool = False, archivo_salida: str = None) -> None:
+    """
+    Enciende la medición. Con `con_cprofile` también perfila el hilo que llama
+    (el hilo de Tk en la GUI). Si se da `archivo_salida`, el reporte se escribe
+    ahí al terminar el programa.
+    """
+    global _activa, _perfil, _archivo_salida
+    _activa = True
+    if con_cprofile:
+        if _perfil is None:
+            _perfil = cProfile.Profile()
+        try:
+            _perfil.enable()  # también tras desactivar(): sigue sumando al mismo perfil
+        except ValueError:  # otro perfilador ya está activo (p. ej. python -m cProfile)
+            _perfil = None
+    if archivo_salida and _archivo_salida is None:
+        atexit.register(_volcar_al_salir)
+    if archivo_salida:
+        _archivo_salida = archivo_salida
+
+
+def desactivar() -> None:
+    """Apaga la medición; los datos reunidos se conservan hasta reiniciar()."""
+    global _activa
+    _activa = False
+    if _perfil is not None:
+        _perfil.disable()
+
+
+def perfil_activo() -> bool:
+    return _perfil is not None
+
+
+def reiniciar() -> None:
+    """Borra los tiempos y el perfil reunidos (la medición sigue como estaba)."""
+    global _perfil, _inicio
+    with _candado:
+        _registros.clear()
+    if _perfil is not None:
+        _perfil.disable()
+        _perfil = cProfile.Profile()
+        if _activa:
+            _perfil.enable()
+    _inicio = datetime.now()
+
+
+def activar_desde_entorno() -> bool:
+    """Enciende la medición si BIOSALUD_PERFIL lo pide; devuelve si quedó activa."""
+    valor = os.environ.get(VARIABLE_ENTORNO, "").strip().lower()
+    if valor in ("", "0", "no", "false"):
+        return False
+    activar(con_cprofile=(valor == "cprofile"),
+            archivo_salida=os.environ.get(VARIABLE_ARCHIVO) or ARCHIVO_POR_DEFECTO)
+    return True
+
+
+# -----------------------------
+# REPORTE
+# -----------------------------
+
+def estadisticas() -> List[Estadistica]:
+    """Operaciones medidas, de mayor a menor tiempo total."""
+    with _candado:
+        lista = [Estadistica(nombre, r.llamadas, r.total, r.minimo, r.maximo, list(r.histograma))
+                 for nombre, r in _registros.items()]
+    lista.sort(key=lambda e: e.total_ms, reverse=True)
+    return lista
+
+
+def _rotulo_rango(i: int) -> str:
+    return f"≤{LIMITES_MS[i]}ms" if i < len(LIMITES_MS) else f">{LIMITES_MS[-1]}ms"
+
+
+def texto_perfil(lineas: int = 25) -> str:
+    """Funciones con más tiempo acumulado según cProfile ('' si no hay perfil)."""
+    if _perfil is None:
+        return ""
+    salida = io.StringIO()
+    try:
+        pstats.Stats(_tomar_perfil(), stream=salida).sort_stats("cumulative").print_stats(lineas)
+    except TypeError:  # perfil sin datos todavía
+        return ""
+    return salida.getvalue()
+
+
+def _tomar_perfil() -> cProfile.Profile:
+    """Fija los datos del perfil para leerlos (create_stats lo detiene) y lo reanuda si corresponde."""
+    _perfil.create_stats()
+    if _activa:
+        _perfil.enable()
+    return _perfil
+
+
+def reporte(lineas_perfil: int = 25) -> str:
+    """Tabla de tiempos por operación, histograma y (si está activo) el resumen de cProfile."""
+    stats = estadisticas()
+    partes = [
+        "Medición de tiempos - BioSalud Natural SpA",
+        f"Desde {_inicio:%Y-%m-%d %H:%M:%S} hasta {datetime.now():%Y-%m-%d %H:%M:%S}  "
+        f"({platform.node()}, {platform.platform()}, Python {platform.python_version()})",
+        "",
+        f"{'Operación':<36} {'Llamadas':>9} {'Total s':>9} {'Media ms':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'Máx ms':>9}",
+        "=" * 94,
+    ]
+    if not stats:
+        partes.append("(sin operaciones medidas)")
+    for e in stats:
+        partes.append(
+            f"{e.nombre:<36} {e.llamadas:>9} {e.total_ms / 1000:>9.3f} {e.media_ms:>9.2f} "
+            f"{e.percentil_ms(0.5):>8.1f} {e.percentil_ms(0.95):>8.1f} {e.maximo_ms:>9.2f}")
+    if stats:
+        partes += ["", "Histograma (llamadas por rango de duración)"]
+        for e in stats:
+            rangos = "  ".join(f"{_rotulo_rango(i)}:{n}" for i, n in enumerate(e.histograma) if n)
+            partes.append(f"  {e.nombre:<34} {rangos}")
+    perfil = texto_perfil(lineas_perfil)
+    if perfil:
+        partes += ["", "Perfil cProfile (hilo principal, por tiempo acumulado)", perfil]
+    return "\n".join(partes) + "\n"
+
+
+def datos_json() -> Dict:
+    """Los mismos datos del reporte en un diccionario (para juntar los de varios equipos)."""
+    return {
+        "equipo": platform.node(),
+        "sistema": platform.platform(),
+        "python": platform.python_version(),
+        "desde": _inicio.isoformat(timespec="seconds"),
+        "hasta": datetime.now().isoformat(timespec="seconds"),
+        "limites_ms": list(LIMITES_MS),
+        "operaciones": [
+            {"nombre": e.nombre, "llamadas": e.llamadas, "total_ms": round(e.total_ms, 3),
+             "minimo_ms": round(e.minimo_ms, 3), "maximo_ms": round(e.maximo_ms, 3),
+             "histograma": e.histograma}
+            for e in estadisticas()
+        ],
+    }
+
+
+def volcar_reporte(ruta: str) -> str:
+    """
+    Escribe el reporte en `ruta` (texto, o JSON si termina en .json). Si hay
+    perfil de cProfile, además guarda `<ruta>.prof` para pstats / snakeviz.
+    """
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        if ruta.lower().endswith(".json"):
+            json.dump(datos_json(), f, ensure_ascii=False, indent=2)
+        else:
+            f.write(reporte())
+    os.replace(temporal, ruta)
+    if _perfil is not None:
+        _tomar_perfil().dump_stats(ruta + ".prof")
+    return ruta
+
+
+def _volcar_al_salir() -> None:
+    if _archivo_salida is None or not _registros:
+        return
+    try:
+        volcar_reporte(_archivo_salida)
+    except OSError as e:
+        print(f"No se pudo escribir la medición de tiempos: {e}", file=sys.stderr)
@@ -8,27 +8,51 @@
 #   python inventario_biosalud.py
 # -----------------------------------------
 
-from datetime import datetime
-from typing import List, Dict, Tuple
-import csv
-import os
+from typing import List, Dict, Iterable, Tuple
+
+from almacen_movimientos import AlmacenMovimientos
+from almacen_sqlite import AlmacenSQLite
+from cantidades import a_centesimas, formatear_cantidad, formatear_valor
+from carga_movimientos import ResultadoCarga
+from catalogo import Catalogo
+import instrumentacion
+from instrumentacion import tramo
+from motor_inventario import MotorInventario, hoy_str
+from resumen_periodos import Acumulado, ResumenPeriodos
+from serie_stock import IndiceSerieStock
+from valorizacion import Valorizacion
 
 # -----------------------------
 # MODELO DE DATOS (SIMPLE)
 # -----------------------------
-# Catálogo base: vector de productos con costo y precio de referencia
-CATALOGO: List[Dict] = [
-    {"id": 1, "nombre": "Faja magnética", "costo": 8990.0, "precio": 17990.0},
-    {"id": 2, "nombre": "Rodillera térmica", "costo": 6990.0, "precio": 14990.0},
-    {"id": 3, "nombre": "Pulsera energética", "costo": 1990.0, "precio": 4990.0},
-]
+# El estado vive en un motor de inventario (ver motor_inventario.py); los
+# nombres de abajo son los mismos objetos, que el motor modifica en su lugar.
+MOTOR: MotorInventario = MotorInventario([
+    {"id": 1, "nombre": "Faja magnética", "costo": a_centesimas(8990), "precio": a_centesimas(17990)},
+    {"id": 2, "nombre": "Rodillera térmica", "costo": a_centesimas(6990), "precio": a_centesimas(14990)},
+    {"id": 3, "nombre": "Pulsera energética", "costo": a_centesimas(1990), "precio": a_centesimas(4990)},
+])
+
+# Catálogo base: vector de productos con costo y precio de referencia (indexado por id)
+CATALOGO: Catalogo = MOTOR.catalogo
 
 # Matriz de movimientos (filas): [fecha ISO, id_producto, entrada, salida]
-MOVIMIENTOS: List[List] = []  # matriz vacía (se irá poblando)
+# Se guarda en columnas compactas (ver almacen_movimientos.py)
+MOVIMIENTOS: AlmacenMovimientos = MOTOR.movimientos  # matriz vacía (se irá poblando)
 # Ej: ["2025-11-17", 1, 10, 0]
 
-# Vector de stock inicial por producto (alineado con CATALOGO por id)
-STOCK_INICIAL: Dict[int, float] = {p["id"]: 0.0 for p in CATALOGO}
+# Vector de stock inicial por producto (alineado con CATALOGO por id), en centésimas
+STOCK_INICIAL: Dict[int, int] = MOTOR.stock_inicial
+
+# Libro de stock: vector id->stock (centésimas) mantenido en cada movimiento (evita recorrer la matriz)
+STOCK_ACTUAL: Dict[int, int] = MOTOR.stock_actual
+
+# Índice temporal (fecha -> stock acumulado) por producto, para funcion_stock_t
+# y consultas de stock en una fecha (ver serie_stock.py)
+INDICE_STOCK: IndiceSerieStock = MOTOR.indice_stock
+
+# Acumulados de entradas/salidas por producto y día / mes (ver resumen_periodos.py)
+RESUMEN_PERIODOS: ResumenPeriodos = MOTOR.resumen_periodos
 
 # -----------------------------
 # FUNCIONES DE NEGOCIO (MATEMÁTICAS)
@@ -36,32 +60,56 @@ STOCK_INICIAL: Dict[int, float] = {p["id"]: 0.0 for p in CATALOGO}
 
 def _hoy_str() -> str:
     """Devuelve fecha en formato ISO (YYYY-MM-DD)."""
-    return datetime.now().strftime("%Y-%m-%d")
+    return hoy_str()
 
 def agregar_movimiento(id_producto: int, entrada: float, salida: float, fecha: str = None) -> None:
     """Agrega una fila a la matriz de movimientos. Usa 2 decimales en cantidades."""
-    if fecha is None:
-        fecha = _hoy_str()
-    MOVIMIENTOS.append([fecha, id_producto, round(float(entrada), 2), round(float(salida), 2)])
+    MOTOR.agregar_movimiento(id_producto, entrada, salida, fecha)
+
+def agregar_movimientos(filas: Iterable[List]) -> ResultadoCarga:
+    """
+    Carga masiva: valida el lote completo contra el stock corriente y registra
+    juntas las filas aceptadas. Devuelve aceptados y rechazos (con su motivo).
+    """
+    return MOTOR.agregar_movimientos(filas)
+
+def cargar_ventas_csv(ruta: str) -> ResultadoCarga:
+    """Carga masiva desde un CSV de ventas (fecha,id_producto,cantidad) o de movimientos."""
+    return MOTOR.cargar_movimientos_csv(ruta)
 
 def matriz_movimientos() -> List[List]:
     """Retorna la matriz completa de movimientos (copia)."""
-    return [fila[:] for fila in MOVIMIENTOS]
+    return [fila[:] for fila in MOTOR.fuente_movimientos()]
 
-def vector_stock_actual() -> Dict[int, float]:
+def reconstruir_stock() -> Dict[int, float]:
     """
-    Devuelve un vector (diccionario id->stock) con el stock actual por producto.
+    Recalcula el libro de stock recorriendo toda la matriz de movimientos.
     Cálculo (sumatoria):
       stock_i = stock_inicial_i + Σ(entradas_i) - Σ(salidas_i)
+    Usar solo tras importar o modificar MOVIMIENTOS directamente.
+    Con base SQLite activa, la sumatoria se hace con una consulta agregada.
+    Devuelve el stock por producto en unidades (STOCK_ACTUAL queda en centésimas).
     """
-    stock = {pid: round(STOCK_INICIAL.get(pid, 0.0), 2) for pid in STOCK_INICIAL}
-    for fecha, pid, ent, sal in MOVIMIENTOS:
-        stock[pid] = round(stock.get(pid, 0.0) + ent - sal, 2)
-    return stock
+    MOTOR.reconstruir_stock()
+    return MOTOR.vector_stock_actual()
+
+def vector_stock_actual() -> Dict[int, float]:
+    """
+    Devuelve un vector (diccionario id->stock) con el stock actual por producto.
+    Se lee del libro de stock, que agregar_movimiento mantiene al día (O(productos)).
+    """
+    return MOTOR.vector_stock_actual()
 
 def stock_de_producto(id_producto: int) -> float:
     """Devuelve el stock actual de un producto específico (2 decimales)."""
-    return round(vector_stock_actual().get(id_producto, 0.0), 2)
+    return MOTOR.stock_de_producto(id_producto)
+
+def valorizacion() -> Valorizacion:
+    """
+    Valoriza todo el catálogo en una sola pasada (ver valorizacion.py):
+    stock, valor a costo, valor de venta y margen por producto, más los totales.
+    """
+    return MOTOR.valorizacion()
 
 def valor_inventario() -> float:
     """
@@ -69,37 +117,38 @@ def valor_inventario() -> float:
     Fórmula (sumatoria):
       Valor = Σ (stock_i * costo_i)
     """
-    stock = vector_stock_actual()
-    total = 0.0
-    for p in CATALOGO:
-        s_i = stock.get(p["id"], 0.0)
-        total += s_i * p["costo"]
-    return round(total, 2)
+    return MOTOR.valor_inventario()
 
 def valor_venta_potencial() -> float:
     """
     Valor de venta potencial si vendiéramos todo el stock al precio de referencia.
       Σ (stock_i * precio_i)
     """
-    stock = vector_stock_actual()
-    total = 0.0
-    for p in CATALOGO:
-        s_i = stock.get(p["id"], 0.0)
-        total += s_i * p["precio"]
-    return round(total, 2)
+    return MOTOR.valor_venta_potencial()
 
-def funcion_stock_t(id_producto: int, movimientos_ordenados: List[List]) -> List[Tuple[str, float]]:
+def funcion_stock_t(id_producto: int, movimientos_ordenados: Iterable[List] = None,
+                    desde: str = None, hasta: str = None) -> List[Tuple[str, float]]:
     """
     Función discreta f(t) = stock acumulado del producto i hasta el tiempo t (por fecha).
     Retorna lista de pares (fecha, stock_acumulado). Útil para mostrar la "función" en la PPT.
+    Sin movimientos_ordenados la serie sale del índice temporal (un punto por día
+    con movimientos del producto, opcionalmente entre desde y hasta); con base
+    SQLite activa, del índice (id_producto, fecha) de la base.
+    Con movimientos_ordenados se recorre esa lista (un punto por movimiento).
     """
-    s = round(STOCK_INICIAL.get(id_producto, 0.0), 2)
-    serie = []
-    for fecha, pid, ent, sal in movimientos_ordenados:
-        if pid == id_producto:
-            s = round(s + ent - sal, 2)
-        serie.append((fecha, s))
-    return serie
+    return MOTOR.funcion_stock_t(id_producto, movimientos_ordenados, desde, hasta)
+
+def stock_en_fecha(id_producto: int, fecha: str) -> float:
+    """Stock del producto al cierre de la fecha ISO (búsqueda binaria en el índice temporal)."""
+    return MOTOR.stock_en_fecha(id_producto, fecha)
+
+def resumen_diario(desde: str = None, hasta: str = None, id_producto: int = None) -> List[Acumulado]:
+    """Entradas, salidas y neto por producto y día en [desde, hasta] (fechas ISO)."""
+    return MOTOR.resumen_diario(desde, hasta, id_producto)
+
+def resumen_mensual(desde: str = None, hasta: str = None, id_producto: int = None) -> List[Acumulado]:
+    """Entradas, salidas y neto por producto y mes en [desde, hasta] ('YYYY-MM')."""
+    return MOTOR.resumen_mensual(desde, hasta, id_producto)
 
 # -----------------------------
 # EXPORTACIÓN DE REPORTE
@@ -107,26 +156,23 @@ def funcion_stock_t(id_producto: int, movimientos_ordenados: List[List]) -> List
 
 def exportar_csv(ruta: str = "reporte_inventario.csv") -> str:
     """Exporta el catálogo, stock y movimientos a un CSV sencillo."""
-    stock = vector_stock_actual()
-    with open(ruta, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["== REPORTE INVENTARIO BIO SALUD NATURAL SpA =="])
-        w.writerow([])
-        w.writerow(["CATALOGO"])
-        w.writerow(["id", "nombre", "costo", "precio", "stock_actual"])
-        for p in CATALOGO:
-            w.writerow([p["id"], p["nombre"], f"{p['costo']:.2f}", f"{p['precio']:.2f}", f"{stock.get(p['id'], 0.0):.2f}"])
-        w.writerow([])
-        w.writerow(["RESUMEN"])
-        w.writerow(["valor_inventario", f"{valor_inventario():.2f}"])
-        w.writerow(["valor_venta_potencial", f"{valor_venta_potencial():.2f}"])
-        w.writerow([])
-        w.writerow(["MOVIMIENTOS"])
-        w.writerow(["fecha", "id_producto", "entrada", "salida"])
-        for fila in MOVIMIENTOS:
-            fecha, pid, ent, sal = fila
-            w.writerow([fecha, pid, f"{ent:.2f}", f"{sal:.2f}"])
-    return os.path.abspath(ruta)
+    return MOTOR.exportar_reporte(ruta)
+
+def importar_csv(ruta: str = "reporte_inventario.csv") -> int:
+    """
+    Carga un reporte generado por exportar_csv (o por la GUI) reemplazando
+    catálogo y movimientos. Devuelve la cantidad de movimientos leídos.
+    Stock y acumulados se toman del punto de control del reporte si corresponde a sus movimientos.
+    """
+    return MOTOR.importar_reporte(ruta)
+
+def usar_sqlite(ruta: str = "inventario.db") -> AlmacenSQLite:
+    """
+    Activa la base SQLite como almacenamiento (ver almacen_sqlite.py).
+    Si la base está vacía se copian el catálogo y los movimientos actuales; si no,
+    se carga su catálogo y el stock sale de una consulta agregada (sin leer la historia).
+    """
+    return MOTOR.usar_sqlite(ruta)
 
 # -----------------------------
 # DEMO RÁPIDA (para la diapositiva 7)
@@ -140,8 +186,13 @@ def demo() -> None:
       - Sumatorias de valor
       - Función stock f(t) de un producto
     """
+    if MOTOR.base_datos is not None:
+        print("La DEMO trabaja en memoria y borraría la historia: no disponible con base SQLite activa.")
+        return
+
     # Limpiar por si se ejecuta varias veces
     MOVIMIENTOS.clear()
+    reconstruir_stock()
 
     # Cargar algunos movimientos de ejemplo
     agregar_movimiento(1, 10, 0)   # +10 fajas
@@ -154,7 +205,7 @@ def demo() -> None:
     print("=== DEMO: Control de Inventario BioSalud Natural SpA ===")
     print("Catálogo:")
     for p in CATALOGO:
-        print(f"  {p['id']:>2} - {p['nombre']:<20}  Costo: ${p['costo']:.2f}  Precio: ${p['precio']:.2f}")
+        print(f"  {p['id']:>2} - {p['nombre']:<20}  Costo: ${formatear_cantidad(p['costo'])}  Precio: ${formatear_cantidad(p['precio'])}")
 
     print("\nMatriz de movimientos (fecha, id, entrada, salida):")
     for fila in matriz_movimientos():
@@ -165,12 +216,12 @@ def demo() -> None:
     for pid, s in stock.items():
         print(f"  {pid}: {s:.2f} unidades")
 
-    print(f"\nValor del inventario (Σ stock_i * costo_i): ${valor_inventario():.2f}")
-    print(f"Valor de venta potencial (Σ stock_i * precio_i): ${valor_venta_potencial():.2f}")
+    val = valorizacion()
+    print(f"\nValor del inventario (Σ stock_i * costo_i): ${formatear_valor(val.total_costo)}")
+    print(f"Valor de venta potencial (Σ stock_i * precio_i): ${formatear_valor(val.total_venta)}")
 
     # Mostrar función stock f(t) para un producto (id=1)
-    movs_ordenados = sorted(MOVIMIENTOS, key=lambda r: r[0])
-    serie = funcion_stock_t(1, movs_ordenados)
+    serie = funcion_stock_t(1)
     print("\nFunción stock f(t) para 'Faja magnética' (pares fecha, stock):")
     for fecha, s in serie:
         print(f"  ({fecha}, {s:.2f})")
@@ -192,12 +243,20 @@ def _mostrar_menu():
     print("5) Ver resumen: valor inventario y venta potencial")
     print("6) Exportar CSV")
     print("7) DEMO rápida (recomendado para PPT)")
+    print("8) Importar CSV")
+    print("9) Usar base de datos SQLite")
+    print("10) Reporte mensual de movimientos")
+    print("11) Cargar ventas desde CSV")
+    estado = "encendida" if instrumentacion.activa() else "apagada"
+    print(f"12) Medición de tiempos ({estado})")
     print("0) Salir")
 
 def _input_float(msg: str) -> float:
     while True:
         try:
-            return round(float(input(msg).strip().replace(',', '.')), 2)
+            valor = float(input(msg).strip().replace(',', '.'))
+            a_centesimas(valor)  # ValueError si no es finito o está fuera de rango
+            return round(valor, 2)
         except ValueError:
             print("Ingrese un número válido (use . o ,).")
 
@@ -208,14 +267,35 @@ def _input_int(msg: str) -> int:
         except ValueError:
             print("Ingrese un entero válido.")
 
+def _menu_tiempos():
+    """Enciende la medición de tiempos o, si ya está encendida, muestra el reporte (ver instrumentacion.py)."""
+    if not instrumentacion.activa():
+        perfil = input("¿Incluir perfil cProfile? (s/N): ").strip().lower() == "s"
+        instrumentacion.activar(con_cprofile=perfil)
+        print("Medición de tiempos encendida.")
+        return
+    print()
+    print(instrumentacion.reporte())
+    ruta = input("Guardar en archivo (.txt o .json, vacío = no): ").strip()
+    if ruta:
+        try:
+            print(f"Medición guardada en: {instrumentacion.volcar_reporte(ruta)}")
+        except OSError as e:
+            print(f"No se pudo guardar: {e}")
+    if input("¿Apagar la medición? (s/N): ").strip().lower() == "s":
+        instrumentacion.desactivar()
+        print("Medición de tiempos apagada.")
+
 def main():
+    instrumentacion.activar_desde_entorno()  # BIOSALUD_PERFIL=1 / cprofile
     while True:
         _mostrar_menu()
         op = input("Opción: ").strip()
         if op == "1":
             print("\nCatálogo:")
-            for p in CATALOGO:
-                print(f"  {p['id']:>2} - {p['nombre']:<20}  Costo: ${p['costo']:.2f}  Precio: ${p['precio']:.2f}")
+            with tramo("consola.ver_catalogo"):
+                for p in CATALOGO:
+                    print(f"  {p['id']:>2} - {p['nombre']:<20}  Costo: ${formatear_cantidad(p['costo'])}  Precio: ${formatear_cantidad(p['precio'])}")
         elif op == "2":
             pid = _input_int("ID producto: ")
             cant = _input_float("Cantidad a ingresar: ")
@@ -230,13 +310,52 @@ def main():
             pid = _input_int("ID producto: ")
             print(f"Stock actual del producto {pid}: {stock_de_producto(pid):.2f} unidades")
         elif op == "5":
-            print(f"Valor inventario: ${valor_inventario():.2f}")
-            print(f"Valor venta potencial: ${valor_venta_potencial():.2f}")
+            val = valorizacion()
+            print(f"Valor inventario: ${formatear_valor(val.total_costo)}")
+            print(f"Valor venta potencial: ${formatear_valor(val.total_venta)}")
         elif op == "6":
             ruta = exportar_csv()
             print(f"CSV exportado en: {ruta}")
         elif op == "7":
             demo()
+        elif op == "8":
+            ruta = input("Ruta del CSV [reporte_inventario.csv]: ").strip() or "reporte_inventario.csv"
+            try:
+                n = importar_csv(ruta)
+                print(f"Importados {len(CATALOGO)} productos y {n} movimientos.")
+            except (OSError, ValueError) as e:
+                print(f"No se pudo leer el archivo: {e}")
+        elif op == "9":
+            ruta = input("Ruta de la base [inventario.db]: ").strip() or "inventario.db"
+            usar_sqlite(ruta)
+            print(f"Base SQLite activa: {ruta} ({len(CATALOGO)} productos)")
+        elif op == "10":
+            desde = input("Desde (YYYY-MM, vacío = inicio): ").strip() or None
+            hasta = input("Hasta (YYYY-MM, vacío = hoy): ").strip() or None
+            try:
+                filas = resumen_mensual(desde, hasta)
+            except ValueError:
+                print("Use meses con formato YYYY-MM (p. ej. 2025-11).")
+                continue
+            print(f"\n{'Mes':<8} {'Producto':<25} {'Entradas':>10} {'Salidas':>10} {'Neto':>10}")
+            with tramo("consola.reporte_mensual"):
+                for a in filas:
+                    nombre = CATALOGO.nombre_de(a.id_producto, f"ID {a.id_producto}")
+                    print(f"{a.periodo:<8} {nombre:<25} {a.entrada:>10.2f} {a.salida:>10.2f} {a.neto:>10.2f}")
+        elif op == "11":
+            ruta = input("Ruta del CSV de ventas: ").strip()
+            try:
+                resultado = cargar_ventas_csv(ruta)
+            except (OSError, ValueError) as e:
+                print(f"No se pudo cargar: {e}")
+                continue
+            print(f"Movimientos registrados: {len(resultado.aceptados)}. Rechazados: {len(resultado.rechazos)}.")
+            for r in resultado.rechazos[:20]:
+                print(f"  Línea {r.linea}: {r.motivo}")
+            if len(resultado.rechazos) > 20:
+                print(f"  ... y {len(resultado.rechazos) - 20} más")
+        elif op == "12":
+            _menu_tiempos()
         elif op == "0":
             print("Saliendo...")
             break
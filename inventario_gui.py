@@ -5,10 +5,23 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict
-import csv
+from typing import Dict
 import os
+import threading
+
+from cantidades import ESCALA, a_centesimas, formatear_cantidad, formatear_pesos
+from carga_movimientos import leer_movimientos_csv
+from diario_movimientos import DiarioMovimientos
+import instrumentacion
+from instrumentacion import cronometrado, tramo
+from motor_inventario import MotorInventario
+from reporte_csv import LecturaCancelada
+from tabla_virtual import TablaVirtual
+
+RETARDO_BUSQUEDA_MS = 150  # pausa al escribir antes de filtrar el catálogo
+
 
 class InventarioApp:
     def __init__(self, root):
@@ -17,11 +30,27 @@ class InventarioApp:
         self.root.geometry("1100x700")
         self.root.configure(bg="#f0f0f0")
         
-        # Datos del sistema
-        self.catalogo: List[Dict] = []
-        self.movimientos: List[List] = []
-        self.stock_inicial: Dict[int, float] = {}
+        # Datos del sistema: catálogo, movimientos, libro de stock y acumulados (ver motor_inventario.py)
+        self.motor = MotorInventario()
+        self._filas_reporte = []  # Acumulados mostrados en la pestaña de reportes
         self.archivo_actual: str = None  # Guardar ruta del archivo importado
+        self._filas_catalogo = []  # Productos mostrados en la tabla (todos o resultado de búsqueda)
+        self._fila_catalogo_de: Dict[int, int] = {}  # id -> fila en la tabla del catálogo
+        self._resaltar_catalogo = False
+        self._busqueda_pendiente = None  # id de root.after de la búsqueda mientras se escribe
+        # Estado del resumen para refrescos parciales (ver _refrescar_movimiento)
+        self._posicion_producto: Dict[int, int] = {}  # id -> posición en catálogo/combo/resumen
+        self._total_costo = 0  # diezmilésimas de peso (ver cantidades.py)
+        self._total_venta = 0
+        self._reportes_desactualizados = False  # la pestaña de reportes se recalcula al mostrarla
+        self.diario: DiarioMovimientos = None  # Diario de movimientos del archivo actual
+        self._pendientes_diario = 0  # movimientos en el diario desde la última compactación
+        
+        # E/S en segundo plano: un solo hilo, así importar, exportar y guardar se ejecutan en orden
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._ocupado = False
+        self._progreso = None  # fracción 0..1 escrita por el hilo de E/S (None = sin avance)
+        self._cancelar_importacion = threading.Event()
         
         # Crear la interfaz
         self._crear_widgets()
@@ -63,9 +92,28 @@ class InventarioApp:
                                   padx=15, pady=8, cursor="hand2")
         btn_actualizar.pack(side=tk.LEFT, padx=5)
         
+        btn_tiempos = tk.Button(frame_botones, text="⏱ Tiempos", 
+                               command=self._ventana_tiempos,
+                               bg="#7f8c8d", fg="white", font=("Arial", 10, "bold"),
+                               padx=15, pady=8, cursor="hand2")
+        btn_tiempos.pack(side=tk.LEFT, padx=5)
+        
+        # Indicador de progreso de importación/exportación (visible solo mientras trabaja)
+        self.frame_progreso = tk.Frame(frame_botones, bg="#f0f0f0")
+        self.label_progreso = tk.Label(self.frame_progreso, text="", bg="#f0f0f0", font=("Arial", 9))
+        self.label_progreso.pack(side=tk.LEFT, padx=5)
+        self.barra_progreso = ttk.Progressbar(self.frame_progreso, length=200, mode="determinate", maximum=100)
+        self.barra_progreso.pack(side=tk.LEFT, padx=5)
+        self.btn_cancelar = tk.Button(self.frame_progreso, text="✖ Cancelar",
+                                      command=self._cancelar_importacion.set,
+                                      bg="#e74c3c", fg="white", font=("Arial", 9, "bold"),
+                                      padx=10, pady=4, cursor="hand2")
+        
         # Frame principal con pestañas
         notebook = ttk.Notebook(self.root)
         notebook.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        notebook.bind("<<NotebookTabChanged>>", lambda e: self._al_cambiar_pestana())
+        self.notebook = notebook
         
         # Pestaña 1: Catálogo
         self.tab_catalogo = tk.Frame(notebook, bg="white")
@@ -81,6 +129,11 @@ class InventarioApp:
         self.tab_resumen = tk.Frame(notebook, bg="white")
         notebook.add(self.tab_resumen, text="💰 Resumen Financiero")
         self._crear_tab_resumen()
+        
+        # Pestaña 4: Reportes por período
+        self.tab_reportes = tk.Frame(notebook, bg="white")
+        notebook.add(self.tab_reportes, text="📅 Reportes")
+        self._crear_tab_reportes()
     
     def _crear_tab_catalogo(self):
         """Crea la pestaña de catálogo"""
@@ -89,13 +142,14 @@ class InventarioApp:
         frame_busqueda = tk.Frame(self.tab_catalogo, bg="white")
         frame_busqueda.pack(fill=tk.X, padx=10, pady=10)
         
-        tk.Label(frame_busqueda, text="🔍 Buscar por ID:", bg="white", font=("Arial", 10, "bold")).pack(side=tk.LEFT, padx=5)
+        tk.Label(frame_busqueda, text="🔍 Buscar:", bg="white", font=("Arial", 10, "bold")).pack(side=tk.LEFT, padx=5)
         
         self.entry_buscar_id = tk.Entry(frame_busqueda, width=30, font=("Arial", 10))
         self.entry_buscar_id.pack(side=tk.LEFT, padx=5)
-        self.entry_buscar_id.bind('<KeyRelease>', lambda e: self._buscar_producto())
+        self.entry_buscar_id.bind('<KeyRelease>', lambda e: self._programar_busqueda())
+        self.entry_buscar_id.bind('<Return>', lambda e: self._buscar_producto())
         
-        tk.Label(frame_busqueda, text="(separa con comas: 1,5,10)", bg="white", font=("Arial", 8), fg="#7f8c8d").pack(side=tk.LEFT, padx=5)
+        tk.Label(frame_busqueda, text="(nombre: \"pul iman\" · IDs separados por comas: 1,5,10)", bg="white", font=("Arial", 8), fg="#7f8c8d").pack(side=tk.LEFT, padx=5)
         
         btn_limpiar = tk.Button(frame_busqueda, text="✖ Limpiar", 
                                command=self._limpiar_busqueda,
@@ -103,33 +157,16 @@ class InventarioApp:
                                padx=10, pady=4, cursor="hand2")
         btn_limpiar.pack(side=tk.LEFT, padx=5)
         
-        # Frame para la tabla
-        frame_tabla = tk.Frame(self.tab_catalogo, bg="white")
-        frame_tabla.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Tabla de productos
-        columnas = ("ID", "Nombre", "Costo", "Precio", "Stock")
-        self.tree_catalogo = ttk.Treeview(frame_tabla, columns=columnas, show="headings", height=15)
-        
-        # Configurar columnas
-        self.tree_catalogo.heading("ID", text="ID")
-        self.tree_catalogo.heading("Nombre", text="Nombre Producto")
-        self.tree_catalogo.heading("Costo", text="Costo ($)")
-        self.tree_catalogo.heading("Precio", text="Precio Venta ($)")
-        self.tree_catalogo.heading("Stock", text="Stock Actual")
-        
-        self.tree_catalogo.column("ID", width=50, anchor=tk.CENTER)
-        self.tree_catalogo.column("Nombre", width=250, anchor=tk.W)
-        self.tree_catalogo.column("Costo", width=120, anchor=tk.E)
-        self.tree_catalogo.column("Precio", width=120, anchor=tk.E)
-        self.tree_catalogo.column("Stock", width=100, anchor=tk.E)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(frame_tabla, orient=tk.VERTICAL, command=self.tree_catalogo.yview)
-        self.tree_catalogo.configure(yscrollcommand=scrollbar.set)
-        
-        self.tree_catalogo.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Tabla de productos (virtualizada: solo crea las filas visibles)
+        self.tree_catalogo = TablaVirtual(self.tab_catalogo, [
+            ("ID", "ID", 50, tk.CENTER),
+            ("Nombre", "Nombre Producto", 250, tk.W),
+            ("Costo", "Costo ($)", 120, tk.E),
+            ("Precio", "Precio Venta ($)", 120, tk.E),
+            ("Stock", "Stock Actual", 100, tk.E),
+        ], height=15)
+        self.tree_catalogo.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tree_catalogo.tag_configure('encontrado', background='#90EE90')
         
         # Frame para botones de gestión
         frame_gestion = tk.Frame(self.tab_catalogo, bg="white")
@@ -188,28 +225,21 @@ class InventarioApp:
                                  padx=15, pady=8, cursor="hand2")
         btn_registrar.grid(row=3, column=0, columnspan=2, pady=10)
         
-        # Tabla de movimientos
-        frame_tabla = tk.Frame(self.tab_movimientos, bg="white")
-        frame_tabla.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        columnas = ("Fecha", "Producto", "Entrada", "Salida")
-        self.tree_movimientos = ttk.Treeview(frame_tabla, columns=columnas, show="headings", height=12)
-        
-        self.tree_movimientos.heading("Fecha", text="Fecha")
-        self.tree_movimientos.heading("Producto", text="Producto")
-        self.tree_movimientos.heading("Entrada", text="Entrada (+)")
-        self.tree_movimientos.heading("Salida", text="Salida (-)")
-        
-        self.tree_movimientos.column("Fecha", width=120, anchor=tk.CENTER)
-        self.tree_movimientos.column("Producto", width=250, anchor=tk.W)
-        self.tree_movimientos.column("Entrada", width=100, anchor=tk.E)
-        self.tree_movimientos.column("Salida", width=100, anchor=tk.E)
-        
-        scrollbar = ttk.Scrollbar(frame_tabla, orient=tk.VERTICAL, command=self.tree_movimientos.yview)
-        self.tree_movimientos.configure(yscrollcommand=scrollbar.set)
-        
-        self.tree_movimientos.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Carga masiva (ventas del día de las cajas)
+        btn_cargar_ventas = tk.Button(frame_registro, text="📥 Cargar ventas (CSV)", 
+                                     command=self._cargar_ventas_csv,
+                                     bg="#16a085", fg="white", font=("Arial", 10, "bold"),
+                                     padx=15, pady=8, cursor="hand2")
+        btn_cargar_ventas.grid(row=3, column=2, padx=10, pady=10)
+        
+        # Tabla de movimientos (virtualizada)
+        self.tree_movimientos = TablaVirtual(self.tab_movimientos, [
+            ("Fecha", "Fecha", 120, tk.CENTER),
+            ("Producto", "Producto", 250, tk.W),
+            ("Entrada", "Entrada (+)", 100, tk.E),
+            ("Salida", "Salida (-)", 100, tk.E),
+        ], height=12)
+        self.tree_movimientos.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
     
     def _crear_tab_resumen(self):
         """Crea la pestaña de resumen financiero"""
@@ -248,6 +278,48 @@ class InventarioApp:
                                  bg="#f8f9fa", relief=tk.FLAT, padx=10, pady=10)
         self.text_stock.pack(fill=tk.BOTH, expand=True)
     
+    def _crear_tab_reportes(self):
+        """Crea la pestaña de reportes por día / mes (desde los acumulados)"""
+        
+        frame_filtros = tk.Frame(self.tab_reportes, bg="white")
+        frame_filtros.pack(fill=tk.X, padx=10, pady=10)
+        
+        tk.Label(frame_filtros, text="Agrupar por:", bg="white", font=("Arial", 10, "bold")).pack(side=tk.LEFT, padx=5)
+        self.combo_periodo = ttk.Combobox(frame_filtros, width=8, state="readonly", values=["Mes", "Día"])
+        self.combo_periodo.current(0)
+        self.combo_periodo.pack(side=tk.LEFT, padx=5)
+        self.combo_periodo.bind("<<ComboboxSelected>>", lambda e: self._actualizar_reportes())
+        
+        tk.Label(frame_filtros, text="Desde:", bg="white", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        self.entry_reporte_desde = tk.Entry(frame_filtros, width=12, font=("Arial", 10))
+        self.entry_reporte_desde.pack(side=tk.LEFT, padx=5)
+        
+        tk.Label(frame_filtros, text="Hasta:", bg="white", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        self.entry_reporte_hasta = tk.Entry(frame_filtros, width=12, font=("Arial", 10))
+        self.entry_reporte_hasta.pack(side=tk.LEFT, padx=5)
+        
+        tk.Label(frame_filtros, text="(YYYY-MM o YYYY-MM-DD)", bg="white", font=("Arial", 8), fg="#7f8c8d").pack(side=tk.LEFT, padx=5)
+        
+        btn_consultar = tk.Button(frame_filtros, text="📅 Consultar",
+                                  command=self._actualizar_reportes,
+                                  bg="#3498db", fg="white", font=("Arial", 9, "bold"),
+                                  padx=10, pady=4, cursor="hand2")
+        btn_consultar.pack(side=tk.LEFT, padx=5)
+        
+        self.tree_reportes = TablaVirtual(self.tab_reportes, [
+            ("Periodo", "Período", 100, tk.CENTER),
+            ("Producto", "Producto", 250, tk.W),
+            ("Entradas", "Entradas (+)", 100, tk.E),
+            ("Salidas", "Salidas (-)", 100, tk.E),
+            ("Neto", "Neto", 100, tk.E),
+            ("Ventas", "Ventas ($)", 120, tk.E),
+        ], height=15)
+        self.tree_reportes.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        self.label_total_reporte = tk.Label(self.tab_reportes, text="", bg="white",
+                                            font=("Arial", 10, "bold"), fg="#2c3e50")
+        self.label_total_reporte.pack(anchor=tk.W, padx=15, pady=(0, 10))
+    
     def _crear_tarjeta(self, parent, titulo, subtitulo, color, columna):
         """Crea una tarjeta de información"""
         frame = tk.Frame(parent, bg=color, relief=tk.RAISED, borderwidth=2)
@@ -271,162 +343,232 @@ class InventarioApp:
         else:
             self.label_utilidad = label_valor
     
+    @cronometrado("gui.actualizar_combo_productos")
     def _actualizar_combo_productos(self):
         """Actualiza el combo de productos"""
-        productos = [f"{p['id']} - {p['nombre']}" for p in self.catalogo]
+        productos = [f"{p['id']} - {p['nombre']}" for p in self.motor.catalogo]
         self.combo_producto['values'] = productos
         if productos:
             self.combo_producto.current(0)
     
+    @cronometrado("gui.actualizar_tablas")
     def _actualizar_tablas(self):
-        """Actualiza todas las tablas y resúmenes"""
+        """Actualiza todas las tablas y resúmenes (reconstrucción completa)"""
         self._actualizar_tabla_catalogo()
         self._actualizar_tabla_movimientos()
         self._actualizar_resumen()
+        self._marcar_reportes()
         self._actualizar_combo_productos()
     
+    @cronometrado("gui.actualizar_tabla_catalogo")
     def _actualizar_tabla_catalogo(self):
         """Actualiza la tabla del catálogo"""
-        # Limpiar tabla
-        for item in self.tree_catalogo.get_children():
-            self.tree_catalogo.delete(item)
-        
-        # Obtener stock actual
-        stock = self._vector_stock_actual()
-        
-        # Llenar tabla
-        for p in self.catalogo:
-            s = stock.get(p['id'], 0.0)
-            self.tree_catalogo.insert("", tk.END, values=(
-                p['id'],
-                p['nombre'],
-                f"${int(round(p['costo'])):,}",
-                f"${int(round(p['precio'])):,}",
-                f"{s:.2f}"
-            ))
+        self._mostrar_en_catalogo(list(self.motor.catalogo), resaltar=False)
+    
+    def _mostrar_en_catalogo(self, productos, resaltar: bool, inicio: int = None):
+        """Define los productos que muestra la tabla del catálogo"""
+        self._filas_catalogo = productos
+        self._fila_catalogo_de = {p['id']: i for i, p in enumerate(productos)}
+        self._resaltar_catalogo = resaltar
+        self.tree_catalogo.configurar(len(productos), self._fila_catalogo, inicio=inicio)
+    
+    def _fila_catalogo(self, i: int):
+        """Valores de la fila i de la tabla del catálogo"""
+        p = self._filas_catalogo[i]
+        s = self.motor.stock_actual.get(p['id'], 0)
+        valores = (
+            p['id'],
+            p['nombre'],
+            formatear_pesos(p['costo'], ESCALA),
+            formatear_pesos(p['precio'], ESCALA),
+            formatear_cantidad(s)
+        )
+        return valores, ('encontrado',) if self._resaltar_catalogo else ()
     
+    @cronometrado("gui.actualizar_tabla_movimientos")
     def _actualizar_tabla_movimientos(self):
         """Actualiza la tabla de movimientos"""
-        # Limpiar tabla
-        for item in self.tree_movimientos.get_children():
-            self.tree_movimientos.delete(item)
-        
-        # Llenar tabla (mostrar más recientes primero)
-        for mov in reversed(self.movimientos):
-            fecha, pid, ent, sal = mov
-            # Buscar nombre del producto
-            nombre = next((p['nombre'] for p in self.catalogo if p['id'] == pid), f"ID {pid}")
-            
-            self.tree_movimientos.insert("", tk.END, values=(
-                fecha,
-                nombre,
-                f"{ent:.2f}" if ent > 0 else "-",
-                f"{sal:.2f}" if sal > 0 else "-"
-            ))
+        self.tree_movimientos.configurar(len(self.motor.movimientos), self._fila_movimiento)
+    
+    def _fila_movimiento(self, i: int):
+        """Valores de la fila i de la tabla de movimientos (más recientes primero)"""
+        fecha, pid, ent, sal = self.motor.movimientos[len(self.motor.movimientos) - 1 - i]
+        valores = (
+            fecha,
+            self.motor.catalogo.nombre_de(pid, f"ID {pid}"),
+            f"{ent:.2f}" if ent > 0 else "-",
+            f"{sal:.2f}" if sal > 0 else "-"
+        )
+        return valores, ()
     
+    @cronometrado("gui.actualizar_resumen")
     def _actualizar_resumen(self):
         """Actualiza el resumen financiero"""
-        valor_inv = self._valor_inventario()
-        valor_venta = self._valor_venta_potencial()
-        utilidad = valor_venta - valor_inv
+        # Una sola pasada calcula totales y valores por producto
+        val = self.motor.valorizacion()
+        self._total_costo = val.total_costo
+        self._total_venta = val.total_venta
+        self._actualizar_etiquetas_resumen()
         
-        self.label_valor_inv.config(text=f"${int(round(valor_inv)):,}")
-        self.label_valor_venta.config(text=f"${int(round(valor_venta)):,}")
-        self.label_utilidad.config(text=f"${int(round(utilidad)):,}")
-        
-        # Actualizar texto de stock
+        # Actualizar texto de stock (se arma completo y se inserta una vez)
         self.text_stock.delete(1.0, tk.END)
-        stock = self._vector_stock_actual()
-        
-        self.text_stock.insert(tk.END, f"{'Producto':<30} {'Stock':>10} {'Valor Inv.':>15} {'Valor Venta':>15}\n")
-        self.text_stock.insert(tk.END, "="*75 + "\n")
-        
-        for p in self.catalogo:
-            s = stock.get(p['id'], 0.0)
-            v_inv = s * p['costo']
-            v_venta = s * p['precio']
-            self.text_stock.insert(tk.END, 
-                f"{p['nombre']:<30} {s:>10.2f} ${int(round(v_inv)):>13,} ${int(round(v_venta)):>13,}\n")
-    
-    # ========== FUNCIONES DE NEGOCIO ==========
-    
-    def _vector_stock_actual(self) -> Dict[int, float]:
-        """Calcula el stock actual por producto"""
-        stock = {pid: round(self.stock_inicial.get(pid, 0.0), 2) for pid in self.stock_inicial}
-        for fecha, pid, ent, sal in self.movimientos:
-            stock[pid] = round(stock.get(pid, 0.0) + ent - sal, 2)
-        return stock
-    
-    def _valor_inventario(self) -> float:
-        """Calcula el valor total del inventario"""
-        stock = self._vector_stock_actual()
-        total = sum(stock.get(p['id'], 0.0) * p['costo'] for p in self.catalogo)
-        return round(total, 2)
-    
-    def _valor_venta_potencial(self) -> float:
-        """Calcula el valor de venta potencial"""
-        stock = self._vector_stock_actual()
-        total = sum(stock.get(p['id'], 0.0) * p['precio'] for p in self.catalogo)
-        return round(total, 2)
+        
+        lineas = [f"{'Producto':<30} {'Stock':>10} {'Valor Inv.':>15} {'Valor Venta':>15}", "="*75]
+        self._posicion_producto = {}
+        for i, p in enumerate(self.motor.catalogo):
+            lineas.append(self._linea_resumen(p))
+            self._posicion_producto[p['id']] = i
+        self.text_stock.insert(tk.END, "\n".join(lineas) + "\n")
+    
+    def _actualizar_etiquetas_resumen(self):
+        """Actualiza las tarjetas con los totales vigentes"""
+        self.label_valor_inv.config(text=formatear_pesos(self._total_costo))
+        self.label_valor_venta.config(text=formatear_pesos(self._total_venta))
+        self.label_utilidad.config(text=formatear_pesos(self._total_venta - self._total_costo))
+    
+    def _marcar_reportes(self):
+        """Los reportes cambiaron: se recalculan ahora si la pestaña está a la vista, si no al mostrarla"""
+        if self.notebook.select() == str(self.tab_reportes):
+            self._actualizar_reportes(avisar=False)
+        else:
+            self._reportes_desactualizados = True
+    
+    def _al_cambiar_pestana(self):
+        if self._reportes_desactualizados and self.notebook.select() == str(self.tab_reportes):
+            self._actualizar_reportes()
+    
+    @cronometrado("gui.actualizar_reportes")
+    def _actualizar_reportes(self, avisar: bool = True):
+        """Consulta los acumulados del período elegido (no recorre los movimientos)"""
+        self._reportes_desactualizados = False
+        desde = self.entry_reporte_desde.get().strip() or None
+        hasta = self.entry_reporte_hasta.get().strip() or None
+        try:
+            if self.combo_periodo.get() == "Día":
+                filas = self.motor.resumen_periodos.por_dia(desde, hasta)
+            else:
+                filas = self.motor.resumen_periodos.por_mes(desde, hasta)
+        except ValueError:
+            if avisar:
+                messagebox.showerror("Error", "Use fechas con formato YYYY-MM o YYYY-MM-DD")
+            return
+        self._filas_reporte = filas
+        self.tree_reportes.configurar(len(filas), self._fila_reporte)
+        
+        # Totales en centésimas: la suma de muchas filas no acumula error
+        entradas = sum(a_centesimas(a.entrada) for a in filas)
+        salidas = [a_centesimas(a.salida) for a in filas]
+        ventas = sum(sal * self.motor.catalogo.obtener(a.id_producto, {}).get('precio', 0)
+                     for a, sal in zip(filas, salidas))
+        self.label_total_reporte.config(
+            text=f"Entradas: {formatear_cantidad(entradas)}   "
+                 f"Salidas: {formatear_cantidad(sum(salidas))}   "
+                 f"Ventas: {formatear_pesos(ventas)}")
+    
+    def _fila_reporte(self, i: int):
+        """Valores de la fila i de la tabla de reportes"""
+        a = self._filas_reporte[i]
+        precio = self.motor.catalogo.obtener(a.id_producto, {}).get('precio', 0)
+        valores = (
+            a.periodo,
+            self.motor.catalogo.nombre_de(a.id_producto, f"ID {a.id_producto}"),
+            f"{a.entrada:.2f}",
+            f"{a.salida:.2f}",
+            f"{a.neto:.2f}",
+            formatear_pesos(a_centesimas(a.salida) * precio)
+        )
+        return valores, ()
+    
+    def _linea_resumen(self, p) -> str:
+        """Línea del detalle de stock de un producto"""
+        s = self.motor.stock_actual.get(p['id'], 0)
+        v_inv = formatear_pesos(s * p['costo'])
+        v_venta = formatear_pesos(s * p['precio'])
+        return f"{p['nombre']:<30} {formatear_cantidad(s):>10} {v_inv:>14} {v_venta:>14}"
+    
+    # ========== REFRESCOS PARCIALES ==========
+    
+    def _reemplazar_linea_resumen(self, p):
+        """Reescribe solo la línea del producto en el detalle de stock"""
+        posicion = self._posicion_producto.get(p['id'])
+        if posicion is None:
+            return
+        linea = posicion + 3  # 2 líneas de encabezado; el widget Text numera desde 1
+        self.text_stock.delete(f"{linea}.0", f"{linea}.end")
+        self.text_stock.insert(f"{linea}.0", self._linea_resumen(p))
+    
+    @cronometrado("gui.refrescar_movimiento")
+    def _refrescar_movimiento(self, pid: int, ent: float, sal: float):
+        """Refresca solo lo afectado por un movimiento nuevo: su fila, la fila del producto y el resumen"""
+        self.tree_movimientos.insertar_al_inicio(1)
+        
+        fila = self._fila_catalogo_de.get(pid)
+        if fila is not None:
+            self.tree_catalogo.actualizar_fila(fila)
+        
+        p = self.motor.catalogo.obtener(pid)
+        if p is not None:
+            neto = a_centesimas(ent) - a_centesimas(sal)
+            self._total_costo += neto * p['costo']
+            self._total_venta += neto * p['precio']
+            self._actualizar_etiquetas_resumen()
+            self._reemplazar_linea_resumen(p)
+        self._marcar_reportes()
+    
+    @cronometrado("gui.refrescar_producto")
+    def _refrescar_producto(self, pid: int, costo_anterior: int, precio_anterior: int):
+        """Refresca solo lo afectado por la edición de un producto"""
+        p = self.motor.catalogo.obtener(pid)
+        s = self.motor.stock_actual.get(pid, 0)
+        self._total_costo += s * (p['costo'] - costo_anterior)
+        self._total_venta += s * (p['precio'] - precio_anterior)
+        self._actualizar_etiquetas_resumen()
+        self._reemplazar_linea_resumen(p)
+        
+        fila = self._fila_catalogo_de.get(pid)
+        if fila is not None:
+            self.tree_catalogo.actualizar_fila(fila)
+        self.tree_movimientos.refrescar()  # el nombre puede aparecer en las filas visibles
+        self._marcar_reportes()  # nombre y ventas (salidas × precio)
+        
+        posicion = self._posicion_producto.get(pid)
+        valores = list(self.combo_producto['values'] or ())
+        if posicion is not None and posicion < len(valores):
+            seleccionado = self.combo_producto.get() == valores[posicion]
+            valores[posicion] = f"{p['id']} - {p['nombre']}"
+            self.combo_producto['values'] = valores
+            if seleccionado:
+                self.combo_producto.current(posicion)
     
     # ========== BÚSQUEDA ==========
     
+    def _programar_busqueda(self):
+        """Búsqueda mientras se escribe: espera una pausa al tipear antes de filtrar"""
+        if self._busqueda_pendiente is not None:
+            self.root.after_cancel(self._busqueda_pendiente)
+        self._busqueda_pendiente = self.root.after(RETARDO_BUSQUEDA_MS, self._buscar_producto)
+    
+    @cronometrado("gui.buscar_producto")
     def _buscar_producto(self):
-        """Busca productos por ID (múltiples IDs separados por comas) y filtra la tabla"""
+        """Busca productos por nombre (prefijos de palabras, sin tildes) o por IDs separados por comas y filtra la tabla"""
+        if self._busqueda_pendiente is not None:
+            self.root.after_cancel(self._busqueda_pendiente)
+            self._busqueda_pendiente = None
         busqueda = self.entry_buscar_id.get().strip()
         
-        # Limpiar tabla
-        for item in self.tree_catalogo.get_children():
-            self.tree_catalogo.delete(item)
-        
-        # Obtener stock actual
-        stock = self._vector_stock_actual()
-        
         # Si no hay búsqueda, mostrar todos
         if not busqueda:
-            for p in self.catalogo:
-                s = stock.get(p['id'], 0.0)
-                self.tree_catalogo.insert("", tk.END, values=(
-                    p['id'],
-                    p['nombre'],
-                    f"${int(round(p['costo'])):,}",
-                    f"${int(round(p['precio'])):,}",
-                    f"{s:.2f}"
-                ))
+            self._actualizar_tabla_catalogo()
             return
         
-        # Procesar múltiples IDs separados por comas
-        ids_buscar = []
-        partes = busqueda.split(',')
-        
-        for parte in partes:
-            try:
-                id_num = int(parte.strip())
-                ids_buscar.append(id_num)
-            except ValueError:
-                continue
-        
-        # Si hay IDs válidos, filtrar y mostrar
-        if ids_buscar:
-            productos_encontrados = 0
-            for p in self.catalogo:
-                if p['id'] in ids_buscar:
-                    s = stock.get(p['id'], 0.0)
-                    self.tree_catalogo.insert("", tk.END, values=(
-                        p['id'],
-                        p['nombre'],
-                        f"${int(round(p['costo'])):,}",
-                        f"${int(round(p['precio'])):,}",
-                        f"{s:.2f}"
-                    ), tags=('encontrado',))
-                    productos_encontrados += 1
-            
-            # Resaltar los productos encontrados
-            if productos_encontrados > 0:
-                self.tree_catalogo.tag_configure('encontrado', background='#90EE90')
+        # Índice de búsqueda del catálogo y resaltar los productos encontrados
+        self._mostrar_en_catalogo(self.motor.catalogo.buscar(busqueda), resaltar=True, inicio=0)
     
     def _limpiar_busqueda(self):
         """Limpia el campo de búsqueda y muestra todos los productos"""
+        if self._busqueda_pendiente is not None:
+            self.root.after_cancel(self._busqueda_pendiente)
+            self._busqueda_pendiente = None
         self.entry_buscar_id.delete(0, tk.END)
         self._actualizar_tabla_catalogo()
     
@@ -442,13 +584,7 @@ class InventarioApp:
         ventana.grab_set()
         
         # Calcular nuevo ID - buscar el primer ID disponible
-        ids_existentes = sorted([p['id'] for p in self.catalogo])
-        nuevo_id = 1
-        for id_actual in ids_existentes:
-            if id_actual == nuevo_id:
-                nuevo_id += 1
-            else:
-                break
+        nuevo_id = self.motor.catalogo.siguiente_id()
         
         # Campos
         tk.Label(ventana, text=f"ID: {nuevo_id}", bg="white", font=("Arial", 10)).pack(pady=10)
@@ -479,13 +615,7 @@ class InventarioApp:
                     messagebox.showerror("Error", "Costo y precio deben ser mayores a 0")
                     return
                 
-                self.catalogo.append({
-                    "id": nuevo_id,
-                    "nombre": nombre,
-                    "costo": round(costo),
-                    "precio": round(precio)
-                })
-                self.stock_inicial[nuevo_id] = 0.0
+                self.motor.agregar_producto(nombre, costo, precio)
                 
                 self._actualizar_tablas()
                 self._guardar_automatico()
@@ -508,7 +638,7 @@ class InventarioApp:
         
         item = self.tree_catalogo.item(seleccion[0])
         pid = int(item['values'][0])
-        producto = next((p for p in self.catalogo if p['id'] == pid), None)
+        producto = self.motor.catalogo.obtener(pid)
         
         if not producto:
             return
@@ -529,12 +659,12 @@ class InventarioApp:
         
         tk.Label(ventana, text="Costo (CLP $):", bg="white", font=("Arial", 10)).pack(pady=5)
         entry_costo = tk.Entry(ventana, width=30, font=("Arial", 10))
-        entry_costo.insert(0, int(round(producto['costo'])))
+        entry_costo.insert(0, formatear_cantidad(producto['costo']))
         entry_costo.pack(pady=5)
         
         tk.Label(ventana, text="Precio de Venta (CLP $):", bg="white", font=("Arial", 10)).pack(pady=5)
         entry_precio = tk.Entry(ventana, width=30, font=("Arial", 10))
-        entry_precio.insert(0, int(round(producto['precio'])))
+        entry_precio.insert(0, formatear_cantidad(producto['precio']))
         entry_precio.pack(pady=5)
         
         def guardar():
@@ -547,11 +677,10 @@ class InventarioApp:
                     messagebox.showerror("Error", "El nombre es obligatorio")
                     return
                 
-                producto['nombre'] = nombre
-                producto['costo'] = round(costo)
-                producto['precio'] = round(precio)
+                costo_anterior, precio_anterior = producto['costo'], producto['precio']
+                self.motor.actualizar_producto(pid, nombre=nombre, costo=costo, precio=precio)
                 
-                self._actualizar_tablas()
+                self._refrescar_producto(pid, costo_anterior, precio_anterior)
                 self._guardar_automatico()
                 messagebox.showinfo("Éxito", "Producto actualizado correctamente")
                 ventana.destroy()
@@ -575,7 +704,7 @@ class InventarioApp:
         nombre = item['values'][1]
         
         # Verificar si tiene movimientos
-        tiene_movimientos = any(mov[1] == pid for mov in self.movimientos)
+        tiene_movimientos = self.motor.tiene_movimientos(pid)
         
         if tiene_movimientos:
             msg = f"El producto '{nombre}' tiene movimientos registrados.\n¿Está seguro de eliminarlo? Los movimientos también se eliminarán."
@@ -583,13 +712,8 @@ class InventarioApp:
             msg = f"¿Está seguro de eliminar el producto '{nombre}'?"
         
         if messagebox.askyesno("Confirmar", msg):
-            # Eliminar producto
-            self.catalogo = [p for p in self.catalogo if p['id'] != pid]
-            # Eliminar movimientos
-            self.movimientos = [m for m in self.movimientos if m[1] != pid]
-            # Eliminar stock inicial
-            if pid in self.stock_inicial:
-                del self.stock_inicial[pid]
+            # Eliminar producto, sus movimientos y su stock
+            self.motor.eliminar_producto(pid)
             
             self._actualizar_tablas()
             self._guardar_automatico()
@@ -605,205 +729,341 @@ class InventarioApp:
             # Extraer ID del producto
             pid = int(self.combo_producto.get().split(' - ')[0])
             cantidad = float(self.entry_cantidad.get().replace(',', '.'))
+            centesimas = a_centesimas(cantidad)  # ValueError si no es finita o está fuera de rango
             
-            if cantidad <= 0:
+            if centesimas <= 0:
                 messagebox.showerror("Error", "La cantidad debe ser mayor a 0")
                 return
             
             fecha = datetime.now().strftime("%Y-%m-%d")
             
             if self.var_tipo.get() == "Entrada":
-                self.movimientos.append([fecha, pid, round(cantidad, 2), 0.0])
+                mov = self.motor.agregar_movimiento(pid, cantidad, 0.0, fecha)
             else:
                 # Verificar stock suficiente
-                stock_actual = self._vector_stock_actual().get(pid, 0.0)
-                if cantidad > stock_actual:
+                stock_actual = self.motor.stock_actual.get(pid, 0)
+                if centesimas > stock_actual:
                     messagebox.showerror("Error", 
-                        f"Stock insuficiente. Disponible: {stock_actual:.2f}")
+                        f"Stock insuficiente. Disponible: {formatear_cantidad(stock_actual)}")
                     return
-                self.movimientos.append([fecha, pid, 0.0, round(cantidad, 2)])
+                mov = self.motor.agregar_movimiento(pid, 0.0, cantidad, fecha)
             
             self.entry_cantidad.delete(0, tk.END)
-            self._actualizar_tablas()
-            self._guardar_automatico()
+            self._refrescar_movimiento(pid, mov[2], mov[3])
+            self._guardar_movimiento(mov)
             messagebox.showinfo("Éxito", "Movimiento registrado correctamente")
             
         except ValueError:
             messagebox.showerror("Error", "Verifique que la cantidad sea un número válido")
     
+    def _cargar_ventas_csv(self):
+        """Carga masiva de movimientos desde un CSV de ventas (validación del lote completo en una pasada)"""
+        if self._ocupado:
+            messagebox.showwarning("Advertencia", "Espere a que termine la operación en curso")
+            return
+        
+        ruta = filedialog.askopenfilename(
+            title="Seleccionar CSV de ventas",
+            filetypes=[("Archivos CSV", "*.csv"), ("Todos los archivos", "*.*")]
+        )
+        
+        if not ruta:
+            return
+        
+        def tarea():
+            with tramo("gui.cargar_ventas.lectura"):
+                return leer_movimientos_csv(ruta)
+        
+        def al_terminar(leido):
+            filas, lineas, rechazos = leido
+            with tramo("gui.cargar_ventas.aplicar"):
+                resultado = self.motor.agregar_movimientos(filas, lineas)
+                rechazos = sorted(rechazos + resultado.rechazos, key=lambda r: r.linea)
+                self._guardar_movimientos(resultado.aceptados)
+                self._actualizar_tablas()
+            
+            mensaje = f"Movimientos registrados: {len(resultado.aceptados)}\nRechazados: {len(rechazos)}"
+            if rechazos:
+                detalle = "\n".join(f"  Línea {r.linea}: {r.motivo}" for r in rechazos[:15])
+                if len(rechazos) > 15:
+                    detalle += f"\n  ... y {len(rechazos) - 15} más"
+                messagebox.showwarning("Carga de ventas", f"{mensaje}\n\n{detalle}")
+            else:
+                messagebox.showinfo("Carga de ventas", mensaje)
+        
+        def al_fallar(e):
+            messagebox.showerror("Error", f"Error al cargar ventas:\n{str(e)}")
+        
+        self._ejecutar_en_segundo_plano(tarea, al_terminar, al_fallar, "Leyendo ventas...")
+    
     def _importar_csv(self):
-        """Importa datos desde un archivo CSV"""
+        """Importa datos desde un archivo CSV (lectura en segundo plano, cancelable)"""
+        if self._ocupado:
+            messagebox.showwarning("Advertencia", "Espere a que termine la operación en curso")
+            return
+        
         ruta = filedialog.askopenfilename(
             title="Seleccionar archivo CSV",
-            filetypes=[("Archivos CSV", "*.csv"), ("Todos los archivos", "*.*")]
+            filetypes=[("Archivos CSV", "*.csv"), ("Instantánea binaria", "*.invb"), ("Todos los archivos", "*.*")]
         )
         
         if not ruta:
             return
         
-        try:
-            with open(ruta, 'r', encoding='utf-8') as f:
-                lineas = f.readlines()
+        self._cancelar_importacion.clear()
+        
+        def tarea():
+            # Hilo de E/S: solo construye objetos nuevos, no toca el estado de la ventana
+            tamano = max(1, os.path.getsize(ruta))
             
-            # Parsear el CSV
-            nuevo_catalogo = []
-            nuevos_movimientos = []
+            def avance(leidos):
+                self._progreso = min(1.0, leidos / tamano)
             
-            seccion = None
-            for linea in lineas:
-                linea = linea.strip()
-                if not linea or linea.startswith('=='):
-                    continue
+            with tramo("gui.importar_csv.lectura"):
+                # Parsear el CSV en una sola pasada (streaming); stock desde el punto de
+                # control del reporte, índice temporal y acumulados se preparan aquí
+                carga = MotorInventario.leer_reporte(ruta, avance, self._cancelar_importacion)
                 
-                if linea == 'CATALOGO':
-                    seccion = 'CATALOGO'
-                    continue
-                elif linea == 'MOVIMIENTOS':
-                    seccion = 'MOVIMIENTOS'
-                    continue
-                elif linea == 'RESUMEN':
-                    seccion = None
-                    continue
+                # Movimientos del diario que aún no se compactaron en el reporte
+                diario = DiarioMovimientos(ruta)
+                pendientes = diario.recuperar(len(carga.movimientos))
+            return carga, diario, pendientes
+        
+        def al_terminar(resultado):
+            carga, diario, pendientes = resultado
+            
+            with tramo("gui.importar_csv.aplicar"):
+                # Actualizar datos
+                self.motor.aplicar_carga(carga, pendientes)
                 
-                if seccion == 'CATALOGO':
-                    if linea.startswith('id,'):
-                        continue
-                    partes = linea.split(',')
-                    if len(partes) >= 4:
-                        try:
-                            nuevo_catalogo.append({
-                                'id': int(partes[0]),
-                                'nombre': partes[1],
-                                'costo': float(partes[2]),
-                                'precio': float(partes[3])
-                            })
-                        except ValueError:
-                            pass
+                # Guardar la ruta del archivo para auto-guardado
+                self.archivo_actual = ruta
+                self._cambiar_diario(diario)
+                self._pendientes_diario = len(pendientes)
                 
-                elif seccion == 'MOVIMIENTOS':
-                    if linea.startswith('fecha,'):
-                        continue
-                    partes = linea.split(',')
-                    if len(partes) >= 4:
-                        try:
-                            nuevos_movimientos.append([
-                                partes[0],
-                                int(partes[1]),
-                                float(partes[2]),
-                                float(partes[3])
-                            ])
-                        except ValueError:
-                            pass
-            
-            # Actualizar datos
-            if nuevo_catalogo:
-                self.catalogo = nuevo_catalogo
-                self.stock_inicial = {p['id']: 0.0 for p in self.catalogo}
-            
-            if nuevos_movimientos:
-                self.movimientos = nuevos_movimientos
-            
-            # Guardar la ruta del archivo para auto-guardado
-            self.archivo_actual = ruta
-            
-            self._actualizar_tablas()
+                self._actualizar_tablas()
             messagebox.showinfo("Éxito", f"Datos importados correctamente desde:\n{ruta}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al importar CSV:\n{str(e)}")
+        
+        def al_fallar(e):
+            if isinstance(e, LecturaCancelada):
+                messagebox.showinfo("Importación cancelada", "No se modificaron los datos.")
+            else:
+                messagebox.showerror("Error", f"Error al importar CSV:\n{str(e)}")
+        
+        self._ejecutar_en_segundo_plano(tarea, al_terminar, al_fallar, "Importando...", cancelable=True)
     
     def _exportar_csv(self):
-        """Exporta datos a un archivo CSV"""
+        """Exporta datos a un archivo CSV (escritura en segundo plano)"""
+        if self._ocupado:
+            messagebox.showwarning("Advertencia", "Espere a que termine la operación en curso")
+            return
+        
         ruta = filedialog.asksaveasfilename(
             title="Guardar archivo CSV",
             defaultextension=".csv",
-            filetypes=[("Archivos CSV", "*.csv"), ("Todos los archivos", "*.*")]
+            filetypes=[("Archivos CSV", "*.csv"), ("Instantánea binaria", "*.invb"), ("Todos los archivos", "*.*")]
         )
         
         if not ruta:
             return
         
-        try:
-            stock = self._vector_stock_actual()
-            
-            with open(ruta, 'w', newline='', encoding='utf-8') as f:
-                w = csv.writer(f)
-                w.writerow(["== REPORTE INVENTARIO BIO SALUD NATURAL SpA =="])
-                w.writerow([])
-                w.writerow(["CATALOGO"])
-                w.writerow(["id", "nombre", "costo", "precio", "stock_actual"])
-                for p in self.catalogo:
-                    w.writerow([p['id'], p['nombre'], f"{p['costo']:.2f}", 
-                               f"{p['precio']:.2f}", f"{stock.get(p['id'], 0.0):.2f}"])
-                
-                w.writerow([])
-                w.writerow(["RESUMEN"])
-                w.writerow(["valor_inventario", f"{self._valor_inventario():.2f}"])
-                w.writerow(["valor_venta_potencial", f"{self._valor_venta_potencial():.2f}"])
-                
-                w.writerow([])
-                w.writerow(["MOVIMIENTOS"])
-                w.writerow(["fecha", "id_producto", "entrada", "salida"])
-                for mov in self.movimientos:
-                    fecha, pid, ent, sal = mov
-                    w.writerow([fecha, pid, f"{ent:.2f}", f"{sal:.2f}"])
-            
+        datos = self.motor.instantanea()
+        
+        def tarea():
+            with tramo("gui.exportar_csv.escritura"):
+                MotorInventario.escribir_instantanea(ruta, datos)
+                diario = DiarioMovimientos(ruta)
+                diario.reiniciar(len(datos[2]))
+            return diario
+        
+        def al_terminar(diario):
             # Establecer este archivo como el archivo actual para auto-guardado
             self.archivo_actual = ruta
-            
+            self._cambiar_diario(diario)
+            self._pendientes_diario = 0
             messagebox.showinfo("Éxito", f"Datos exportados correctamente a:\n{ruta}")
-            
-        except Exception as e:
+        
+        def al_fallar(e):
             messagebox.showerror("Error", f"Error al exportar CSV:\n{str(e)}")
+        
+        self._ejecutar_en_segundo_plano(tarea, al_terminar, al_fallar, "Exportando...")
     
-    def _guardar_automatico(self):
-        """Guarda automáticamente los cambios en el archivo actual"""
+    # ========== MEDICIÓN DE TIEMPOS ==========
+    
+    def _ventana_tiempos(self):
+        """Ventana para encender/apagar la medición de tiempos, verla y guardarla (ver instrumentacion.py)"""
+        ventana = tk.Toplevel(self.root)
+        ventana.title("Medición de tiempos")
+        ventana.geometry("900x500")
+        
+        frame_controles = tk.Frame(ventana)
+        frame_controles.pack(fill=tk.X, padx=10, pady=5)
+        
+        texto = tk.Text(ventana, font=("Courier", 9), wrap=tk.NONE)
+        texto.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        con_cprofile = tk.BooleanVar(value=instrumentacion.perfil_activo())
+        
+        def mostrar():
+            estado = "ENCENDIDA" if instrumentacion.activa() else "apagada"
+            btn_cambiar.config(text="⏸ Apagar" if instrumentacion.activa() else "▶ Encender")
+            texto.delete(1.0, tk.END)
+            texto.insert(tk.END, f"Medición {estado}\n\n" + instrumentacion.reporte())
+        
+        def cambiar():
+            if instrumentacion.activa():
+                instrumentacion.desactivar()
+            else:
+                instrumentacion.activar(con_cprofile=con_cprofile.get())
+            mostrar()
+        
+        def reiniciar():
+            instrumentacion.reiniciar()
+            mostrar()
+        
+        def guardar():
+            ruta = filedialog.asksaveasfilename(
+                parent=ventana,
+                title="Guardar medición de tiempos",
+                defaultextension=".txt",
+                initialfile=instrumentacion.ARCHIVO_POR_DEFECTO,
+                filetypes=[("Texto", "*.txt"), ("JSON", "*.json")]
+            )
+            if not ruta:
+                return
+            try:
+                instrumentacion.volcar_reporte(ruta)
+                messagebox.showinfo("Éxito", f"Medición guardada en:\n{ruta}", parent=ventana)
+            except OSError as e:
+                messagebox.showerror("Error", f"No se pudo guardar:\n{str(e)}", parent=ventana)
+        
+        btn_cambiar = tk.Button(frame_controles, command=cambiar, width=12)
+        btn_cambiar.pack(side=tk.LEFT, padx=5)
+        tk.Checkbutton(frame_controles, text="Incluir perfil cProfile", variable=con_cprofile).pack(side=tk.LEFT, padx=5)
+        tk.Button(frame_controles, text="🔄 Actualizar", command=mostrar).pack(side=tk.LEFT, padx=5)
+        tk.Button(frame_controles, text="🗑 Reiniciar", command=reiniciar).pack(side=tk.LEFT, padx=5)
+        tk.Button(frame_controles, text="💾 Guardar...", command=guardar).pack(side=tk.LEFT, padx=5)
+        mostrar()
+    
+    # ========== E/S EN SEGUNDO PLANO ==========
+    
+    def _ejecutar_en_segundo_plano(self, tarea, al_terminar, al_fallar, mensaje: str, cancelable: bool = False):
+        """Ejecuta tarea() en el hilo de E/S; el resultado vuelve al hilo de Tk mediante root.after"""
+        self._ocupado = True
+        self._progreso = None
+        self.label_progreso.config(text=mensaje)
+        self.barra_progreso['value'] = 0
+        if cancelable:
+            self.btn_cancelar.pack(side=tk.LEFT, padx=5)
+        else:
+            self.btn_cancelar.pack_forget()
+        self.frame_progreso.pack(side=tk.RIGHT, padx=5)
+        
+        futuro = self._executor.submit(tarea)
+        self.root.after(100, self._vigilar_tarea, futuro, al_terminar, al_fallar)
+    
+    def _vigilar_tarea(self, futuro, al_terminar, al_fallar):
+        """Actualiza la barra de progreso y, al terminar la tarea, entrega su resultado"""
+        if not futuro.done():
+            if self._progreso is not None:
+                self.barra_progreso['value'] = self._progreso * 100
+            self.root.after(100, self._vigilar_tarea, futuro, al_terminar, al_fallar)
+            return
+        
+        self.frame_progreso.pack_forget()
+        self._ocupado = False
+        try:
+            resultado = futuro.result()
+        except Exception as e:
+            al_fallar(e)
+            return
+        al_terminar(resultado)
+    
+    def _cambiar_diario(self, diario: DiarioMovimientos):
+        """Asocia un nuevo diario; el anterior se cierra en el hilo de E/S, después de sus escrituras pendientes"""
+        anterior, self.diario = self.diario, diario
+        if anterior is not None:
+            self._executor.submit(anterior.cerrar)
+    
+    def _guardar_movimiento(self, mov):
+        """Guarda un movimiento agregándolo al diario (tiempo constante); compacta al llegar al límite"""
         if not self.archivo_actual:
             return
         
+        self._executor.submit(self._escribir_en_diario, self.diario, mov)
+        self._pendientes_diario += 1
+        if self._pendientes_diario >= self.diario.limite_compactacion:
+            self._guardar_automatico()
+    
+    def _guardar_movimientos(self, filas):
+        """Guarda un lote de movimientos en el diario con una sola escritura; compacta al llegar al límite"""
+        if not self.archivo_actual or not filas:
+            return
+        
+        self._executor.submit(self._escribir_lote_en_diario, self.diario, filas)
+        self._pendientes_diario += len(filas)
+        if self._pendientes_diario >= self.diario.limite_compactacion:
+            self._guardar_automatico()
+    
+    @staticmethod
+    def _escribir_lote_en_diario(diario: DiarioMovimientos, filas):
         try:
-            stock = self._vector_stock_actual()
-            
-            with open(self.archivo_actual, 'w', newline='', encoding='utf-8') as f:
-                w = csv.writer(f)
-                w.writerow(["== REPORTE INVENTARIO BIO SALUD NATURAL SpA =="])
-                w.writerow([])
-                w.writerow(["CATALOGO"])
-                w.writerow(["id", "nombre", "costo", "precio", "stock_actual"])
-                for p in self.catalogo:
-                    w.writerow([p['id'], p['nombre'], f"{p['costo']:.2f}", 
-                               f"{p['precio']:.2f}", f"{stock.get(p['id'], 0.0):.2f}"])
-                
-                w.writerow([])
-                w.writerow(["RESUMEN"])
-                w.writerow(["valor_inventario", f"{self._valor_inventario():.2f}"])
-                w.writerow(["valor_venta_potencial", f"{self._valor_venta_potencial():.2f}"])
-                
-                w.writerow([])
-                w.writerow(["MOVIMIENTOS"])
-                w.writerow(["fecha", "id_producto", "entrada", "salida"])
-                for mov in self.movimientos:
-                    fecha, pid, ent, sal = mov
-                    w.writerow([fecha, pid, f"{ent:.2f}", f"{sal:.2f}"])
+            diario.registrar_lote(filas)
+        except Exception as e:
+            print(f"Error al guardar movimientos en el diario: {e}")
+    
+    @staticmethod
+    def _escribir_en_diario(diario: DiarioMovimientos, mov):
+        try:
+            fecha, pid, ent, sal = mov
+            diario.registrar(fecha, pid, ent, sal)
+        except Exception as e:
+            print(f"Error al guardar movimiento en el diario: {e}")
+    
+    @cronometrado("gui.guardar_automatico")
+    def _guardar_automatico(self):
+        """
+        Guarda automáticamente los cambios en el archivo actual (reporte completo) y vacía el diario.
+        La escritura ocurre en el hilo de E/S; devuelve el Future de la tarea (o None).
+        """
+        if not self.archivo_actual:
+            return None
+        
+        datos = self.motor.instantanea()
+        self._pendientes_diario = 0
+        return self._executor.submit(self._compactar, self.archivo_actual, datos, self.diario)
+    
+    @staticmethod
+    @cronometrado("gui.guardar_automatico.escritura")
+    def _compactar(ruta: str, datos, diario: DiarioMovimientos):
+        try:
+            MotorInventario.escribir_instantanea(ruta, datos)
+            diario.reiniciar(len(datos[2]))
         except Exception as e:
             print(f"Error al guardar automáticamente: {e}")
+            raise
     
     def _cerrar_aplicacion(self):
         """Guarda los datos antes de cerrar la aplicación"""
+        self._cancelar_importacion.set()
         if self.archivo_actual:
             try:
-                self._guardar_automatico()
+                # Esperar a que el hilo de E/S termine de escribir antes de cerrar
+                self._guardar_automatico().result()
                 messagebox.showinfo("Guardado", "Los cambios se guardaron correctamente.")
             except Exception as e:
                 if messagebox.askyesno("Error al guardar", 
                     f"No se pudieron guardar los cambios:\n{str(e)}\n\n¿Desea cerrar de todos modos?"):
+                    self._executor.shutdown(wait=True)
                     self.root.destroy()
                 return
         
+        self._executor.shutdown(wait=True)
         self.root.destroy()
 
 
 def main():
+    instrumentacion.activar_desde_entorno()  # BIOSALUD_PERFIL=1 / cprofile
     root = tk.Tk()
     app = InventarioApp(root)
     root.mainloop()
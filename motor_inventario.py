@@ -0,0 +1,412 @@
+# motor_inventario.py
+# -----------------------------------------
+# Motor de inventario (sin interfaz) - BioSalud Natural SpA
+# Reúne en una clase el estado y la lógica de negocio que usan el menú de
+# consola, la GUI y los procesos por lotes:
+#   catálogo, matriz de movimientos, stock inicial, libro de stock,
+#   índice temporal, acumulados por período, valorización y E/S del reporte.
+# Stock y valores se llevan en enteros (centésimas de unidad y de peso, ver
+# cantidades.py); las consultas públicas devuelven unidades y pesos.
+# No importa tkinter: se puede usar en scripts, servidores y trabajos programados.
+# -----------------------------------------
+
+from array import array
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from almacen_movimientos import AlmacenMovimientos, fecha_a_ordinal
+from almacen_sqlite import AlmacenSQLite
+from cantidades import ESCALA, a_centesimas, a_pesos
+from carga_movimientos import ResultadoCarga, leer_movimientos_csv, validar_lote
+from catalogo import Catalogo
+from instantanea_binaria import (EXTENSION as EXTENSION_BINARIA, InstantaneaBinaria,
+                                 es_instantanea_binaria, escribir_instantanea_binaria)
+from instrumentacion import cronometrado
+from punto_control import carga_desde_punto_control
+from reporte_csv import cargar_reporte, escribir_reporte
+from resumen_periodos import DIA, MES, Acumulado, ResumenPeriodos
+from serie_stock import IndiceSerieStock
+from valorizacion import Valorizacion, valorizar
+
+
+def hoy_str() -> str:
+    """Devuelve fecha en formato ISO (YYYY-MM-DD)."""
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+class CargaReporte(NamedTuple):
+    """
+    Reporte leído y procesado por MotorInventario.leer_reporte, listo para
+    aplicar_carga. Se arma sin tocar el estado del motor (apto para otro hilo).
+    """
+    productos: List[Dict]
+    movimientos: AlmacenMovimientos
+    stock: Optional[Dict[int, int]]  # centésimas; None si el reporte no trae catálogo
+    resumen: ResumenPeriodos
+    indice: IndiceSerieStock
+
+
+class MotorInventario:
+    """
+    Estado y operaciones del inventario.
+    Los contenedores (catalogo, movimientos, stock_inicial, stock_actual) se
+    modifican siempre en su lugar, por lo que se pueden compartir por referencia.
+    stock_inicial, stock_actual, costo y precio están en centésimas (ver cantidades.py).
+    Si hay una base SQLite activa (usar_sqlite), la historia de movimientos vive
+    en la base y `movimientos` queda vacía.
+    """
+
+    def __init__(self, productos: Iterable[Dict] = ()):
+        self.catalogo = Catalogo(productos)
+        self.movimientos = AlmacenMovimientos()
+        self.stock_inicial: Dict[int, int] = {p["id"]: 0 for p in self.catalogo}
+        self.stock_actual: Dict[int, int] = dict(self.stock_inicial)  # libro de stock (centésimas)
+        self.indice_stock = IndiceSerieStock()
+        self.resumen_periodos = ResumenPeriodos()
+        self.base_datos: Optional[AlmacenSQLite] = None
+
+    # ---------- movimientos y stock ----------
+
+    def agregar_movimiento(self, id_producto: int, entrada: float, salida: float,
+                           fecha: str = None) -> List:
+        """
+        Agrega una fila a la matriz de movimientos (2 decimales) y actualiza el
+        libro de stock e índices. Devuelve la fila registrada.
+        """
+        if fecha is None:
+            fecha = hoy_str()
+        ent, sal = a_centesimas(entrada), a_centesimas(salida)
+        if self.base_datos is not None:
+            self.base_datos.agregar_movimiento(fecha, id_producto, ent, sal)
+        else:
+            self._registrar_enteros(fecha_a_ordinal(fecha), id_producto, ent, sal)
+        self.stock_actual[id_producto] = self.stock_actual.get(id_producto, 0) + ent - sal
+        return [fecha, id_producto, ent / ESCALA, sal / ESCALA]
+
+    def _registrar_enteros(self, ordinal: int, id_producto: int, ent: int, sal: int) -> None:
+        self.movimientos.agregar_enteros(ordinal, id_producto, ent, sal)
+        self.indice_stock.registrar_enteros(ordinal, id_producto, ent - sal)
+        self.resumen_periodos.registrar_enteros(ordinal, id_producto, ent, sal)
+
+    def validar_movimientos(self, filas: Iterable[List], lineas: List[int] = None) -> ResultadoCarga:
+        """
+        Valida un lote contra el stock corriente en una pasada (ver carga_movimientos.py)
+        sin modificar el motor.
+        """
+        return validar_lote(filas, self.catalogo, self.stock_actual, lineas, hoy_str())
+
+    def aplicar_movimientos(self, filas: List[List]) -> None:
+        """
+        Registra filas ya validadas [fecha, id, entrada, salida], todas o
+        ninguna: se convierten antes de tocar el motor y una fila inválida
+        lanza ValueError sin registrar nada. Con base SQLite se insertan en
+        una sola transacción.
+        """
+        enteras = [(fecha_a_ordinal(fecha), int(pid), a_centesimas(ent), a_centesimas(sal))
+                   for fecha, pid, ent, sal in filas]
+        try:
+            array('i', (pid for _, pid, _, _ in enteras))  # ids que caben en la columna del almacén
+        except OverflowError as e:
+            raise ValueError(f"Id de producto fuera de rango: {e}") from None
+        if self.base_datos is not None:
+            self.base_datos.agregar_movimientos(filas)
+        stock = self.stock_actual
+        for ordinal, pid, ent, sal in enteras:
+            if self.base_datos is None:
+                self._registrar_enteros(ordinal, pid, ent, sal)
+            stock[pid] = stock.get(pid, 0) + ent - sal
+
+    @cronometrado("motor.agregar_movimientos")
+    def agregar_movimientos(self, filas: Iterable[List], lineas: List[int] = None) -> ResultadoCarga:
+        """
+        Carga masiva: valida todo el lote y registra juntas las filas aceptadas.
+        Devuelve las filas registradas y los rechazos con su motivo.
+        """
+        resultado = self.validar_movimientos(filas, lineas)
+        self.aplicar_movimientos(resultado.aceptados)
+        return resultado
+
+    @cronometrado("motor.cargar_movimientos_csv")
+    def cargar_movimientos_csv(self, ruta: str) -> ResultadoCarga:
+        """Carga masiva desde un CSV de ventas o movimientos (ver carga_movimientos.py)."""
+        filas, lineas, rechazos = leer_movimientos_csv(ruta)
+        resultado = self.agregar_movimientos(filas, lineas)
+        return ResultadoCarga(resultado.aceptados, sorted(rechazos + resultado.rechazos, key=lambda r: r.linea))
+
+    def fuente_movimientos(self) -> Iterable[List]:
+        """Movimientos en orden de registro, desde la base SQLite o desde la matriz."""
+        return self.base_datos.iterar_movimientos() if self.base_datos is not None else self.movimientos
+
+    @cronometrado("motor.reconstruir_stock")
+    def reconstruir_stock(self) -> Dict[int, int]:
+        """
+        Recalcula el libro de stock (centésimas) recorriendo toda la matriz de movimientos.
+          stock_i = stock_inicial_i + Σ(entradas_i) - Σ(salidas_i)
+        Con base SQLite activa, la sumatoria se hace con una consulta agregada.
+        """
+        self.stock_actual.clear()
+        if self.base_datos is not None:
+            self.indice_stock.clear()
+            self.resumen_periodos.clear()
+            self.stock_actual.update(self.base_datos.vector_stock_actual())
+            return self.stock_actual
+        self.stock_actual.update(self.stock_inicial)
+        for pid, neto in self.movimientos.netos_por_producto().items():
+            self.stock_actual[pid] = self.stock_actual.get(pid, 0) + neto
+        self._reconstruir_indices()
+        return self.stock_actual
+
+    def _reconstruir_indices(self) -> None:
+        self.indice_stock.construir(self.movimientos, self.stock_inicial)
+        self.resumen_periodos.construir(self.movimientos)
+
+    def vector_stock_actual(self) -> Dict[int, float]:
+        """Copia del libro de stock en unidades (id -> stock), O(productos)."""
+        return {pid: s / ESCALA for pid, s in self.stock_actual.items()}
+
+    def stock_de_producto(self, id_producto: int) -> float:
+        if self.base_datos is not None:
+            return self.base_datos.stock_de_producto(id_producto)
+        return self.stock_actual.get(id_producto, 0) / ESCALA
+
+    # ---------- valorización ----------
+
+    @cronometrado("motor.valorizacion")
+    def valorizacion(self) -> Valorizacion:
+        """Stock, valor a costo, valor de venta y margen por producto, más los totales (enteros, ver valorizacion.py)."""
+        return valorizar(self.catalogo, self.stock_actual)
+
+    def valor_inventario(self) -> float:
+        """Σ (stock_i * costo_i), en pesos"""
+        return a_pesos(self.valorizacion().total_costo)
+
+    def valor_venta_potencial(self) -> float:
+        """Σ (stock_i * precio_i), en pesos"""
+        return a_pesos(self.valorizacion().total_venta)
+
+    # ---------- series y acumulados ----------
+
+    @cronometrado("motor.funcion_stock_t")
+    def funcion_stock_t(self, id_producto: int, movimientos_ordenados: Iterable[List] = None,
+                        desde: str = None, hasta: str = None) -> List[Tuple[str, float]]:
+        """
+        Pares (fecha, stock acumulado) del producto. Sin movimientos_ordenados sale
+        del índice temporal (un punto por día con movimientos del producto, entre
+        desde y hasta); con movimientos_ordenados, un punto por movimiento de la lista.
+        """
+        if movimientos_ordenados is None:
+            if self.base_datos is not None:
+                serie = self.base_datos.funcion_stock_t(id_producto, desde, hasta)
+            else:
+                serie = self.indice_stock.serie(id_producto, desde, hasta)
+            return serie
+        s = self.stock_inicial.get(id_producto, 0)
+        serie = []
+        for fecha, pid, ent, sal in movimientos_ordenados:
+            if pid == id_producto:
+                s += a_centesimas(ent) - a_centesimas(sal)
+            serie.append((fecha, s / ESCALA))
+        return serie
+
+    def stock_en_fecha(self, id_producto: int, fecha: str) -> float:
+        """Stock del producto al cierre de la fecha ISO."""
+        if self.base_datos is not None:
+            return self.base_datos.stock_en_fecha(id_producto, fecha)
+        return self.indice_stock.stock_en_fecha(id_producto, fecha)
+
+    @cronometrado("motor.resumen_diario")
+    def resumen_diario(self, desde: str = None, hasta: str = None,
+                       id_producto: int = None) -> List[Acumulado]:
+        if self.base_datos is not None:
+            return self.base_datos.acumulados(DIA, desde, hasta, id_producto)
+        return self.resumen_periodos.por_dia(desde, hasta, id_producto)
+
+    @cronometrado("motor.resumen_mensual")
+    def resumen_mensual(self, desde: str = None, hasta: str = None,
+                        id_producto: int = None) -> List[Acumulado]:
+        if self.base_datos is not None:
+            return self.base_datos.acumulados(MES, desde, hasta, id_producto)
+        return self.resumen_periodos.por_mes(desde, hasta, id_producto)
+
+    # ---------- catálogo ----------
+
+    def agregar_producto(self, nombre: str, costo: float, precio: float) -> Dict:
+        """Agrega un producto con el primer id libre (costo y precio en pesos). Devuelve el producto."""
+        producto = {"id": self.catalogo.siguiente_id(), "nombre": nombre,
+                    "costo": a_centesimas(costo), "precio": a_centesimas(precio)}
+        self.catalogo.agregar(producto)
+        if self.base_datos is not None:
+            self.base_datos.agregar_producto(producto)
+        self.stock_inicial[producto["id"]] = 0
+        self.stock_actual.setdefault(producto["id"], 0)
+        return producto
+
+    def actualizar_producto(self, id_producto: int, **campos) -> Dict:
+        """Cambia nombre, costo o precio (en pesos). Devuelve el producto actualizado."""
+        for campo in ("costo", "precio"):
+            if campo in campos:
+                campos[campo] = a_centesimas(campos[campo])
+        self.catalogo.actualizar(id_producto, **campos)
+        if self.base_datos is not None:
+            self.base_datos.actualizar_producto(id_producto, **campos)
+        return self.catalogo.obtener(id_producto)
+
+    def eliminar_producto(self, id_producto: int) -> None:
+        """Elimina el producto y sus movimientos."""
+        self.catalogo.eliminar(id_producto)
+        if self.base_datos is not None:
+            self.base_datos.eliminar_producto(id_producto)
+        self.movimientos.eliminar_producto(id_producto)
+        self.stock_inicial.pop(id_producto, None)
+        self.stock_actual.pop(id_producto, None)
+        self.indice_stock.eliminar_producto(id_producto)
+        self.resumen_periodos.eliminar_producto(id_producto)
+
+    def tiene_movimientos(self, id_producto: int) -> bool:
+        if self.base_datos is not None:
+            return self.base_datos.contiene_producto(id_producto)
+        return self.movimientos.contiene_producto(id_producto)
+
+    # ---------- importación / exportación ----------
+
+    @staticmethod
+    @cronometrado("motor.leer_reporte")
+    def leer_reporte(ruta: str, progreso: Callable[[int], None] = None, cancelar=None) -> CargaReporte:
+        """
+        Lee un reporte y prepara su carga: stock, índice temporal y acumulados por
+        período, tomados del punto de control (más la cola de movimientos que no
+        cubre) o, si no hay uno válido, calculados desde los movimientos.
+        No modifica ningún motor, por lo que puede correr en un hilo de E/S.
+        Acepta también instantáneas binarias (ver instantanea_binaria.py).
+        """
+        if es_instantanea_binaria(ruta):
+            return MotorInventario._leer_instantanea_binaria(ruta)
+        productos, _, movimientos = cargar_reporte(ruta, progreso, cancelar)
+        punto = carga_desde_punto_control(ruta, productos, movimientos) if productos else None
+        for p in productos:
+            p.pop("stock_actual", None)
+        if punto is not None:
+            return CargaReporte(productos, movimientos, *punto)
+        stock = None
+        if productos:  # tras importar el stock inicial es 0
+            stock = {p["id"]: 0 for p in productos}
+            for pid, neto in movimientos.netos_por_producto().items():
+                stock[pid] = stock.get(pid, 0) + neto
+        resumen = ResumenPeriodos()
+        resumen.construir(movimientos)
+        indice = IndiceSerieStock()
+        indice.construir(movimientos)
+        return CargaReporte(productos, movimientos, stock, resumen, indice)
+
+    @staticmethod
+    def _leer_instantanea_binaria(ruta: str) -> CargaReporte:
+        # Columnas copiadas del mmap; stock e índice temporal vienen guardados y
+        # los acumulados se suman desde las filas diarias, no desde cada movimiento
+        with InstantaneaBinaria(ruta) as inst:
+            resumen = ResumenPeriodos()
+            resumen.construir(inst.almacen_diarios())
+            return CargaReporte(inst.productos(), inst.almacen_movimientos(), inst.stock_actual(),
+                                resumen, inst.indice_stock())
+
+    @cronometrado("motor.aplicar_carga")
+    def aplicar_carga(self, carga: CargaReporte, pendientes: Iterable[List] = ()) -> None:
+        """
+        Reemplaza catálogo y movimientos por los de un reporte leído (las secciones
+        vacías del reporte no reemplazan nada) y suma los movimientos pendientes
+        (p. ej. los del diario que aún no se compactaron en el reporte).
+        """
+        if carga.productos:
+            self.catalogo.reemplazar(carga.productos)
+            self.stock_inicial.clear()
+            self.stock_inicial.update({p["id"]: 0 for p in self.catalogo})
+        if carga.movimientos:
+            self.movimientos.reemplazar(carga.movimientos)
+
+        if carga.stock is not None and carga.movimientos:
+            # Stock, acumulados e índice ya calculados al leer: no se recorre la historia otra vez
+            self.stock_actual.clear()
+            self.stock_actual.update(carga.stock)
+            self.resumen_periodos.reemplazar(carga.resumen)
+            self.indice_stock.reemplazar(carga.indice)
+            for fecha, pid, ent, sal in pendientes:
+                self.agregar_movimiento(pid, ent, sal, fecha)
+        else:
+            self.movimientos.extend(pendientes)
+            self.reconstruir_stock()
+
+    @cronometrado("motor.importar_reporte")
+    def importar_reporte(self, ruta: str) -> int:
+        """Carga un reporte CSV. Devuelve la cantidad de movimientos leídos."""
+        if self.base_datos is not None:
+            if es_instantanea_binaria(ruta):
+                with InstantaneaBinaria(ruta) as inst:
+                    n = self.base_datos.importar_filas(inst.productos(), inst.almacen_movimientos())
+            else:
+                n = self.base_datos.importar_reporte(ruta)
+            self._cargar_catalogo_de_base()
+            self.reconstruir_stock()
+            return n
+        carga = self.leer_reporte(ruta)
+        self.aplicar_carga(carga)
+        return len(carga.movimientos)
+
+    @cronometrado("motor.instantanea")
+    def instantanea(self) -> Tuple[List[Dict], Dict[int, int], AlmacenMovimientos,
+                                   ResumenPeriodos, IndiceSerieStock]:
+        """Copia de catálogo, stock, movimientos, acumulados e índice temporal para escribirla en otro hilo."""
+        return ([dict(p) for p in self.catalogo], dict(self.stock_actual), self.movimientos.copia(),
+                self.resumen_periodos.copia(), self.indice_stock.copia())
+
+    @staticmethod
+    @cronometrado("motor.escribir_instantanea")
+    def escribir_instantanea(ruta: str, datos) -> str:
+        """
+        Escribe el reporte completo (catálogo, resumen y movimientos) a partir de una instantánea.
+        Con extensión .invb se escribe la instantánea binaria en lugar del CSV.
+        """
+        productos, stock, movimientos, resumen, indice = datos
+        if ruta.endswith(EXTENSION_BINARIA):
+            return escribir_instantanea_binaria(ruta, productos, stock, movimientos)
+        val = valorizar(productos, stock)
+        return escribir_reporte(ruta, productos, stock, movimientos, val.total_costo, val.total_venta,
+                                resumen, indice)
+
+    @cronometrado("motor.exportar_reporte")
+    def exportar_reporte(self, ruta: str) -> str:
+        """Escribe el reporte CSV (o binario, con extensión .invb) con el estado actual. Devuelve la ruta absoluta."""
+        if ruta.endswith(EXTENSION_BINARIA):
+            return escribir_instantanea_binaria(ruta, self.catalogo, self.stock_actual, self.fuente_movimientos())
+        val = self.valorizacion()
+        return escribir_reporte(ruta, self.catalogo, self.stock_actual, self.fuente_movimientos(),
+                                val.total_costo, val.total_venta, self.resumen_periodos, self.indice_stock)
+
+    # ---------- base SQLite ----------
+
+    def _cargar_catalogo_de_base(self) -> None:
+        self.catalogo.reemplazar(self.base_datos.productos())
+        self.stock_inicial.clear()
+        self.stock_inicial.update(self.base_datos.stock_inicial())
+
+    @cronometrado("motor.usar_sqlite")
+    def usar_sqlite(self, ruta: str = "inventario.db") -> AlmacenSQLite:
+        """
+        Activa la base SQLite como almacenamiento (ver almacen_sqlite.py).
+        Si la base está vacía se copian el catálogo y los movimientos actuales; si no,
+        se carga su catálogo y el stock sale de una consulta agregada.
+        """
+        self.cerrar()
+        self.base_datos = AlmacenSQLite(ruta)
+        if not self.base_datos.productos():
+            for p in self.catalogo:
+                self.base_datos.agregar_producto(p, self.stock_inicial.get(p["id"], 0))
+            self.base_datos.agregar_movimientos(self.movimientos)
+        else:
+            self._cargar_catalogo_de_base()
+        self.movimientos.clear()
+        self.reconstruir_stock()
+        return self.base_datos
+
+    def cerrar(self) -> None:
+        if self.base_datos is not None:
+            self.base_datos.cerrar()
+            self.base_datos = None
@@ -0,0 +1,196 @@
+# punto_control.py
+# -----------------------------------------
+# Puntos de control de carga - BioSalud Natural SpA
+# Junto a cada reporte CSV se guarda "<reporte>.checkpoint" (binario,
+# little-endian) con lo que el motor arma a partir de los primeros N
+# movimientos del reporte, para no recalcularlo al cargar:
+#   encabezado: firma, N, huella de esos N movimientos (CRC32 de sus
+#       columnas), filas de cada bloque y CRC32 del cuerpo
+#   días:    acumulados por (día, producto)  fecha | id | entrada | salida
+#   meses:   acumulados por (mes, producto)  AAAAMM | id | entrada | salida
+#   series:  índice temporal (ver serie_stock.py), ordenado por id y fecha:
+#       id | fecha | Σ netos hasta ese día
+# Al cargar, si la huella coincide con los primeros N movimientos leídos, los
+# acumulados y el índice se toman del archivo y solo se suman los movimientos
+# posteriores a N (la "cola"); el stock es la última suma de cada serie más
+# la cola, y debe coincidir con el stock_actual de cada producto en CATALOGO.
+# Si algo no coincide (reporte editado a mano, generado por otra herramienta,
+# punto de control de otro archivo...) se recalcula todo.
+# -----------------------------------------
+
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from almacen_movimientos import AlmacenMovimientos
+from resumen_periodos import DIA, MES, ResumenPeriodos
+from serie_stock import IndiceSerieStock
+
+EXTENSION = ".checkpoint"
+MAGIA = b"BSCKPT02"
+
+# firma, movimientos cubiertos, huella, filas de días, meses y series, CRC32 del cuerpo
+_ENCABEZADO = struct.Struct("<8sQIIIII")
+
+# Los bloques se guardan con el orden de bytes de la máquina; en una
+# big-endian no se escriben ni se leen (la carga recalcula todo)
+_DISPONIBLE = sys.byteorder == "little"
+
+
+class PuntoControl(NamedTuple):
+    """Contenido de un punto de control válido para los movimientos leídos."""
+    movimientos: int                                 # N: filas del reporte que cubre
+    dias: Tuple[array, array, array, array]          # día, id, entrada, salida
+    meses: Tuple[array, array, array, array]         # AAAAMM, id, entrada, salida
+    series: Tuple[array, array, array]               # id, día, Σ netos
+
+
+def huella(movimientos: AlmacenMovimientos, n: int) -> int:
+    """CRC32 de las columnas de los primeros n movimientos (identifica el prefijo cubierto)."""
+    crc = 0
+    for columna in movimientos.columnas():
+        crc = zlib.crc32(memoryview(columna)[:n], crc)
+    return crc
+
+
+def _columnas(filas: Iterable[Tuple[int, int, int, int]]) -> Tuple[array, array, array, array]:
+    transpuestas = list(zip(*filas)) or [(), (), (), ()]
+    return tuple(array(tipo, c) for tipo, c in zip("iiqq", transpuestas))
+
+
+def borrar_punto_control(ruta_reporte: str) -> None:
+    """Elimina el punto de control del reporte, si existe."""
+    try:
+        os.remove(ruta_reporte + EXTENSION)
+    except FileNotFoundError:
+        pass
+
+
+def escribir_punto_control(ruta_reporte: str, movimientos: AlmacenMovimientos,
+                           resumen: ResumenPeriodos, indice: IndiceSerieStock) -> None:
+    """
+    Guarda los acumulados y el índice temporal de los movimientos del reporte
+    (resumen e índice deben corresponder exactamente a esos movimientos).
+    """
+    if not _DISPONIBLE:
+        borrar_punto_control(ruta_reporte)
+        return
+    dias = _columnas(resumen.filas_enteras(DIA))
+    meses = _columnas(resumen.filas_enteras(MES))
+    series = (array('i'), array('i'), array('q'))
+    for pid, fechas, acumulado in indice.series():
+        series[0].fromlist([pid] * len(fechas))
+        series[1].extend(fechas)
+        series[2].extend(acumulado)
+    cuerpo = b"".join(c.tobytes() for c in dias + meses + series)
+
+    ruta = ruta_reporte + EXTENSION
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(_ENCABEZADO.pack(MAGIA, len(movimientos), huella(movimientos, len(movimientos)),
+                                 len(dias[0]), len(meses[0]), len(series[0]), zlib.crc32(cuerpo)))
+        f.write(cuerpo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+def leer_punto_control(ruta_reporte: str, movimientos: AlmacenMovimientos) -> Optional[PuntoControl]:
+    """
+    Punto de control del reporte si existe, está completo y su huella coincide
+    con los primeros N de `movimientos` (los leídos del reporte); si no, None.
+    """
+    if not _DISPONIBLE:
+        return None
+    try:
+        with open(ruta_reporte + EXTENSION, "rb") as f:
+            datos = f.read()
+    except OSError:
+        return None
+    if len(datos) < _ENCABEZADO.size or not datos.startswith(MAGIA):
+        return None
+    _, n, crc_prefijo, n_dias, n_meses, n_series, crc_cuerpo = _ENCABEZADO.unpack_from(datos)
+    cuerpo = memoryview(datos)[_ENCABEZADO.size:]
+    if len(cuerpo) != 24 * (n_dias + n_meses) + 16 * n_series or zlib.crc32(cuerpo) != crc_cuerpo:
+        return None
+    if n > len(movimientos) or huella(movimientos, n) != crc_prefijo:
+        return None
+
+    columnas = []
+    inicio = 0
+    for tipos, filas in (("iiqq", n_dias), ("iiqq", n_meses), ("iiq", n_series)):
+        for tipo in tipos:
+            columna = array(tipo)
+            fin = inicio + columna.itemsize * filas
+            columna.frombytes(cuerpo[inicio:fin])
+            columnas.append(columna)
+            inicio = fin
+    return PuntoControl(n, tuple(columnas[0:4]), tuple(columnas[4:8]), tuple(columnas[8:11]))
+
+
+def _tramos(series: Tuple[array, array, array]) -> Iterable[Tuple[int, int, int]]:
+    """(id, i, j) de cada producto: sus filas en las series son [i, j)."""
+    ids = series[0]
+    i = 0
+    while i < len(ids):
+        j = bisect_right(ids, ids[i], i)
+        yield ids[i], i, j
+        i = j
+
+
+def _stock(punto: PuntoControl, productos: List[Dict],
+           movimientos: AlmacenMovimientos) -> Optional[Dict[int, int]]:
+    """
+    Stock final (centésimas): última suma de cada serie más los netos de la
+    cola. None si no es el stock_actual que CATALOGO indica para cada producto
+    (el punto de control no corresponde al reporte aunque la huella coincida).
+    """
+    stock = {p["id"]: 0 for p in productos}
+    acumulado = punto.series[2]
+    for pid, _, j in _tramos(punto.series):
+        stock[pid] = acumulado[j - 1]
+    for pid, neto in movimientos.netos_por_producto(punto.movimientos).items():
+        stock[pid] = stock.get(pid, 0) + neto
+    if any(p.get("stock_actual") != stock[p["id"]] for p in productos):
+        return None
+    return stock
+
+
+def stock_desde_punto_control(ruta_reporte: str, productos: List[Dict],
+                              movimientos: AlmacenMovimientos) -> Optional[Dict[int, int]]:
+    """
+    Stock final del reporte (centésimas) desde el punto de control y la cola,
+    sin recorrer toda la historia. productos son los registros de CATALOGO (con
+    su stock_actual) y movimientos el AlmacenMovimientos leído del reporte.
+    None si no hay un punto de control válido para esos movimientos.
+    """
+    punto = leer_punto_control(ruta_reporte, movimientos)
+    return None if punto is None else _stock(punto, productos, movimientos)
+
+
+def carga_desde_punto_control(ruta_reporte: str, productos: List[Dict], movimientos: AlmacenMovimientos
+                              ) -> Optional[Tuple[Dict[int, int], ResumenPeriodos, IndiceSerieStock]]:
+    """
+    (stock, acumulados por período, índice temporal) del reporte: lo que cubre el
+    punto de control sale del archivo y solo la cola se suma movimiento por
+    movimiento. productos son los registros de CATALOGO (con su stock_actual).
+    None si no hay un punto de control válido para esos movimientos.
+    """
+    punto = leer_punto_control(ruta_reporte, movimientos)
+    stock = None if punto is None else _stock(punto, productos, movimientos)
+    if stock is None:
+        return None
+    resumen = ResumenPeriodos()
+    resumen.cargar_filas(zip(*punto.dias), zip(*punto.meses))
+    indice = IndiceSerieStock()
+    _, fechas, acumulado = punto.series
+    for pid, i, j in _tramos(punto.series):
+        indice.agregar_serie(pid, fechas[i:j], acumulado[i:j])
+    for ordinal, pid, ent, sal in movimientos.filas_enteras(punto.movimientos):
+        resumen.registrar_enteros(ordinal, pid, ent, sal)
+        indice.registrar_enteros(ordinal, pid, ent - sal)
+    return stock, resumen, indice
@@ -0,0 +1,202 @@
+# reporte_csv.py
+# -----------------------------------------
+# Lector del reporte CSV por secciones - BioSalud Natural SpA
+# Formato (ver README):
+#   == REPORTE INVENTARIO BIO SALUD NATURAL SpA ==
+#   CATALOGO     -> id,nombre,costo,precio,stock_actual
+#   RESUMEN      -> clave,valor
+#   MOVIMIENTOS  -> fecha,id_producto,entrada,salida
+# Lee el archivo en streaming (una fila a la vez, con el módulo csv), por lo que
+# soporta nombres con comas o comillas y archivos grandes con memoria constante.
+# escribir_reporte genera el mismo formato de forma atómica, junto con su
+# punto de control de carga (ver punto_control.py).
+# -----------------------------------------
+
+import csv
+import os
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from almacen_movimientos import AlmacenMovimientos, fecha_a_ordinal, ordinal_a_fecha
+from cantidades import a_centesimas, formatear_cantidad, formatear_valor
+from punto_control import borrar_punto_control, escribir_punto_control
+from resumen_periodos import ResumenPeriodos
+from serie_stock import IndiceSerieStock
+
+CATALOGO = "CATALOGO"
+RESUMEN = "RESUMEN"
+MOVIMIENTOS = "MOVIMIENTOS"
+SECCIONES = (CATALOGO, RESUMEN, MOVIMIENTOS)
+
+# Encabezados de columnas de cada sección (se saltan al leer)
+_ENCABEZADOS = {"id", "fecha"}
+
+# Cada cuántas líneas se informa el avance y se revisa la cancelación
+_LINEAS_POR_AVISO = 5000
+
+
+class LecturaCancelada(Exception):
+    """La lectura del reporte se canceló (ver parámetro `cancelar` de leer_reporte)."""
+
+
+def _lineas_con_avance(archivo: IO[str], progreso, cancelar) -> Iterator[str]:
+    leidos = 0
+    for n, linea in enumerate(archivo, 1):
+        leidos += len(linea)
+        if n % _LINEAS_POR_AVISO == 0:
+            if cancelar is not None and cancelar.is_set():
+                raise LecturaCancelada()
+            if progreso is not None:
+                progreso(leidos)
+        yield linea
+    if progreso is not None:
+        progreso(leidos)
+
+
+def _registro_catalogo(fila: List[str]) -> Optional[Dict]:
+    if len(fila) < 4:
+        return None
+    try:
+        return {
+            "id": int(fila[0]),
+            "nombre": fila[1],
+            "costo": a_centesimas(fila[2]),
+            "precio": a_centesimas(fila[3]),
+            "stock_actual": a_centesimas(fila[4]) if len(fila) > 4 and fila[4] else None,
+        }
+    except ValueError:
+        return None
+
+
+def _registro_resumen(fila: List[str]) -> Optional[Tuple[str, float]]:
+    if len(fila) < 2:
+        return None
+    try:
+        return fila[0], float(fila[1])
+    except ValueError:
+        return None
+
+
+def _registro_movimiento(fila: List[str]) -> Optional[List]:
+    if len(fila) < 4:
+        return None
+    try:
+        fecha, pid, ent, sal = fila[0].strip(), int(fila[1]), float(fila[2]), float(fila[3])
+        fecha_a_ordinal(fecha)  # fecha ISO válida
+        a_centesimas(ent), a_centesimas(sal)  # cantidades finitas y dentro de rango
+    except ValueError:
+        return None
+    return [fecha, pid, ent, sal]
+
+
+_PARSERS = {
+    CATALOGO: _registro_catalogo,
+    RESUMEN: _registro_resumen,
+    MOVIMIENTOS: _registro_movimiento,
+}
+
+
+def leer_reporte(origen: Union[str, IO[str]], progreso: Callable[[int], None] = None,
+                 cancelar=None) -> Iterator[Tuple[str, object]]:
+    """
+    Generador de registros tipados (seccion, registro) en el orden del archivo:
+      CATALOGO    -> dict con id, nombre, costo, precio y stock_actual (centésimas; stock_actual puede ser None)
+      RESUMEN     -> (clave, valor)
+      MOVIMIENTOS -> [fecha, id_producto, entrada, salida]
+    Las filas que no se pueden convertir (fecha no ISO, cantidades no finitas o
+    fuera de rango...) se omiten.
+    `origen` puede ser una ruta o un archivo de texto ya abierto.
+    progreso(caracteres_leidos) se llama periódicamente; si `cancelar` (p. ej. un
+    threading.Event) está activo, se lanza LecturaCancelada.
+    """
+    if isinstance(origen, str):
+        with open(origen, "r", newline="", encoding="utf-8") as f:
+            yield from leer_reporte(f, progreso, cancelar)
+        return
+
+    if progreso is not None or cancelar is not None:
+        origen = _lineas_con_avance(origen, progreso, cancelar)
+
+    parser = None
+    seccion = None
+    for fila in csv.reader(origen):
+        if not fila or not any(c.strip() for c in fila):
+            continue
+        primera = fila[0].strip()
+        if primera.startswith("=="):
+            continue
+        if len(fila) == 1 and primera in SECCIONES:
+            seccion = primera
+            parser = _PARSERS[seccion]
+            continue
+        if parser is None or primera in _ENCABEZADOS:
+            continue
+        registro = parser(fila)
+        if registro is not None:
+            yield seccion, registro
+
+
+def cargar_reporte(origen: Union[str, IO[str]], progreso: Callable[[int], None] = None,
+                   cancelar=None) -> Tuple[List[Dict], Dict[str, float], AlmacenMovimientos]:
+    """
+    Lee un reporte completo en una pasada.
+    Devuelve (productos, resumen, movimientos) con los movimientos ya en el almacén columnar.
+    """
+    productos: List[Dict] = []
+    resumen: Dict[str, float] = {}
+    movimientos = AlmacenMovimientos()
+    for seccion, registro in leer_reporte(origen, progreso, cancelar):
+        if seccion == MOVIMIENTOS:
+            movimientos.append(registro)
+        elif seccion == CATALOGO:
+            productos.append(registro)
+        else:
+            clave, valor = registro
+            resumen[clave] = valor
+    return productos, resumen, movimientos
+
+
+def escribir_reporte(ruta: str, productos: Iterable[Dict], stock: Dict[int, int],
+                     movimientos: Iterable[List], valor_inventario: int,
+                     valor_venta_potencial: int, resumen: Optional[ResumenPeriodos] = None,
+                     indice: Optional[IndiceSerieStock] = None) -> str:
+    """
+    Escribe el reporte completo (CATALOGO, RESUMEN, MOVIMIENTOS). Stock, costo y
+    precio van en centésimas y los valores del resumen en diezmilésimas de peso
+    (ver cantidades.py).
+    Se escribe a un archivo temporal que reemplaza al destino solo cuando está
+    completo y sincronizado en disco: un corte a mitad de escritura no lo pierde.
+    Si se dan los acumulados y el índice temporal de esos movimientos (en un
+    AlmacenMovimientos) se guardan como punto de control; si no, se borra el anterior.
+    """
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["== REPORTE INVENTARIO BIO SALUD NATURAL SpA =="])
+        w.writerow([])
+        w.writerow([CATALOGO])
+        w.writerow(["id", "nombre", "costo", "precio", "stock_actual"])
+        for p in productos:
+            w.writerow([p["id"], p["nombre"], formatear_cantidad(p["costo"]), formatear_cantidad(p["precio"]),
+                        formatear_cantidad(stock.get(p["id"], 0))])
+        w.writerow([])
+        w.writerow([RESUMEN])
+        w.writerow(["valor_inventario", formatear_valor(valor_inventario)])
+        w.writerow(["valor_venta_potencial", formatear_valor(valor_venta_potencial)])
+        w.writerow([])
+        w.writerow([MOVIMIENTOS])
+        w.writerow(["fecha", "id_producto", "entrada", "salida"])
+        if isinstance(movimientos, AlmacenMovimientos):
+            # Columnas en centésimas: se escriben sin pasar por float
+            for ordinal, pid, ent, sal in movimientos.filas_enteras():
+                w.writerow([ordinal_a_fecha(ordinal), pid, formatear_cantidad(ent), formatear_cantidad(sal)])
+        else:
+            for fecha, pid, ent, sal in movimientos:
+                w.writerow([fecha, pid, f"{ent:.2f}", f"{sal:.2f}"])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+    if isinstance(movimientos, AlmacenMovimientos) and resumen is not None and indice is not None:
+        escribir_punto_control(ruta, movimientos, resumen, indice)
+    else:
+        borrar_punto_control(ruta)
+    return os.path.abspath(ruta)
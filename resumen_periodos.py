@@ -0,0 +1,137 @@
+# resumen_periodos.py
+# -----------------------------------------
+# Acumulados por período - BioSalud Natural SpA
+# Tablas pre-agregadas de movimientos, mantenidas en cada movimiento nuevo:
+#   (producto, día) -> Σ entradas, Σ salidas
+#   (producto, mes) -> Σ entradas, Σ salidas
+# Un reporte mensual se arma con una fila por producto y mes, sin recorrer
+# toda la historia de movimientos. Cantidades en centésimas (punto fijo).
+# -----------------------------------------
+
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from almacen_movimientos import fecha_a_ordinal, ordinal_a_fecha
+from cantidades import ESCALA
+
+DIA = "dia"
+MES = "mes"
+
+
+class Acumulado(NamedTuple):
+    """Totales de un producto en un período ('YYYY-MM-DD' o 'YYYY-MM')."""
+    periodo: str
+    id_producto: int
+    entrada: float
+    salida: float
+
+    @property
+    def neto(self) -> float:
+        return self.entrada - self.salida
+
+
+@lru_cache(maxsize=4096)
+def _mes_de_ordinal(ordinal: int) -> int:
+    d = date.fromordinal(ordinal)
+    return d.year * 100 + d.month
+
+
+def _mes_de_texto(mes: str) -> int:
+    """'YYYY-MM' (o una fecha ISO completa) -> AAAAMM; ValueError si no tiene ese formato."""
+    if len(mes) not in (7, 10) or mes[4] != "-" or not 1 <= int(mes[5:7]) <= 12:
+        raise ValueError(f"Mes inválido: {mes!r} (use YYYY-MM)")
+    return int(mes[0:4]) * 100 + int(mes[5:7])
+
+
+class ResumenPeriodos:
+    """Acumulados por producto y día / producto y mes."""
+
+    def __init__(self):
+        self._por_dia: Dict[Tuple[int, int], List[int]] = {}  # (ordinal, id) -> [entrada, salida]
+        self._por_mes: Dict[Tuple[int, int], List[int]] = {}  # (AAAAMM, id)  -> [entrada, salida]
+
+    def construir(self, movimientos) -> None:
+        """Reconstruye las tablas desde un AlmacenMovimientos."""
+        self.clear()
+        por_dia = self._por_dia
+        for ordinal, pid, ent, sal in movimientos.filas_enteras():
+            totales = por_dia.get((ordinal, pid))
+            if totales is None:
+                por_dia[(ordinal, pid)] = [ent, sal]
+            else:
+                totales[0] += ent
+                totales[1] += sal
+        # Los meses se suman desde los días (muchas menos filas que movimientos)
+        for (ordinal, pid), (ent, sal) in por_dia.items():
+            totales = self._por_mes.setdefault((_mes_de_ordinal(ordinal), pid), [0, 0])
+            totales[0] += ent
+            totales[1] += sal
+
+    def cargar_filas(self, dias: Iterable[Tuple[int, int, int, int]],
+                     meses: Iterable[Tuple[int, int, int, int]]) -> None:
+        """Reemplaza las tablas con filas (período, id, entrada, salida) como las de filas_enteras()."""
+        self._por_dia = {(o, pid): [ent, sal] for o, pid, ent, sal in dias}
+        self._por_mes = {(m, pid): [ent, sal] for m, pid, ent, sal in meses}
+
+    def clear(self) -> None:
+        self._por_dia.clear()
+        self._por_mes.clear()
+
+    def reemplazar(self, otro: "ResumenPeriodos") -> None:
+        """Toma las tablas de otro resumen (p. ej. construido en un hilo de E/S)."""
+        self._por_dia, self._por_mes = otro._por_dia, otro._por_mes
+
+    def copia(self) -> "ResumenPeriodos":
+        """Copia independiente (p. ej. para escribirla en otro hilo)."""
+        nuevo = ResumenPeriodos()
+        nuevo._por_dia = {clave: totales[:] for clave, totales in self._por_dia.items()}
+        nuevo._por_mes = {clave: totales[:] for clave, totales in self._por_mes.items()}
+        return nuevo
+
+    def filas_enteras(self, nivel: str = DIA) -> Iterator[Tuple[int, int, int, int]]:
+        """(período, id, entrada, salida) sin orden; el período es el ordinal del día o AAAAMM."""
+        tabla = self._por_dia if nivel == DIA else self._por_mes
+        return ((periodo, pid, ent, sal) for (periodo, pid), (ent, sal) in tabla.items())
+
+    def registrar_enteros(self, ordinal: int, id_producto: int, ent: int, sal: int) -> None:
+        """Suma un movimiento con fecha ya convertida a ordinal y cantidades en centésimas."""
+        for tabla, clave in ((self._por_dia, (ordinal, id_producto)),
+                             (self._por_mes, (_mes_de_ordinal(ordinal), id_producto))):
+            totales = tabla.setdefault(clave, [0, 0])
+            totales[0] += ent
+            totales[1] += sal
+
+    def eliminar_producto(self, id_producto: int) -> None:
+        for tabla in (self._por_dia, self._por_mes):
+            for clave in [c for c in tabla if c[1] == id_producto]:
+                del tabla[clave]
+
+    # ---------- consultas ----------
+
+    def por_dia(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+                id_producto: Optional[int] = None) -> List[Acumulado]:
+        """Acumulados diarios en [desde, hasta] (fechas ISO), ordenados por fecha e id."""
+        inicio = fecha_a_ordinal(desde) if desde else None
+        fin = fecha_a_ordinal(hasta) if hasta else None
+        filas = self._filtrar(self._por_dia, inicio, fin, id_producto)
+        return [Acumulado(ordinal_a_fecha(o), pid, ent / ESCALA, sal / ESCALA)
+                for (o, pid), (ent, sal) in filas]
+
+    def por_mes(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+                id_producto: Optional[int] = None) -> List[Acumulado]:
+        """Acumulados mensuales en [desde, hasta] ('YYYY-MM'), ordenados por mes e id."""
+        inicio = _mes_de_texto(desde) if desde else None
+        fin = _mes_de_texto(hasta) if hasta else None
+        filas = self._filtrar(self._por_mes, inicio, fin, id_producto)
+        return [Acumulado(f"{m // 100:04d}-{m % 100:02d}", pid, ent / ESCALA, sal / ESCALA)
+                for (m, pid), (ent, sal) in filas]
+
+    @staticmethod
+    def _filtrar(tabla, inicio, fin, id_producto):
+        filas = [(clave, totales) for clave, totales in tabla.items()
+                 if (inicio is None or clave[0] >= inicio)
+                 and (fin is None or clave[0] <= fin)
+                 and (id_producto is None or clave[1] == id_producto)]
+        filas.sort()
+        return filas
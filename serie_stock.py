@@ -0,0 +1,135 @@
+# serie_stock.py
+# -----------------------------------------
+# Índice temporal de stock - BioSalud Natural SpA
+# Por cada producto guarda las fechas con movimientos (ordenadas) y la suma
+# acumulada del neto (entradas - salidas) hasta cada fecha, en centésimas:
+#   fechas[k]     -> ordinal del día
+#   acumulado[k]  -> Σ netos con fecha <= fechas[k]
+# Así "stock del producto X en la fecha D" es una búsqueda binaria (bisect)
+# y la serie entre D1 y D2 es un corte del índice, sin recorrer la historia.
+# -----------------------------------------
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from almacen_movimientos import fecha_a_ordinal, ordinal_a_fecha
+from cantidades import ESCALA
+
+
+class IndiceSerieStock:
+    """
+    Índice (fecha -> stock acumulado) por producto.
+    Se construye una vez desde el almacén de movimientos y se actualiza con
+    registrar_enteros() en cada movimiento nuevo: agregar al final de la serie es O(1);
+    un movimiento con fecha anterior a la última del producto corre sus sumas.
+    """
+
+    def __init__(self):
+        self._fechas: Dict[int, array] = {}
+        self._acumulado: Dict[int, array] = {}
+        self._inicial: Dict[int, int] = {}
+
+    def construir(self, movimientos, stock_inicial: Dict[int, int] = None) -> None:
+        """Reconstruye el índice desde un AlmacenMovimientos (y el stock inicial por producto, en centésimas)."""
+        self.clear()
+        self._inicial.update(stock_inicial or {})
+        netos: Dict[int, Dict[int, int]] = {}
+        for ordinal, pid, ent, sal in movimientos.filas_enteras():
+            por_dia = netos.setdefault(pid, {})
+            por_dia[ordinal] = por_dia.get(ordinal, 0) + ent - sal
+        for pid, por_dia in netos.items():
+            fechas = array('i', sorted(por_dia))
+            acumulado = array('q')
+            total = 0
+            for ordinal in fechas:
+                total += por_dia[ordinal]
+                acumulado.append(total)
+            self._fechas[pid] = fechas
+            self._acumulado[pid] = acumulado
+
+    def agregar_serie(self, id_producto: int, fechas: array, acumulado: array) -> None:
+        """Carga la serie ya calculada de un producto (fechas ordenadas y Σ netos en centésimas)."""
+        self._fechas[id_producto] = fechas
+        self._acumulado[id_producto] = acumulado
+
+    def clear(self) -> None:
+        self._fechas.clear()
+        self._acumulado.clear()
+        self._inicial.clear()
+
+    def reemplazar(self, otro: "IndiceSerieStock") -> None:
+        """Toma las series de otro índice (p. ej. construido en un hilo de E/S)."""
+        self._fechas, self._acumulado, self._inicial = otro._fechas, otro._acumulado, otro._inicial
+
+    def copia(self) -> "IndiceSerieStock":
+        """Copia independiente (copia directa de los buffers de cada serie)."""
+        nuevo = IndiceSerieStock()
+        for pid, fechas in self._fechas.items():
+            nuevo.agregar_serie(pid, array('i', fechas), array('q', self._acumulado[pid]))
+        nuevo._inicial.update(self._inicial)
+        return nuevo
+
+    # ---------- actualización ----------
+
+    def registrar_enteros(self, ordinal: int, id_producto: int, neto: int) -> None:
+        """Suma el neto (centésimas) de un movimiento con fecha ya convertida a ordinal."""
+        fechas = self._fechas.setdefault(id_producto, array('i'))
+        acumulado = self._acumulado.setdefault(id_producto, array('q'))
+
+        if fechas and fechas[-1] == ordinal:
+            acumulado[-1] += neto
+            return
+        if not fechas or fechas[-1] < ordinal:
+            fechas.append(ordinal)
+            acumulado.append((acumulado[-1] if acumulado else 0) + neto)
+            return
+
+        # Movimiento con fecha pasada: insertar el día si falta y correr las sumas siguientes
+        k = bisect_left(fechas, ordinal)
+        if fechas[k] != ordinal:
+            fechas.insert(k, ordinal)
+            acumulado.insert(k, acumulado[k - 1] if k > 0 else 0)
+        for j in range(k, len(acumulado)):
+            acumulado[j] += neto
+
+    def eliminar_producto(self, id_producto: int) -> None:
+        self._fechas.pop(id_producto, None)
+        self._acumulado.pop(id_producto, None)
+        self._inicial.pop(id_producto, None)
+
+    # ---------- consultas ----------
+
+    def _stock_hasta(self, id_producto: int, k: int) -> int:
+        """Stock en centésimas considerando las primeras k fechas del producto."""
+        base = self._inicial.get(id_producto, 0)
+        return base + self._acumulado[id_producto][k - 1] if k > 0 else base
+
+    def stock_en_fecha(self, id_producto: int, fecha: str) -> float:
+        """Stock del producto al cierre de la fecha (incluye sus movimientos)."""
+        fechas = self._fechas.get(id_producto)
+        k = bisect_right(fechas, fecha_a_ordinal(fecha)) if fechas else 0
+        return self._stock_hasta(id_producto, k) / ESCALA
+
+    def serie(self, id_producto: int, desde: Optional[str] = None,
+              hasta: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Pares (fecha, stock al cierre del día) de los días con movimientos del
+        producto, opcionalmente limitados al rango [desde, hasta] (fechas ISO).
+        """
+        fechas = self._fechas.get(id_producto)
+        if not fechas:
+            return []
+        i = bisect_left(fechas, fecha_a_ordinal(desde)) if desde else 0
+        j = bisect_right(fechas, fecha_a_ordinal(hasta)) if hasta else len(fechas)
+        base = self._inicial.get(id_producto, 0)
+        acumulado = self._acumulado[id_producto]
+        return [(ordinal_a_fecha(fechas[k]), (base + acumulado[k]) / ESCALA) for k in range(i, j)]
+
+    def productos(self) -> Iterable[int]:
+        """Ids con movimientos en el índice."""
+        return self._fechas.keys()
+
+    def series(self) -> Iterator[Tuple[int, array, array]]:
+        """(id, fechas, Σ netos) de cada producto, ordenados por id; los buffers no se copian."""
+        return ((pid, self._fechas[pid], self._acumulado[pid]) for pid in sorted(self._fechas))
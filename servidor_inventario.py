@@ -0,0 +1,530 @@
+# servidor_inventario.py
+# -----------------------------------------
+# Servicio HTTP/JSON local del inventario - BioSalud Natural SpA
+# Expone el MotorInventario a varios clientes a la vez (p. ej. las cajas que
+# registran salidas), con el servidor como único dueño del reporte CSV:
+#   - Lecturas concurrentes: se atienden en el bucle asyncio sobre el estado
+#     en memoria, sin esperar a las escrituras en disco.
+#   - Escrituras serializadas con un asyncio.Lock: cada movimiento se valida
+#     (cantidades finitas y dentro de rango), se guarda en el diario
+#     (<reporte>.diario, con fsync en el hilo de E/S) y recién entonces se
+#     aplica al motor; si el motor lo rechaza se quita del diario. Nunca dos
+#     clientes reescriben el CSV.
+#   - Los cambios de catálogo y la compactación del diario reescriben el
+#     reporte completo, igual que el auto-guardado de la GUI.
+# Con --sqlite el almacenamiento es la base SQLite y no se usa diario.
+#
+# Rutas (JSON en cuerpo y respuesta):
+#   GET    /productos?buscar=              catálogo con stock actual (o búsqueda por nombre / ids)
+#   GET    /productos/{id}
+#   POST   /productos                      {"nombre", "costo", "precio"}
+#   PUT    /productos/{id}                 {"nombre"?, "costo"?, "precio"?}
+#   DELETE /productos/{id}                 solo si no tiene movimientos
+#   GET    /stock                          {id: stock}
+#   GET    /stock/{id}?fecha=AAAA-MM-DD    stock actual o al cierre de la fecha
+#   GET    /movimientos?id_producto=&desde=&hasta=&limite=
+#   POST   /movimientos                    {"id_producto", "tipo": "entrada"|"salida", "cantidad", "fecha"?}
+#   POST   /movimientos/lote               {"movimientos": [{...}, ...]}: valida todo el lote
+#                                          y registra juntas las filas aceptadas
+#   GET    /valorizacion                   totales y detalle por producto
+#   GET    /resumen/dia | /resumen/mes?desde=&hasta=&id_producto=
+#   POST   /guardar                        reescribe el reporte y vacía el diario
+#
+# Ejecución:
+#   python servidor_inventario.py Inventario_BioSalud.csv --puerto 8765
+#   python servidor_inventario.py --sqlite inventario.db
+# -----------------------------------------
+
+import argparse
+import asyncio
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http import HTTPStatus
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from cantidades import ESCALA, a_centesimas, a_pesos, a_unidades, formatear_cantidad
+from diario_movimientos import LIMITE_COMPACTACION, DiarioMovimientos
+from motor_inventario import MotorInventario, hoy_str
+
+LIMITE_CUERPO = 1024 * 1024  # bytes máximos del cuerpo de una petición
+
+
+class ErrorHTTP(Exception):
+    """Error que se devuelve al cliente como {"error": mensaje} con el estado dado."""
+
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+
+# -----------------------------
+# PARÁMETROS DE LA PETICIÓN
+# -----------------------------
+
+def _entero(valor, campo: str) -> int:
+    try:
+        return int(valor)
+    except (TypeError, ValueError, OverflowError):
+        raise ErrorHTTP(400, f"'{campo}' debe ser un entero")
+
+
+def _numero(valor, campo: str) -> float:
+    if isinstance(valor, str):
+        valor = valor.replace(",", ".")
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        raise ErrorHTTP(400, f"'{campo}' debe ser un número")
+
+
+def _centesimas(valor, campo: str) -> int:
+    """Cantidad del cuerpo en centésimas; 400 si no es finita o está fuera de rango."""
+    try:
+        return a_centesimas(_numero(valor, campo))
+    except ValueError:
+        raise ErrorHTTP(400, f"'{campo}' no es finita o está fuera de rango")
+
+
+def _fecha(valor, campo: str) -> Optional[str]:
+    if valor is None:
+        return None
+    try:
+        return date.fromisoformat(str(valor)).isoformat()
+    except ValueError:
+        raise ErrorHTTP(400, f"'{campo}' debe ser una fecha AAAA-MM-DD")
+
+
+def _mes(valor, campo: str) -> Optional[str]:
+    if valor is None:
+        return None
+    texto = str(valor)
+    try:
+        return date.fromisoformat(texto + "-01" if len(texto) == 7 else texto).isoformat()[:7]
+    except ValueError:
+        raise ErrorHTTP(400, f"'{campo}' debe ser un mes AAAA-MM")
+
+
+def _consulta(parametros: Dict[str, List[str]], campo: str) -> Optional[str]:
+    valores = parametros.get(campo)
+    return valores[-1] if valores else None
+
+
+# -----------------------------
+# SERVIDOR
+# -----------------------------
+
+class ServidorInventario:
+    """
+    Servicio HTTP/1.1 mínimo (solo biblioteca estándar) sobre un MotorInventario.
+    Todo el estado del motor se toca desde el bucle asyncio; la E/S de disco
+    (diario y reporte) corre en un único hilo, en orden de llegada.
+    """
+
+    def __init__(self, ruta_reporte: Optional[str] = None, ruta_sqlite: Optional[str] = None,
+                 limite_compactacion: int = LIMITE_COMPACTACION):
+        if (ruta_reporte is None) == (ruta_sqlite is None):
+            raise ValueError("Indique un reporte CSV o una base SQLite (solo uno)")
+        self.ruta_reporte = ruta_reporte
+        self.ruta_sqlite = ruta_sqlite
+        self.limite_compactacion = limite_compactacion
+        self.motor = MotorInventario()
+        self.diario: Optional[DiarioMovimientos] = None
+        self._escritura: Optional[asyncio.Lock] = None  # se crea en cargar(), dentro del bucle
+        self._executor = ThreadPoolExecutor(max_workers=1)  # hilo de E/S
+        self._servidor: Optional[asyncio.AbstractServer] = None
+        self._conexiones = set()  # escritores de las conexiones abiertas
+        self._rutas: List[Tuple[str, "re.Pattern", Callable]] = [
+            ("GET", re.compile(r"/productos"), self._listar_productos),
+            ("GET", re.compile(r"/productos/(\d+)"), self._ver_producto),
+            ("POST", re.compile(r"/productos"), self._crear_producto),
+            ("PUT", re.compile(r"/productos/(\d+)"), self._editar_producto),
+            ("DELETE", re.compile(r"/productos/(\d+)"), self._borrar_producto),
+            ("GET", re.compile(r"/stock"), self._ver_stock),
+            ("GET", re.compile(r"/stock/(\d+)"), self._ver_stock_producto),
+            ("GET", re.compile(r"/movimientos"), self._listar_movimientos),
+            ("POST", re.compile(r"/movimientos"), self._registrar_movimiento),
+            ("POST", re.compile(r"/movimientos/lote"), self._registrar_lote),
+            ("GET", re.compile(r"/valorizacion"), self._ver_valorizacion),
+            ("GET", re.compile(r"/resumen/(dia|mes)"), self._ver_resumen),
+            ("POST", re.compile(r"/guardar"), self._guardar),
+        ]
+
+    # ---------- ciclo de vida ----------
+
+    async def _en_hilo_es(self, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, funcion, *args)
+
+    async def cargar(self) -> None:
+        """Carga el reporte (más los movimientos del diario sin compactar) o activa la base SQLite."""
+        self._escritura = asyncio.Lock()
+        if self.ruta_sqlite is not None:
+            self.motor.usar_sqlite(self.ruta_sqlite)
+            return
+        self.diario = DiarioMovimientos(self.ruta_reporte, self.limite_compactacion)
+        if not os.path.exists(self.ruta_reporte):
+            await self._compactar()  # reporte vacío como punto de partida
+            return
+
+        def leer():
+            carga = MotorInventario.leer_reporte(self.ruta_reporte)
+            return carga, self.diario.recuperar(len(carga.movimientos))
+
+        carga, pendientes = await self._en_hilo_es(leer)
+        self.motor.aplicar_carga(carga, pendientes)
+
+    async def iniciar(self, host: str = "127.0.0.1", puerto: int = 8765) -> asyncio.AbstractServer:
+        await self.cargar()
+        self._servidor = await asyncio.start_server(self._atender, host, puerto)
+        return self._servidor
+
+    async def cerrar(self) -> None:
+        """Deja de aceptar conexiones, guarda el reporte completo y libera los recursos."""
+        if self._servidor is not None:
+            self._servidor.close()
+            for escritor in list(self._conexiones):
+                escritor.close()  # conexiones keep-alive inactivas
+            await self._servidor.wait_closed()
+            self._servidor = None
+        async with self._escritura:
+            if self.diario is not None:
+                await self._compactar()
+                await self._en_hilo_es(self.diario.cerrar)
+        self._executor.shutdown(wait=True)
+        self.motor.cerrar()
+
+    # ---------- persistencia ----------
+
+    async def _compactar(self) -> None:
+        """Reescribe el reporte completo y vacía el diario (con el lock de escritura tomado)."""
+        if self.diario is None:
+            return
+        datos = self.motor.instantanea()
+        diario = self.diario
+
+        def escribir():
+            MotorInventario.escribir_instantanea(self.ruta_reporte, datos)
+            diario.reiniciar(len(datos[2]))
+
+        await self._en_hilo_es(escribir)
+
+    async def _deshacer_diario(self) -> None:
+        """Quita del diario lo último registrado si el motor no pudo aplicarlo."""
+        if self.diario is not None:
+            await self._en_hilo_es(self.diario.deshacer_ultimo)
+
+    # ---------- HTTP ----------
+
+    async def _atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        """Atiende las peticiones de una conexión (HTTP/1.1 con keep-alive)."""
+        self._conexiones.add(escritor)
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, objetivo, version = linea.decode("latin-1").split()
+                except ValueError:
+                    await self._responder(escritor, 400, {"error": "Petición mal formada"}, False)
+                    break
+                encabezados = {}
+                while True:
+                    linea = await lector.readline()
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()] = valor.strip()
+
+                conexion = encabezados.get("connection", "").lower()
+                seguir = conexion != "close" if version == "HTTP/1.1" else conexion == "keep-alive"
+                try:
+                    largo = int(encabezados.get("content-length", 0))
+                except ValueError:
+                    await self._responder(escritor, 400, {"error": "Content-Length inválido"}, False)
+                    break
+                try:
+                    if largo < 0 or largo > LIMITE_CUERPO:
+                        raise ErrorHTTP(413, "Cuerpo demasiado grande")
+                    cuerpo = await lector.readexactly(largo) if largo else b""
+                    estado, respuesta = await self._despachar(metodo.upper(), objetivo, cuerpo)
+                except ErrorHTTP as e:
+                    estado, respuesta = e.estado, {"error": e.mensaje}
+                    seguir = seguir and e.estado != 413
+                except Exception as e:
+                    estado, respuesta = 500, {"error": str(e)}
+                await self._responder(escritor, estado, respuesta, seguir)
+                if not seguir:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._conexiones.discard(escritor)
+            escritor.close()
+
+    @staticmethod
+    async def _responder(escritor: asyncio.StreamWriter, estado: int, objeto, seguir: bool) -> None:
+        cuerpo = json.dumps(objeto, ensure_ascii=False).encode("utf-8")
+        encabezado = (f"HTTP/1.1 {estado} {HTTPStatus(estado).phrase}\r\n"
+                      "Content-Type: application/json; charset=utf-8\r\n"
+                      f"Content-Length: {len(cuerpo)}\r\n"
+                      f"Connection: {'keep-alive' if seguir else 'close'}\r\n\r\n")
+        escritor.write(encabezado.encode("latin-1") + cuerpo)
+        await escritor.drain()
+
+    async def _despachar(self, metodo: str, objetivo: str, cuerpo: bytes):
+        partes = urlsplit(objetivo)
+        ruta = partes.path.rstrip("/") or "/"
+        parametros = parse_qs(partes.query)
+        metodos_validos = False
+        for metodo_ruta, patron, manejador in self._rutas:
+            coincidencia = patron.fullmatch(ruta)
+            if coincidencia is None:
+                continue
+            metodos_validos = True
+            if metodo_ruta != metodo:
+                continue
+            datos = None
+            if metodo in ("POST", "PUT"):
+                try:
+                    datos = json.loads(cuerpo.decode("utf-8")) if cuerpo else {}
+                except (UnicodeDecodeError, ValueError):
+                    raise ErrorHTTP(400, "El cuerpo debe ser JSON")
+                if not isinstance(datos, dict):
+                    raise ErrorHTTP(400, "El cuerpo debe ser un objeto JSON")
+            return await manejador(*coincidencia.groups(), parametros=parametros, datos=datos)
+        if metodos_validos:
+            raise ErrorHTTP(405, f"Método {metodo} no permitido en {ruta}")
+        raise ErrorHTTP(404, f"Ruta no encontrada: {ruta}")
+
+    # ---------- lecturas ----------
+
+    def _producto(self, pid: str) -> Dict:
+        producto = self.motor.catalogo.obtener(int(pid))
+        if producto is None:
+            raise ErrorHTTP(404, f"Producto {pid} no existe")
+        return producto
+
+    def _con_stock(self, producto: Dict) -> Dict:
+        fila = dict(producto, costo=a_unidades(producto["costo"]), precio=a_unidades(producto["precio"]))
+        fila["stock"] = a_unidades(self.motor.stock_actual.get(producto["id"], 0))
+        return fila
+
+    async def _listar_productos(self, parametros, datos):
+        buscar = _consulta(parametros, "buscar")
+        productos = self.motor.catalogo if buscar is None else self.motor.catalogo.buscar(buscar)
+        return 200, [self._con_stock(p) for p in productos]
+
+    async def _ver_producto(self, pid, parametros, datos):
+        return 200, self._con_stock(self._producto(pid))
+
+    async def _ver_stock(self, parametros, datos):
+        return 200, {str(pid): s for pid, s in self.motor.vector_stock_actual().items()}
+
+    async def _ver_stock_producto(self, pid, parametros, datos):
+        producto = self._producto(pid)
+        fecha = _fecha(_consulta(parametros, "fecha"), "fecha")
+        if fecha is None:
+            stock = self.motor.stock_de_producto(producto["id"])
+        else:
+            stock = self.motor.stock_en_fecha(producto["id"], fecha)
+        return 200, {"id_producto": producto["id"], "fecha": fecha, "stock": stock}
+
+    async def _listar_movimientos(self, parametros, datos):
+        """Últimos `limite` movimientos (100 por defecto) que cumplen los filtros, en orden de registro."""
+        pid = _consulta(parametros, "id_producto")
+        pid = None if pid is None else _entero(pid, "id_producto")
+        desde = _fecha(_consulta(parametros, "desde"), "desde")
+        hasta = _fecha(_consulta(parametros, "hasta"), "hasta")
+        limite = _consulta(parametros, "limite")
+        limite = 100 if limite is None else _entero(limite, "limite")
+        filas = [{"fecha": f, "id_producto": p, "entrada": e, "salida": s}
+                 for f, p, e, s in self.motor.fuente_movimientos()
+                 if (pid is None or p == pid)
+                 and (desde is None or f >= desde) and (hasta is None or f <= hasta)]
+        return 200, {"total": len(filas), "movimientos": filas[-limite:] if limite > 0 else []}
+
+    async def _ver_valorizacion(self, parametros, datos):
+        val = self.motor.valorizacion()
+        # Stock en centésimas y valores en diezmilésimas de peso (ver valorizacion.py)
+        detalle = [{"id_producto": pid, "stock": a_unidades(s), "valor_costo": a_pesos(vc),
+                    "valor_venta": a_pesos(vv), "margen": a_pesos(m)}
+                   for pid, s, vc, vv, m in zip(val.ids, val.stock, val.valor_costo,
+                                                val.valor_venta, val.margen)]
+        return 200, {"valor_inventario": a_pesos(val.total_costo),
+                     "valor_venta_potencial": a_pesos(val.total_venta),
+                     "utilidad_potencial": a_pesos(val.total_margen),
+                     "productos": detalle}
+
+    async def _ver_resumen(self, nivel, parametros, datos):
+        pid = _consulta(parametros, "id_producto")
+        pid = None if pid is None else _entero(pid, "id_producto")
+        periodo = _fecha if nivel == "dia" else _mes
+        desde = periodo(_consulta(parametros, "desde"), "desde")
+        hasta = periodo(_consulta(parametros, "hasta"), "hasta")
+        consulta = self.motor.resumen_diario if nivel == "dia" else self.motor.resumen_mensual
+        return 200, [{"periodo": a.periodo, "id_producto": a.id_producto, "entrada": a.entrada,
+                      "salida": a.salida, "neto": a.neto}
+                     for a in consulta(desde, hasta, pid)]
+
+    # ---------- escrituras (serializadas) ----------
+
+    async def _registrar_movimiento(self, parametros, datos):
+        pid = _entero(datos.get("id_producto"), "id_producto")
+        tipo = str(datos.get("tipo", "")).lower()
+        if tipo not in ("entrada", "salida"):
+            raise ErrorHTTP(400, "'tipo' debe ser 'entrada' o 'salida'")
+        cantidad = _centesimas(datos.get("cantidad"), "cantidad")
+        if cantidad <= 0:
+            raise ErrorHTTP(400, "La cantidad debe ser mayor a 0")
+        fecha = _fecha(datos.get("fecha"), "fecha")
+        entrada, salida = (cantidad, 0) if tipo == "entrada" else (0, cantidad)
+
+        async with self._escritura:
+            # Validación, diario y motor dentro del lock: dos cajas no pueden
+            # vender el mismo stock ni intercalar escrituras en el archivo
+            self._producto(pid)
+            if salida > 0:
+                disponible = self.motor.stock_actual.get(pid, 0)
+                if salida > disponible:
+                    raise ErrorHTTP(409, f"Stock insuficiente. Disponible: {formatear_cantidad(disponible)}")
+            fecha = fecha or hoy_str()
+            entrada, salida = entrada / ESCALA, salida / ESCALA
+            compactar = False
+            if self.diario is not None:
+                compactar = await self._en_hilo_es(self.diario.registrar, fecha, pid, entrada, salida)
+            try:
+                mov = self.motor.agregar_movimiento(pid, entrada, salida, fecha)
+            except Exception:
+                await self._deshacer_diario()
+                raise
+            if compactar:
+                await self._compactar()
+            stock = self.motor.stock_de_producto(pid)
+        fecha, pid, entrada, salida = mov
+        return 201, {"fecha": fecha, "id_producto": pid, "entrada": entrada,
+                     "salida": salida, "stock": stock}
+
+    async def _registrar_lote(self, parametros, datos):
+        """
+        Carga masiva (p. ej. ventas del día). Cada elemento usa el mismo formato que
+        POST /movimientos o bien {"id_producto", "entrada", "salida", "fecha"?}.
+        Responde las filas registradas y los rechazos (posición desde 1 y motivo).
+        """
+        movimientos = datos.get("movimientos")
+        if not isinstance(movimientos, list):
+            raise ErrorHTTP(400, "'movimientos' debe ser una lista")
+        filas = []
+        for m in movimientos:
+            if not isinstance(m, dict):
+                filas.append([None, None, None, None])  # se rechaza al validar
+            elif "tipo" in m:
+                cantidad, tipo = m.get("cantidad"), str(m.get("tipo")).lower()
+                filas.append([m.get("fecha"), m.get("id_producto"),
+                              cantidad if tipo == "entrada" else 0.0,
+                              cantidad if tipo == "salida" else 0.0])
+            else:
+                filas.append([m.get("fecha"), m.get("id_producto"), m.get("entrada", 0.0), m.get("salida", 0.0)])
+
+        async with self._escritura:
+            resultado = self.motor.validar_movimientos(filas)
+            compactar = False
+            if self.diario is not None and resultado.aceptados:
+                compactar = await self._en_hilo_es(self.diario.registrar_lote, resultado.aceptados)
+            try:
+                self.motor.aplicar_movimientos(resultado.aceptados)  # todo o nada
+            except Exception:
+                await self._deshacer_diario()
+                raise
+            if compactar:
+                await self._compactar()
+            tocados = {pid for _, pid, _, _ in resultado.aceptados}
+            stock = {str(pid): self.motor.stock_de_producto(pid) for pid in sorted(tocados)}
+        return 200, {"aceptados": len(resultado.aceptados),
+                     "rechazos": [{"posicion": r.linea, "motivo": r.motivo} for r in resultado.rechazos],
+                     "stock": stock}
+
+    def _campos_producto(self, datos: Dict, obligatorios: bool) -> Dict:
+        campos = {}
+        if "nombre" in datos or obligatorios:
+            nombre = str(datos.get("nombre") or "").strip()
+            if not nombre:
+                raise ErrorHTTP(400, "El nombre no puede estar vacío")
+            campos["nombre"] = nombre
+        for campo in ("costo", "precio"):
+            if campo in datos or obligatorios:
+                valor = _numero(datos.get(campo), campo)  # pesos; el motor lo guarda en centésimas
+                if valor < 0:
+                    raise ErrorHTTP(400, f"'{campo}' no puede ser negativo")
+                campos[campo] = valor
+        return campos
+
+    async def _crear_producto(self, parametros, datos):
+        campos = self._campos_producto(datos, obligatorios=True)
+        async with self._escritura:
+            producto = self.motor.agregar_producto(campos["nombre"], campos["costo"], campos["precio"])
+            await self._compactar()
+            return 201, self._con_stock(producto)
+
+    async def _editar_producto(self, pid, parametros, datos):
+        campos = self._campos_producto(datos, obligatorios=False)
+        async with self._escritura:
+            self._producto(pid)
+            producto = self.motor.actualizar_producto(int(pid), **campos)
+            await self._compactar()
+            return 200, self._con_stock(producto)
+
+    async def _borrar_producto(self, pid, parametros, datos):
+        async with self._escritura:
+            producto = self._producto(pid)
+            if self.motor.tiene_movimientos(producto["id"]):
+                raise ErrorHTTP(409, "El producto tiene movimientos registrados")
+            self.motor.eliminar_producto(producto["id"])
+            await self._compactar()
+        return 200, {"eliminado": producto["id"]}
+
+    async def _guardar(self, parametros, datos):
+        async with self._escritura:
+            await self._compactar()
+        return 200, {"reporte": self.ruta_reporte, "movimientos": len(self.motor.movimientos)}
+
+
+# -----------------------------
+# EJECUCIÓN
+# -----------------------------
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON local del inventario BioSalud")
+    origen = parser.add_mutually_exclusive_group()
+    origen.add_argument("reporte", nargs="?", help="Reporte CSV (por defecto Inventario_BioSalud.csv)")
+    origen.add_argument("--sqlite", metavar="DB", help="Usar una base SQLite en lugar del reporte CSV")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    return parser.parse_args()
+
+
+async def _servir(args) -> None:
+    reporte = None if args.sqlite else (args.reporte or "Inventario_BioSalud.csv")
+    servidor = ServidorInventario(reporte, args.sqlite)
+    await servidor.iniciar(args.host, args.puerto)
+    print(f"Inventario en http://{args.host}:{args.puerto} ({reporte or args.sqlite}). Ctrl+C para detener.")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servidor.cerrar()
+        print("Reporte guardado. Servidor detenido.")
+
+
+def main():
+    try:
+        asyncio.run(_servir(_argumentos()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
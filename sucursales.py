@@ -0,0 +1,342 @@
+# sucursales.py
+# -----------------------------------------
+# Inventario de varias sucursales - BioSalud Natural SpA
+# Cada sucursal tiene su propia partición de movimientos (su reporte CSV o
+# instantánea .invb, con su diario) y todas comparten el catálogo de la
+# empresa (mismos ids, costos y precios):
+#   - los reportes de las sucursales se leen en paralelo, uno por proceso;
+#     cada proceso interpreta su archivo y calcula el vector de stock de su
+#     sucursal (punto de control o Σ netos), de modo que al proceso principal
+#     solo vuelven resultados ya armados
+#   - el stock de la empresa es la suma de los vectores por sucursal y la
+#     valorización (enteros, ver valorizacion.py) se hace sobre esa suma
+# Consolidación por línea de comandos (reemplaza la unión a mano de los CSV):
+#   python sucursales.py centro=Inventario_Centro.csv norte=Inventario_Norte.invb -o consolidado.csv
+# -----------------------------------------
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from cantidades import ESCALA, a_centesimas, a_pesos, formatear_cantidad, formatear_pesos, formatear_valor
+from catalogo import Catalogo
+from instantanea_binaria import InstantaneaBinaria, es_instantanea_binaria
+from motor_inventario import CargaReporte, MotorInventario
+from punto_control import stock_desde_punto_control
+from reporte_csv import cargar_reporte
+from valorizacion import Valorizacion, valorizar
+
+
+class Consolidado(NamedTuple):
+    """Catálogo común, stock (centésimas) y cantidad de movimientos de cada sucursal."""
+    catalogo: List[Dict]
+    stock: Dict[str, Dict[int, int]]
+    movimientos: Dict[str, int]
+
+
+# -----------------------------
+# LECTURA EN PARALELO (una tarea por sucursal)
+# -----------------------------
+
+def _stock_de_movimientos(productos: List[Dict], movimientos) -> Dict[int, int]:
+    """Stock tras importar (stock inicial 0): Σ netos por producto, en centésimas."""
+    stock = {p["id"]: 0 for p in productos}
+    for pid, neto in movimientos.netos_por_producto().items():
+        stock[pid] = stock.get(pid, 0) + neto
+    return stock
+
+
+def leer_stock_sucursal(ruta: str) -> Tuple[List[Dict], Dict[int, int], int]:
+    """
+    Tarea de un proceso del pool: (catálogo, stock en centésimas, cantidad de
+    movimientos) del reporte de una sucursal. Las instantáneas binarias se
+    responden desde el mmap; los CSV usan su punto de control si es válido.
+    """
+    if es_instantanea_binaria(ruta):
+        with InstantaneaBinaria(ruta) as inst:
+            return inst.productos(), inst.stock_actual(), len(inst)
+    productos, _, movimientos = cargar_reporte(ruta)
+    stock = stock_desde_punto_control(ruta, productos, movimientos) if productos else None
+    for p in productos:
+        p.pop("stock_actual", None)
+    if stock is None:
+        stock = _stock_de_movimientos(productos, movimientos)
+    return productos, stock, len(movimientos)
+
+
+def leer_carga_sucursal(ruta: str) -> CargaReporte:
+    """
+    Tarea de un proceso del pool: reporte leído y procesado (ver
+    MotorInventario.leer_reporte), con el stock ya calculado aunque no haya
+    punto de control, para que el proceso principal no recorra la historia.
+    """
+    carga = MotorInventario.leer_reporte(ruta)
+    if carga.stock is None:
+        carga = carga._replace(stock=_stock_de_movimientos(carga.productos, carga.movimientos))
+    return carga
+
+
+def _en_paralelo(tarea: Callable, rutas: List[str], procesos: Optional[int]) -> List:
+    """Aplica la tarea a cada ruta, en un proceso distinto si hay más de una (conserva el orden)."""
+    # Con un solo proceso el pool solo agrega el costo de serializar los resultados
+    if len(rutas) > 1 and (procesos or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            return list(pool.map(tarea, rutas))
+    return [tarea(ruta) for ruta in rutas]
+
+
+def unir_catalogos(catalogos: Dict[str, List[Dict]]) -> List[Dict]:
+    """
+    Une los catálogos de las sucursales por id (gana la primera sucursal que
+    trae el producto). Lanza ValueError si un mismo id tiene nombres distintos:
+    los reportes no comparten el catálogo de la empresa.
+    """
+    unidos: Dict[int, Dict] = {}
+    origen: Dict[int, str] = {}
+    for sucursal, productos in catalogos.items():
+        for p in productos:
+            previo = unidos.get(p["id"])
+            if previo is None:
+                unidos[p["id"]] = p
+                origen[p["id"]] = sucursal
+            elif previo["nombre"].strip().casefold() != p["nombre"].strip().casefold():
+                raise ValueError(f"El producto {p['id']} se llama '{previo['nombre']}' en "
+                                 f"'{origen[p['id']]}' y '{p['nombre']}' en '{sucursal}'")
+    return [unidos[pid] for pid in sorted(unidos)]
+
+
+def consolidar_reportes(rutas: Dict[str, str], procesos: Optional[int] = None) -> Consolidado:
+    """
+    Lee los reportes de las sucursales (nombre -> ruta) en paralelo y devuelve
+    el catálogo común y el stock de cada una. Solo vuelven catálogo y stock,
+    no los movimientos.
+    """
+    resultados = _en_paralelo(leer_stock_sucursal, list(rutas.values()), procesos)
+    catalogo = unir_catalogos({s: r[0] for s, r in zip(rutas, resultados)})
+    return Consolidado(catalogo,
+                       {s: r[1] for s, r in zip(rutas, resultados)},
+                       {s: r[2] for s, r in zip(rutas, resultados)})
+
+
+# -----------------------------
+# SUMAS Y VALORIZACIÓN
+# -----------------------------
+
+def stock_total(stocks: Iterable[Dict[int, int]]) -> Dict[int, int]:
+    """Σ de los vectores de stock (centésimas) por producto."""
+    total: Dict[int, int] = {}
+    for stock in stocks:
+        for pid, s in stock.items():
+            total[pid] = total.get(pid, 0) + s
+    return total
+
+
+def valorizar_sucursales(consolidado: Consolidado) -> Dict[str, Valorizacion]:
+    """Valorización de cada sucursal con el catálogo común."""
+    return {s: valorizar(consolidado.catalogo, stock) for s, stock in consolidado.stock.items()}
+
+
+def escribir_consolidado(ruta: str, consolidado: Consolidado) -> str:
+    """
+    CSV con el stock de cada producto por sucursal y en total, y el valor del
+    inventario de cada sucursal y de la empresa. Devuelve la ruta absoluta.
+    """
+    sucursales = list(consolidado.stock)
+    total = stock_total(consolidado.stock.values())
+    por_sucursal = valorizar_sucursales(consolidado)
+    empresa = valorizar(consolidado.catalogo, total)
+
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["== CONSOLIDADO SUCURSALES BIO SALUD NATURAL SpA =="])
+        w.writerow([])
+        w.writerow(["STOCK"])
+        w.writerow(["id", "nombre", "costo", "precio"] + sucursales + ["total"])
+        for p in consolidado.catalogo:
+            w.writerow([p["id"], p["nombre"], formatear_cantidad(p["costo"]), formatear_cantidad(p["precio"])]
+                       + [formatear_cantidad(consolidado.stock[s].get(p["id"], 0)) for s in sucursales]
+                       + [formatear_cantidad(total.get(p["id"], 0))])
+        w.writerow([])
+        w.writerow(["RESUMEN"])
+        w.writerow(["sucursal", "movimientos", "valor_inventario", "valor_venta_potencial"])
+        for s in sucursales:
+            w.writerow([s, consolidado.movimientos[s], formatear_valor(por_sucursal[s].total_costo),
+                        formatear_valor(por_sucursal[s].total_venta)])
+        w.writerow(["total", sum(consolidado.movimientos.values()), formatear_valor(empresa.total_costo),
+                    formatear_valor(empresa.total_venta)])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+    return os.path.abspath(ruta)
+
+
+# -----------------------------
+# INVENTARIO EN MEMORIA POR SUCURSAL
+# -----------------------------
+
+class InventarioSucursales:
+    """
+    Catálogo común y un MotorInventario por sucursal. Los motores comparten el
+    objeto Catalogo; cada uno tiene sus movimientos, libro de stock, índice
+    temporal y acumulados. Los productos se agregan, editan y eliminan aquí
+    para que todas las sucursales los vean.
+    """
+
+    def __init__(self, productos: Iterable[Dict] = ()):
+        self.catalogo = Catalogo(productos)
+        self.motores: Dict[str, MotorInventario] = {}
+
+    # ---------- sucursales ----------
+
+    def agregar_sucursal(self, sucursal: str) -> MotorInventario:
+        """Crea el motor (sin movimientos) de una sucursal nueva."""
+        if sucursal in self.motores:
+            raise ValueError(f"Ya existe la sucursal '{sucursal}'")
+        motor = MotorInventario()
+        motor.catalogo = self.catalogo
+        motor.stock_inicial.update({pid: 0 for pid in self.catalogo.ids()})
+        motor.stock_actual.update(motor.stock_inicial)
+        self.motores[sucursal] = motor
+        return motor
+
+    def motor(self, sucursal: str) -> MotorInventario:
+        motor = self.motores.get(sucursal)
+        if motor is None:
+            raise KeyError(f"No existe la sucursal '{sucursal}'")
+        return motor
+
+    def sucursales(self) -> List[str]:
+        return list(self.motores)
+
+    def cargar_reportes(self, rutas: Dict[str, str], procesos: Optional[int] = None) -> Dict[str, int]:
+        """
+        Reemplaza sucursales y catálogo por los reportes dados (nombre -> ruta),
+        leídos en paralelo. Devuelve los movimientos cargados por sucursal.
+        """
+        cargas = _en_paralelo(leer_carga_sucursal, list(rutas.values()), procesos)
+        self.catalogo.reemplazar(unir_catalogos({s: c.productos for s, c in zip(rutas, cargas)}))
+        self.motores.clear()
+        for sucursal, carga in zip(rutas, cargas):
+            # Sin productos: el catálogo común ya está armado y no se reemplaza
+            self.agregar_sucursal(sucursal).aplicar_carga(carga._replace(productos=[]))
+        return {s: len(c.movimientos) for s, c in zip(rutas, cargas)}
+
+    def exportar_reportes(self, rutas: Dict[str, str]) -> List[str]:
+        """Escribe el reporte (CSV o .invb) de cada sucursal dada (nombre -> ruta)."""
+        return [self.motor(s).exportar_reporte(ruta) for s, ruta in rutas.items()]
+
+    # ---------- movimientos ----------
+
+    def agregar_movimiento(self, sucursal: str, id_producto: int, entrada: float, salida: float,
+                           fecha: str = None) -> List:
+        """Registra el movimiento en la partición de la sucursal. Devuelve la fila registrada."""
+        return self.motor(sucursal).agregar_movimiento(id_producto, entrada, salida, fecha)
+
+    # ---------- catálogo común ----------
+
+    def agregar_producto(self, nombre: str, costo: float, precio: float) -> Dict:
+        """Agrega un producto con el primer id libre (stock 0 en todas las sucursales)."""
+        producto = {"id": self.catalogo.siguiente_id(), "nombre": nombre,
+                    "costo": a_centesimas(costo), "precio": a_centesimas(precio)}
+        self.catalogo.agregar(producto)
+        for motor in self.motores.values():
+            motor.stock_inicial[producto["id"]] = 0
+            motor.stock_actual.setdefault(producto["id"], 0)
+        return producto
+
+    def actualizar_producto(self, id_producto: int, **campos) -> Dict:
+        """Cambia nombre, costo o precio (en pesos) del producto en todas las sucursales."""
+        for campo in ("costo", "precio"):
+            if campo in campos:
+                campos[campo] = a_centesimas(campos[campo])
+        return self.catalogo.actualizar(id_producto, **campos)
+
+    def eliminar_producto(self, id_producto: int) -> None:
+        """Elimina el producto del catálogo y sus movimientos en todas las sucursales."""
+        for motor in self.motores.values():
+            motor.eliminar_producto(id_producto)
+        self.catalogo.eliminar(id_producto)
+
+    # ---------- stock y valorización ----------
+
+    def consolidado(self) -> Consolidado:
+        return Consolidado([dict(p) for p in self.catalogo],
+                           {s: dict(m.stock_actual) for s, m in self.motores.items()},
+                           {s: len(m.movimientos) for s, m in self.motores.items()})
+
+    def stock_por_sucursal(self) -> Dict[str, Dict[int, float]]:
+        """Vector de stock (unidades) de cada sucursal."""
+        return {s: m.vector_stock_actual() for s, m in self.motores.items()}
+
+    def vector_stock_actual(self) -> Dict[int, float]:
+        """Stock de la empresa por producto (Σ sucursales), en unidades."""
+        total = stock_total(m.stock_actual for m in self.motores.values())
+        return {pid: s / ESCALA for pid, s in total.items()}
+
+    def valorizacion(self) -> Valorizacion:
+        """Valorización de la empresa (stock sumado de todas las sucursales)."""
+        return valorizar(self.catalogo, stock_total(m.stock_actual for m in self.motores.values()))
+
+    def valorizacion_por_sucursal(self) -> Dict[str, Valorizacion]:
+        return {s: m.valorizacion() for s, m in self.motores.items()}
+
+    def valor_inventario(self) -> float:
+        """Σ sucursales Σ (stock_i * costo_i), en pesos"""
+        return a_pesos(self.valorizacion().total_costo)
+
+    def valor_venta_potencial(self) -> float:
+        """Σ sucursales Σ (stock_i * precio_i), en pesos"""
+        return a_pesos(self.valorizacion().total_venta)
+
+
+# -----------------------------
+# LÍNEA DE COMANDOS
+# -----------------------------
+
+def _rutas_de_argumentos(argumentos: List[str]) -> Dict[str, str]:
+    """'centro=Centro.csv' -> {'centro': 'Centro.csv'}; sin nombre se usa el del archivo."""
+    rutas: Dict[str, str] = {}
+    for argumento in argumentos:
+        nombre, separador, ruta = argumento.partition("=")
+        if not separador:
+            ruta = argumento
+            nombre = os.path.splitext(os.path.basename(argumento))[0]
+        if nombre in rutas:
+            raise ValueError(f"Sucursal repetida: '{nombre}'")
+        rutas[nombre] = ruta
+    return rutas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolida el inventario de varias sucursales")
+    parser.add_argument("reportes", nargs="+", help="Reportes .csv o .invb, como sucursal=ruta o solo ruta")
+    parser.add_argument("-o", "--salida", default=None, help="CSV consolidado de salida")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Procesos en paralelo (por defecto: CPUs)")
+    args = parser.parse_args()
+    try:
+        consolidado = consolidar_reportes(_rutas_de_argumentos(args.reportes), args.procesos)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    por_sucursal = valorizar_sucursales(consolidado)
+    empresa = valorizar(consolidado.catalogo, stock_total(consolidado.stock.values()))
+    print(f"{'Sucursal':<20} {'Movimientos':>12} {'Valor Inv.':>15} {'Valor Venta':>15}")
+    print("=" * 65)
+    for s, val in por_sucursal.items():
+        print(f"{s:<20} {consolidado.movimientos[s]:>12,} {formatear_pesos(val.total_costo):>15} "
+              f"{formatear_pesos(val.total_venta):>15}")
+    print("-" * 65)
+    print(f"{'TOTAL':<20} {sum(consolidado.movimientos.values()):>12,} {formatear_pesos(empresa.total_costo):>15} "
+          f"{formatear_pesos(empresa.total_venta):>15}")
+    if args.salida:
+        print(f"\nConsolidado escrito en: {escribir_consolidado(args.salida, consolidado)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# tabla_virtual.py
+# -----------------------------------------
+# Tabla virtualizada para Tkinter - BioSalud Natural SpA
+# ttk.Treeview que solo crea los ítems de las filas visibles (más un pequeño
+# margen). Al desplazarse se reutilizan los mismos ítems con los valores de la
+# nueva ventana de datos, por lo que el costo de refrescar o desplazar no
+# depende de cuántas filas tenga la tabla (100k+ movimientos).
+# -----------------------------------------
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List, Sequence, Tuple
+
+from instrumentacion import cronometrado
+
+# Una fila para la tabla: (valores, tags)
+Fila = Tuple[Sequence, Tuple[str, ...]]
+
+
+class TablaVirtual:
+    """
+    Tabla con scroll virtual.
+    columnas: lista de (id, título, ancho, anclaje).
+    Los datos se entregan con configurar(total, obtener_fila), donde
+    obtener_fila(i) devuelve (valores, tags) de la fila i (0 = primera).
+    Los métodos no definidos aquí (selection, item, tag_configure...) se delegan al Treeview.
+    """
+
+    def __init__(self, parent, columnas: List[Tuple[str, str, int, str]], height: int = 15, margen: int = 10):
+        self.frame = tk.Frame(parent, bg="white")
+        self.tree = ttk.Treeview(self.frame, columns=[c[0] for c in columnas],
+                                 show="headings", height=height)
+        for col, titulo, ancho, anclaje in columnas:
+            self.tree.heading(col, text=titulo)
+            self.tree.column(col, width=ancho, anchor=anclaje)
+
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._desplazar)
+        self.tree.configure(yscrollcommand=self._al_desplazar_tree)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.margen = margen
+        self._alto_filas = height
+        self._total = 0
+        self._obtener_fila: Callable[[int], Fila] = lambda i: ((), ())
+        self._inicio = 0
+        self._items: List[str] = []   # ítems del Treeview reutilizados
+        self._indice_de: dict = {}    # iid -> índice de fila en los datos
+
+        self.tree.bind("<MouseWheel>", self._rueda)
+        self.tree.bind("<Button-4>", lambda e: self._mover(-3))
+        self.tree.bind("<Button-5>", lambda e: self._mover(3))
+        self.tree.bind("<Prior>", lambda e: self._mover(-self._visibles()))
+        self.tree.bind("<Next>", lambda e: self._mover(self._visibles()))
+        self.tree.bind("<Configure>", lambda e: self._renderizar())
+
+    def __getattr__(self, nombre):
+        if nombre == "tree":
+            raise AttributeError(nombre)
+        return getattr(self.tree, nombre)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    # ---------- datos ----------
+
+    def configurar(self, total: int, obtener_fila: Callable[[int], Fila], inicio: int = None) -> None:
+        """Define la fuente de datos y redibuja la ventana visible."""
+        self._total = total
+        self._obtener_fila = obtener_fila
+        if inicio is not None:
+            self._inicio = inicio
+        self._renderizar()
+
+    def refrescar(self) -> None:
+        """Vuelve a leer las filas visibles (p. ej. tras cambiar datos sin cambiar el total)."""
+        self._renderizar()
+
+    def actualizar_fila(self, indice: int) -> None:
+        """Vuelve a leer una sola fila; si no está en la ventana visible no hace nada."""
+        posicion = indice - self._inicio
+        if 0 <= posicion < len(self._items) and indice < self._total:
+            valores, tags = self._obtener_fila(indice)
+            self.tree.item(self._items[posicion], values=valores, tags=tags)
+
+    def insertar_al_inicio(self, cantidad: int = 1) -> None:
+        """
+        Registra filas nuevas al comienzo de los datos. Si se está viendo el
+        principio se redibuja la ventana; si no, se conserva la posición del usuario.
+        """
+        self._total += cantidad
+        if self._inicio > 0:
+            self._inicio += cantidad
+            self._actualizar_scrollbar(self._visibles())
+        else:
+            self._renderizar()
+
+    # ---------- ventana visible ----------
+
+    def _visibles(self) -> int:
+        alto = self.tree.winfo_height()
+        fila = ttk.Style().lookup("Treeview", "rowheight") or 20
+        try:
+            fila = int(fila)
+        except (TypeError, ValueError):
+            fila = 20
+        if alto <= 1:
+            return self._alto_filas
+        # Descontar el encabezado (aprox. una fila)
+        return max(1, alto // fila - 1)
+
+    @cronometrado("gui.tabla_virtual.renderizar")
+    def _renderizar(self) -> None:
+        visibles = self._visibles()
+        self._inicio = max(0, min(self._inicio, self._total - visibles))
+        fin = min(self._total, self._inicio + visibles + self.margen)
+        seleccion = {self._indice_de.get(iid) for iid in self.tree.selection()}
+
+        necesarios = fin - self._inicio
+        while len(self._items) < necesarios:
+            self._items.append(self.tree.insert("", tk.END, values=()))
+        if len(self._items) > necesarios:
+            self.tree.delete(*self._items[necesarios:])
+            del self._items[necesarios:]
+
+        self._indice_de = {}
+        nueva_seleccion = []
+        for iid, i in zip(self._items, range(self._inicio, fin)):
+            valores, tags = self._obtener_fila(i)
+            self.tree.item(iid, values=valores, tags=tags)
+            self._indice_de[iid] = i
+            if i in seleccion:
+                nueva_seleccion.append(iid)
+        self.tree.selection_set(nueva_seleccion)
+        self.tree.yview_moveto(0)
+        self._actualizar_scrollbar(visibles)
+
+    def _actualizar_scrollbar(self, visibles: int) -> None:
+        if self._total <= 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        self.scrollbar.set(self._inicio / self._total,
+                           min(1.0, (self._inicio + visibles) / self._total))
+
+    def _mover(self, filas: int) -> str:
+        self._inicio += filas
+        self._renderizar()
+        return "break"
+
+    def _rueda(self, evento) -> str:
+        return self._mover(-3 if evento.delta > 0 else 3)
+
+    def _desplazar(self, *args) -> None:
+        """Comando de la barra de desplazamiento (moveto / scroll)."""
+        if args[0] == "moveto":
+            self._inicio = int(float(args[1]) * self._total)
+            self._renderizar()
+        elif args[0] == "scroll":
+            paso = int(args[1])
+            self._mover(paso * self._visibles() if args[2] == "pages" else paso)
+
+    def _al_desplazar_tree(self, primero: str, ultimo: str) -> None:
+        # El Treeview se desplazó solo (p. ej. flechas del teclado al final del margen):
+        # se traslada ese desplazamiento a la ventana de datos.
+        primero = float(primero)
+        if primero > 0 and self._items:
+            desplazamiento = int(round(primero * len(self._items)))
+            if desplazamiento:
+                self._inicio += desplazamiento
+                self._renderizar()
@@ -0,0 +1,86 @@
+# valorizacion.py
+# -----------------------------------------
+# Motor de valorización - BioSalud Natural SpA
+# Calcula en una sola pasada, para todos los productos:
+#   stock_i, valor_costo_i = stock_i * costo_i, valor_venta_i = stock_i * precio_i
+#   margen_i = valor_venta_i - valor_costo_i  y sus sumatorias (Σ)
+# Todo en enteros (ver cantidades.py): stock en centésimas por costo y precio
+# en centésimas de peso da valores exactos en diezmilésimas de peso.
+# Usa NumPy si está instalado; si no, un cálculo equivalente en Python puro.
+# -----------------------------------------
+
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional
+    np = None
+
+
+class Valorizacion(NamedTuple):
+    """
+    Resultado de la valorización: vectores alineados con el catálogo y totales.
+    Stock en centésimas de unidad; valores, márgenes y totales en diezmilésimas de peso.
+    """
+    ids: List[int]
+    stock: List[int]
+    valor_costo: List[int]
+    valor_venta: List[int]
+    margen: List[int]
+    total_costo: int
+    total_venta: int
+
+    @property
+    def total_margen(self) -> int:
+        return self.total_venta - self.total_costo
+
+
+def _valorizar_numpy(catalogo: List[Dict], stock: Dict[int, int]) -> Valorizacion:
+    n = len(catalogo)
+    ids = [p["id"] for p in catalogo]
+    v_stock = np.fromiter((stock.get(pid, 0) for pid in ids), dtype=np.int64, count=n)
+    v_costo = np.fromiter((p["costo"] for p in catalogo), dtype=np.int64, count=n)
+    v_precio = np.fromiter((p["precio"] for p in catalogo), dtype=np.int64, count=n)
+    valor_costo = v_stock * v_costo
+    valor_venta = v_stock * v_precio
+    return Valorizacion(
+        ids=ids,
+        stock=v_stock.tolist(),
+        valor_costo=valor_costo.tolist(),
+        valor_venta=valor_venta.tolist(),
+        margen=(valor_venta - valor_costo).tolist(),
+        total_costo=int(valor_costo.sum()),
+        total_venta=int(valor_venta.sum()),
+    )
+
+
+def _valorizar_python(catalogo: List[Dict], stock: Dict[int, int]) -> Valorizacion:
+    ids, v_stock, valor_costo, valor_venta, margen = [], [], [], [], []
+    total_costo = total_venta = 0
+    for p in catalogo:
+        s = stock.get(p["id"], 0)
+        vc = s * p["costo"]
+        vv = s * p["precio"]
+        ids.append(p["id"])
+        v_stock.append(s)
+        valor_costo.append(vc)
+        valor_venta.append(vv)
+        margen.append(vv - vc)
+        total_costo += vc
+        total_venta += vv
+    return Valorizacion(ids, v_stock, valor_costo, valor_venta, margen, total_costo, total_venta)
+
+
+def valorizar(catalogo: Iterable[Dict], stock: Dict[int, int],
+              usar_numpy: Optional[bool] = None) -> Valorizacion:
+    """
+    Valoriza todo el catálogo (costo y precio en centésimas de peso) con el vector
+    de stock dado en centésimas.
+    usar_numpy=None elige NumPy automáticamente si está disponible.
+    """
+    catalogo = list(catalogo)
+    if usar_numpy is None:
+        usar_numpy = np is not None
+    if usar_numpy and np is not None:
+        return _valorizar_numpy(catalogo, stock)
+    return _valorizar_python(catalogo, stock)